@@ -6,26 +6,40 @@ from fastapi import FastAPI
 # Main script which launches the api
 from starlette.middleware.cors import CORSMiddleware
 
-from create_sample_index import create_dummy_idx
-
 from src.api.documents import documents_router
 from src.api.indices import index_router
+from src.api.jobs import jobs_router
+from src.index.index import load_indices, save_indices
+from src.index.ingest_job import load_jobs
 from nltk_dependencies import setup_dependencies
-# Download dependencies
-setup_dependencies()
 
 # Configure logging
 logging.config.fileConfig('logging.conf', disable_existing_loggers=False)
 
 logger = logging.getLogger(__name__)
 
+# Verify NLTK resources, they are downloaded only if they are missing. Language data are loaded on first use
+nltk_resources_dir = setup_dependencies()
+
 # Configure NLTK - set the resource path to correct location
-nltk_resources_dir = os.path.join(os.getcwd(), 'resources\\nltk\\')
 nltk.data.path.append(nltk_resources_dir)
 logger.info(f'NLTK resources directory set to: {nltk_resources_dir}')
 
-# Create sample index
-create_dummy_idx()
+# Recover all indices saved by the previous run, new indices are persisted to the same directory
+index_directory = os.path.join(os.getcwd(), 'resources', 'indices')
+loaded_indices = load_indices(index_directory)
+logger.info(f'Loaded indices: {loaded_indices}')
+
+# Ingestion jobs interrupted by the previous run can be resumed from their checkpoints
+loaded_jobs = load_jobs(os.path.join(os.getcwd(), 'resources', 'jobs'))
+logger.info(f'Loaded {len(loaded_jobs)} ingestion jobs')
+
+# Create sample index if it was not saved before, CREATE_SAMPLE_INDEX=0 disables it
+sample_index_enabled = os.environ.get('CREATE_SAMPLE_INDEX', '1') != '0'
+if sample_index_enabled and ('dummyIdxEn' not in loaded_indices or 'dummyIdxCs' not in loaded_indices):
+    from create_sample_index import create_dummy_idx
+
+    create_dummy_idx(loaded_indices)
 
 app = FastAPI()
 
@@ -40,6 +54,13 @@ app.add_middleware(
 )
 
 
+@app.on_event('shutdown')
+def save_all_indices():
+    # Checkpoint all indices so their write-ahead logs do not need to be replayed on the next start
+    save_indices()
+    logger.info(f'Indices saved to {index_directory}')
+
+
 @app.get("/")
 async def root():
     return {"message": "A simple information retrieval API"}
@@ -52,5 +73,6 @@ async def say_hello(name: str):
 
 app.include_router(index_router)
 app.include_router(documents_router)
+app.include_router(jobs_router)
 
 logger.info('API is running')
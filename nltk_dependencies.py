@@ -1,3 +1,4 @@
+import json
 import logging
 import shutil
 
@@ -6,23 +7,103 @@ import os
 
 logger = logging.getLogger(__name__)
 
+script_dir = os.path.dirname(os.path.realpath(__file__))
+nltk_resources_dir = os.path.join(script_dir, 'resources', 'nltk')
+stopwords_dir = os.path.join(script_dir, 'resources', 'stopwords')
 
-# This script downloads necessary NLTK docs to the resources/nltk folder
-def setup_dependencies():
+# NLTK packages required by the preprocessing and paths of the resources they install
+nltk_packages = {
+    'wordnet': os.path.join('corpora', 'wordnet'),
+    'omw-1.4': os.path.join('corpora', 'omw-1.4'),
+    # word_tokenize of NLTK 3.9+ loads the punkt parameters from tab files instead of the pickled models
+    'punkt_tab': os.path.join('tokenizers', 'punkt_tab'),
+    # stopwords directory also holds the custom stopwords, so the downloaded package is recognized by its english file
+    'stopwords': os.path.join('corpora', 'stopwords', 'english'),
+}
+
+# Manifest of the installed resources, if it matches the resources directory nothing is downloaded or copied
+manifest_file = 'manifest.json'
+
+
+def _resource_exists(resource: str) -> bool:
+    """
+    Checks whether the resource is installed - either unpacked or as a zip archive
+    :param resource: path of the resource relative to the resources directory
+    :return: True if the resource exists
+    """
+    path = os.path.join(nltk_resources_dir, resource)
+    return os.path.exists(path) or os.path.exists(path + '.zip')
+
+
+def _stopword_files() -> dict:
+    """
+    Returns custom stopword files that are copied to the NLTK stopwords corpus
+    :return: dictionary of file name -> [size, modification time]
+    """
+    files = {}
+    for file in os.listdir(stopwords_dir):
+        stat = os.stat(os.path.join(stopwords_dir, file))
+        files[file] = [stat.st_size, stat.st_mtime_ns]
+    return files
+
+
+def _load_manifest() -> dict:
     """
-    This script downloads necessary NLTK docs to the resources/nltk folder
-    :return:
+    Loads the manifest of the installed resources
+    :return: the manifest or empty dictionary if there is none
     """
-    script_dir = os.path.dirname(os.path.realpath(__file__))
-    nltk_resources_dir = os.path.join(script_dir, 'resources/nltk/')
-    for dependency in ['wordnet', 'omw-1.4', 'punkt', 'stopwords']:
-        nltk.download(dependency, nltk_resources_dir)
+    try:
+        with open(os.path.join(nltk_resources_dir, manifest_file), 'r', encoding='utf8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _is_verified(manifest: dict, stopword_files: dict) -> bool:
+    """
+    Checks that all resources recorded in the manifest are still installed and that custom stopwords did not change
+    :param manifest: the manifest
+    :param stopword_files: current custom stopword files
+    :return: True if no resource needs to be installed
+    """
+    return set(manifest.get('packages', [])) == set(nltk_packages) \
+        and manifest.get('stopwords') == stopword_files \
+        and all(_resource_exists(resource) for resource in nltk_packages.values()) \
+        and all(os.path.exists(os.path.join(nltk_resources_dir, 'corpora', 'stopwords', file))
+                for file in stopword_files)
+
+
+def setup_dependencies() -> str:
+    """
+    Makes sure the necessary NLTK resources are in the resources/nltk folder. Resources are verified against
+    the manifest written by the last setup, so a restart does not access the network - only the missing packages
+    are downloaded
+    :return: path of the NLTK resources directory
+    """
+    stopword_files = _stopword_files()
+    if _is_verified(_load_manifest(), stopword_files):
+        logger.info('NLTK resources verified from manifest')
+        return nltk_resources_dir
+
+    installed = []
+    for package, resource in nltk_packages.items():
+        if _resource_exists(resource) or nltk.download(package, nltk_resources_dir, quiet=True):
+            installed.append(package)
+        else:
+            logger.warning(f'NLTK package {package} could not be downloaded')
 
     # Manually copy all files from stopwords directory to nltk/corpora/stopwords
-    for file in os.listdir(os.path.join(script_dir, 'resources/stopwords/')):
-        print(f'Copying file: "{file}" to "{script_dir}/nltk/corpora/stopwords"')
-        shutil.copy(os.path.join(script_dir, 'resources/stopwords', file),
-                    os.path.join(script_dir, 'resources/nltk', 'corpora/stopwords'))
+    nltk_stopwords_dir = os.path.join(nltk_resources_dir, 'corpora', 'stopwords')
+    os.makedirs(nltk_stopwords_dir, exist_ok=True)
+    for file in stopword_files:
+        logger.info(f'Copying file: "{file}" to "{nltk_stopwords_dir}"')
+        shutil.copy(os.path.join(stopwords_dir, file), nltk_stopwords_dir)
+
+    # Manifest is written only once all packages are installed, so the next start downloads the missing ones again
+    if len(installed) == len(nltk_packages):
+        with open(os.path.join(nltk_resources_dir, manifest_file), 'w', encoding='utf8') as file:
+            json.dump({'packages': installed, 'stopwords': stopword_files}, file)
+    return nltk_resources_dir
 
 
 if __name__ == '__main__':
@@ -1,5 +1,8 @@
 grammar BooleanGrammar;
 
+// Generate the parser to src/preprocessing/boolean/parser from this directory:
+// antlr4 -Dlanguage=Python3 -visitor -o ../../src/preprocessing/boolean/parser BooleanGrammar.g4
+// The recursive descent parser in boolean_parser.py mirrors these tokens in _token_pattern, keep them aligned
 
 // Data types
 AND: 'AND';
@@ -7,20 +10,28 @@ OR: 'OR';
 NOT: 'NOT';
 LPAR: '(';
 RPAR: ')';
+QUOTE: '"';
+// NEAR/n matches the operands in either order with at most n tokens between them, NEAR/0 means adjacent
+NEAR: 'NEAR/' [0-9]+;
 WHITESPACE: [\r\t ]+;
 
-QUERY_TERM: ((','|'!'|'?'|'\''|':'|'.')|[A-Za-z0-9'\u0080-\uFFFF+-])+;
+QUERY_TERM: [,!?':.A-Za-z0-9\u0080-\uFFFF+-]+;
 
 start: expression;
 
 termChain: QUERY_TERM | QUERY_TERM WHITESPACE termChain;
 
+// Terms of a phrase must occur in the document consecutively and in this order
+phrase: QUOTE termChain QUOTE;
+
+proximityOperand: QUERY_TERM | phrase;
+
 expression:
     LPAR expression RPAR #parenthesis
     | NOT WHITESPACE expression #not
+    | proximityOperand WHITESPACE NEAR WHITESPACE proximityOperand #near
     | expression WHITESPACE AND WHITESPACE expression #and
     | expression WHITESPACE OR WHITESPACE expression #or
-//    | NOT WHITESPACE expression #not
+    | phrase #phraseQuery
     | termChain #queryTerm
     ;
-
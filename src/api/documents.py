@@ -4,6 +4,7 @@ from fastapi import APIRouter, UploadFile
 
 from src.api.dtos import DocumentDto
 from src.index.index import get_index
+from src.index.ingest_job import submit_job
 
 logger = logging.getLogger(__name__)
 
@@ -22,25 +23,26 @@ def get_document(index_name: str, document_id: str):
     :return: DocumentDto
     """
     index = get_index(index_name)
-    if document_id not in index.documents:
+    # Single lookup in one snapshot, a concurrent delete cannot remove the document between a check and a read
+    document = index.snapshot().get_document(document_id)
+    if document is None:
         return {"message": f"Document with id {document_id} not found", "success": False}
-    return {"success": True, "message": DocumentDto.from_domain_object(index.documents[document_id])}
+    return {"success": True, "message": DocumentDto.from_domain_object(document)}
 
 
 @documents_router.post('/{index_name}/documents/files')
 def add_document(index_name: str, dataFile: UploadFile):
     """
-    Adds a document to an index
+    Adds documents from a file to an index. The file is indexed by a background job, its id is returned in jobId
     :param index_name: Name of the index
     :param dataFile: File to add
     :return: message with success: true or false otherwise
     """
     try:
-        index = get_index(index_name)  # get the index
         logger.info(f'Indexing new documents in index {index_name}')
 
-        index.add_json_to_index(dataFile)  # add the file to the index
-        return {"success": True, "message": f"Files were successfully added"}
+        job = submit_job(index_name, dataFile.file, dataFile.filename)  # add the file to the index in background
+        return {"success": True, "jobId": job.id, "message": f"Files are being added by job {job.id}"}
 
     except ValueError as e:
         return {"success": False, "message": str(e)}
@@ -8,6 +8,7 @@ from pydantic.main import BaseModel as Model
 from src.index.document import Document
 from src.index.index_config import IndexConfig
 from src.preprocessing.preprocessing import PreprocessorConfig, Preprocessor
+from src.search_model.vectorized import PYTHON_BACKEND
 
 
 class PreprocessorConfigDto(Model):
@@ -21,6 +22,7 @@ class PreprocessorConfigDto(Model):
     useStemmer: bool
     lang: str
     removeAccentsAfterStemming: bool
+    compiledPipeline: Optional[bool]  # tokenize by compiled regex instead of NLTK word_tokenize, default false
 
     def to_domain_object(self):
         """
@@ -35,6 +37,7 @@ class PreprocessorConfigDto(Model):
             use_stemmer=self.useStemmer,
             lang=self.lang,
             remove_accents_after_stemming=self.removeAccentsAfterStemming,
+            compiled_pipeline=self.compiledPipeline is True,
         )
 
 
@@ -44,6 +47,9 @@ class IndexConfigDto(Model):
     """
     name: str
     preprocessorConfig: PreprocessorConfigDto
+    scoringBackend: Optional[str]  # backend of the ranked models - python (default) or numpy
+    positional: Optional[bool]  # store positions of the terms for phrase and proximity queries
+    pruning: Optional[bool]  # prune top-k BM25 queries (default), false scores all matching documents
 
     def to_domain_object(self):
         """
@@ -53,6 +59,9 @@ class IndexConfigDto(Model):
         return IndexConfig(
             name=self.name,
             preprocessor=Preprocessor(self.preprocessorConfig.to_domain_object()),
+            scoring_backend=self.scoringBackend if self.scoringBackend is not None else PYTHON_BACKEND,
+            positional=self.positional is True,
+            pruning=self.pruning is not False,
         )
 
 
@@ -90,6 +99,7 @@ class DocumentSearchResultDto(Model):
     documents: List[DocumentDto]
     stopwords: Optional[List[str]]
     totalDocuments: int
+    plan: Optional[dict]  # plan of a boolean query with estimated numbers of documents, only if explain was set
 
 
 class IndexDto(Model):
@@ -117,4 +127,47 @@ class QueryDto(Model):
     """
     query: str  # query string
     topK: Optional[int]  # number of results to return
+    offset: Optional[int]  # number of best results to skip, used for pagination
     model: ModelVariant  # model variant
+    explain: Optional[bool]  # return plan of a boolean query
+
+
+class BatchQueryDto(Model):
+    """
+    Batch of queries searched together
+    """
+    queries: List[QueryDto]  # queries, results are returned in the same order
+
+
+class JobDto(Model):
+    """
+    Data transfer object for an ingestion job
+    """
+    id: str  # id of the job
+    indexName: str  # name of the index the documents are added to
+    status: str  # queued, running, completed, failed, cancelled or interrupted
+    documentsProcessed: int  # number of documents indexed so far
+    documentsPerSecond: float  # indexing speed of the current run
+    bytesProcessed: int  # number of bytes of the uploaded file processed so far
+    totalBytes: int  # size of the uploaded file
+    etaSeconds: Optional[float]  # estimated remaining time, None if it is not known
+    error: Optional[str]  # error message if the job failed
+
+    @staticmethod
+    def from_domain_object(job: 'IngestJob'):
+        """
+        Converts an IngestJob object to a DTO
+        :param job: IngestJob object
+        :return: JobDto
+        """
+        return JobDto(
+            id=job.id,
+            indexName=job.index_name,
+            status=job.status.value,
+            documentsProcessed=job.documents_done,
+            documentsPerSecond=job.documents_per_second(),
+            bytesProcessed=job.bytes_done,
+            totalBytes=job.total_bytes,
+            etaSeconds=job.eta_seconds(),
+            error=job.error,
+        )
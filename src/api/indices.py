@@ -5,9 +5,11 @@ from typing import List, Dict
 from fastapi import APIRouter, Form, UploadFile, File
 from pydantic.class_validators import Optional
 
-from src.api.dtos import DocumentDto, IndexConfigDto, PreprocessorConfigDto, QueryDto, DocumentSearchResultDto
+from src.api.dtos import DocumentDto, IndexConfigDto, PreprocessorConfigDto, QueryDto, DocumentSearchResultDto, \
+    BatchQueryDto
 from src.index.index import add_index, Index, delete_index, get_index
 from src.index.index import get_all_indices as _get_all_indices
+from src.index.ingest_job import submit_job
 
 # This module contains all the endpoints in the /indices path
 # Since the app is very small some of the business logic is placed here instead of service layer
@@ -21,28 +23,32 @@ logger = logging.getLogger(__name__)
 
 
 @index_router.post('/{name}')
-async def create_idx(name: str, idxConfig: str = Form(...), dataFile: Optional[UploadFile] = None):
+def create_idx(name: str, idxConfig: str = Form(...), dataFile: Optional[UploadFile] = None):
     """
-    Creates an index
+    Creates an index. Documents from the data file are indexed by a background job, its id is returned in jobId
     :param name: Name of the index
-    :param idxConfig: json with configuration
+    :param idxConfig: json with configuration of the preprocessor, optionally with scoringBackend (python or numpy)
+    and positional (true stores positions of the terms for phrase and proximity queries) and pruning (false scores
+    all documents matching BM25 queries instead of pruning the top documents)
     :param dataFile: File containing the docs to index - may be null
     :return: True if successful, False otherwise
     """
     try:
-        preprocessor_config_dto = PreprocessorConfigDto(**json.loads(idxConfig))
-        index_config_dto = IndexConfigDto(name=name, preprocessorConfig=preprocessor_config_dto)
+        config = json.loads(idxConfig)
+        preprocessor_config_dto = PreprocessorConfigDto(**config)
+        index_config_dto = IndexConfigDto(name=name, preprocessorConfig=preprocessor_config_dto,
+                                          scoringBackend=config.get('scoringBackend'),
+                                          positional=config.get('positional'), pruning=config.get('pruning'))
         add_index(name, Index(index_config_dto.to_domain_object(), []))
 
         if not dataFile:
             # Process datafile if provided
             return {"success": True, "message": f"Index {name} was successfully created."}
 
-        index = get_index(name)
         logger.info("Indexing docs file")
-        documents = index.add_json_to_index(dataFile)
-        return {"success": True,
-                "message": f"Index {name} was successfully created with {len(documents)} documents."}
+        job = submit_job(name, dataFile.file, dataFile.filename)
+        return {"success": True, "jobId": job.id,
+                "message": f"Index {name} was successfully created, documents are being indexed by job {job.id}."}
     except ValueError as e:
         return {"success": False, "message": str(e)}
 
@@ -87,6 +93,19 @@ def get_all_indices():
     return {"success": True, "message": _get_all_indices()}
 
 
+@index_router.get('/{index_name}/cache')
+def cache_stats(index_name: str):
+    """
+    Returns hit and miss counters and sizes of the caches of an index
+    :param index_name: Name of the index
+    :return: statistics of the caches
+    """
+    try:
+        return {"success": True, "message": get_index(index_name).cache_stats()}
+    except ValueError as e:
+        return {"success": False, "message": str(e)}
+
+
 @index_router.post('/{index_name}/search')
 def search(index_name: str, query_dto: QueryDto) -> dict[str, DocumentSearchResultDto | bool] | dict[str, str | bool]:
     """
@@ -101,3 +120,20 @@ def search(index_name: str, query_dto: QueryDto) -> dict[str, DocumentSearchResu
         return {"success": True, "message": result}
     except ValueError as e:
         return {"success": False, "message": str(e)}
+
+
+@index_router.post('/{index_name}/search/batch')
+def search_batch(index_name: str, batch_dto: BatchQueryDto) -> dict[str, list[DocumentSearchResultDto] | bool] | \
+                                                               dict[str, str | bool]:
+    """
+    Searches an index for multiple queries at once
+    :param index_name: Name of the index
+    :param batch_dto: BatchQueryDto object
+    :return: results in the order of the queries
+    """
+    try:
+        index = get_index(index_name)
+        results = index.search_batch(batch_dto.queries)
+        return {"success": True, "message": results}
+    except ValueError as e:
+        return {"success": False, "message": str(e)}
@@ -0,0 +1,63 @@
+import logging
+
+from fastapi import APIRouter
+
+from src.api.dtos import JobDto
+from src.index.ingest_job import get_job, get_all_jobs, cancel_job, resume_job
+
+# This module contains all the endpoints in the /jobs path
+
+# API router for the ingestion jobs
+jobs_router = APIRouter(
+    prefix='/jobs'
+)
+
+logger = logging.getLogger(__name__)
+
+
+@jobs_router.get('/')
+def get_jobs():
+    """
+    Returns all ingestion jobs
+    :return: List of jobs
+    """
+    return {"success": True, "message": [JobDto.from_domain_object(job) for job in get_all_jobs()]}
+
+
+@jobs_router.get('/{job_id}')
+def get_job_progress(job_id: str):
+    """
+    Returns status and progress of an ingestion job
+    :param job_id: Id of the job
+    :return: JobDto
+    """
+    try:
+        return {"success": True, "message": JobDto.from_domain_object(get_job(job_id))}
+    except ValueError as e:
+        return {"success": False, "message": str(e)}
+
+
+@jobs_router.post('/{job_id}/cancel')
+def cancel(job_id: str):
+    """
+    Cancels an ingestion job. Documents indexed before the cancellation are kept
+    :param job_id: Id of the job
+    :return: JobDto
+    """
+    try:
+        return {"success": True, "message": JobDto.from_domain_object(cancel_job(job_id))}
+    except ValueError as e:
+        return {"success": False, "message": str(e)}
+
+
+@jobs_router.post('/{job_id}/resume')
+def resume(job_id: str):
+    """
+    Resumes failed, cancelled or interrupted ingestion job from its last checkpoint
+    :param job_id: Id of the job
+    :return: JobDto
+    """
+    try:
+        return {"success": True, "message": JobDto.from_domain_object(resume_job(job_id))}
+    except ValueError as e:
+        return {"success": False, "message": str(e)}
@@ -0,0 +1,224 @@
+import re
+from bisect import bisect_left
+from typing import Iterable, Iterator, List, Optional, Sequence, Union
+
+CONTAINER_BITS = 16  # docnos are split to containers by their high bits, each container holds 2^16 docnos
+CONTAINER_SIZE = 1 << CONTAINER_BITS
+CONTAINER_BYTES = CONTAINER_SIZE // 8
+ARRAY_CONTAINER_LIMIT = 4096  # containers with more values are stored as bitsets, below it a set is smaller
+
+# Array container is a frozenset of the low bits of the docnos, bitset container is an int with bit per docno
+Container = Union[frozenset, int]
+
+_nonzero_bytes = re.compile(rb'[^\x00]')
+_byte_bits = [tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256)]
+
+
+def _bitset_values(bits: int) -> List[int]:
+    """
+    Returns values of the bitset in ascending order
+    :param bits: the bitset
+    :return: list of values
+    """
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+    values = []
+    for match in _nonzero_bytes.finditer(data):
+        offset = match.start()
+        values.extend(offset << 3 | bit for bit in _byte_bits[data[offset]])
+    return values
+
+
+def _to_bitset(values: Iterable[int]) -> int:
+    """
+    Converts values to a bitset
+    :param values: values lower than CONTAINER_SIZE
+    :return: the bitset
+    """
+    data = bytearray(CONTAINER_BYTES)
+    for value in values:
+        data[value >> 3] |= 1 << (value & 7)
+    return int.from_bytes(data, 'little')
+
+
+def _optimize(bits: int) -> Optional[Container]:
+    """
+    Converts result of a bitset operation to the smaller container
+    :param bits: the bitset
+    :return: container or None if the bitset is empty
+    """
+    cardinality = bits.bit_count()
+    if cardinality == 0:
+        return None
+    return frozenset(_bitset_values(bits)) if cardinality <= ARRAY_CONTAINER_LIMIT else bits
+
+
+def _filter(values: frozenset, bits: int, keep: bool) -> Optional[Container]:
+    """
+    Filters values of an array container by a bitset
+    :param values: the array container
+    :param bits: the bitset container
+    :param keep: True keeps values that are in the bitset, False keeps values that are not
+    :return: container or None if no value is kept
+    """
+    data = bits.to_bytes(CONTAINER_BYTES, 'little')
+    values = frozenset(value for value in values if (data[value >> 3] >> (value & 7) & 1) == keep)
+    return values if len(values) > 0 else None
+
+
+def _and(first: Container, second: Container) -> Optional[Container]:
+    if isinstance(first, frozenset):
+        if isinstance(second, frozenset):
+            return first & second or None
+        return _filter(first, second, True)
+    if isinstance(second, frozenset):
+        return _filter(second, first, True)
+    return _optimize(first & second)
+
+
+def _or(first: Container, second: Container) -> Container:
+    if isinstance(first, frozenset) and isinstance(second, frozenset):
+        values = first | second
+        return values if len(values) <= ARRAY_CONTAINER_LIMIT else _to_bitset(values)
+    first = _to_bitset(first) if isinstance(first, frozenset) else first
+    second = _to_bitset(second) if isinstance(second, frozenset) else second
+    return first | second
+
+
+def _and_not(first: Container, second: Container) -> Optional[Container]:
+    if isinstance(first, frozenset):
+        if isinstance(second, frozenset):
+            return first - second or None
+        return _filter(first, second, False)
+    second = _to_bitset(second) if isinstance(second, frozenset) else second
+    return _optimize(first & ~second)
+
+
+class Bitmap:
+    """
+    Compressed set of docnos in the style of roaring bitmaps. Docnos are split to containers by their high 16 bits,
+    sparse containers are sets of the low bits and dense containers are bitsets. Operations combine only containers
+    with the same high bits, so their cost depends on the size of the operands and not on the size of the segment.
+    Bitmaps are never modified once created
+    """
+
+    __slots__ = ('keys', 'containers')
+
+    def __init__(self, keys: List[int] = None, containers: List[Container] = None):
+        """
+        Initializes the bitmap
+        :param keys: high bits of the containers in ascending order
+        :param containers: containers of the keys, none of them can be empty
+        """
+        self.keys = keys if keys is not None else []
+        self.containers = containers if containers is not None else []
+
+    @staticmethod
+    def from_sorted(docnos: Sequence[int]) -> 'Bitmap':
+        """
+        Creates bitmap from docnos in ascending order, e.g. from the postings of a term
+        :param docnos: sequence of docnos
+        :return: Bitmap
+        """
+        bitmap, start = Bitmap(), 0
+        while start < len(docnos):
+            key = docnos[start] >> CONTAINER_BITS
+            end = bisect_left(docnos, (key + 1) << CONTAINER_BITS, start)
+            base = key << CONTAINER_BITS
+            values = docnos[start:end] if base == 0 else map(base.__rsub__, docnos[start:end])
+            bitmap.keys.append(key)
+            bitmap.containers.append(frozenset(values) if end - start <= ARRAY_CONTAINER_LIMIT
+                                     else _to_bitset(values))
+            start = end
+        return bitmap
+
+    @staticmethod
+    def from_bitset(bits: bytes, size: int) -> 'Bitmap':
+        """
+        Creates bitmap from a bitset with bit docno & 7 of byte docno >> 3 set for each docno
+        :param bits: the bitset
+        :param size: number of docnos the bitset covers, higher bits are ignored
+        :return: Bitmap
+        """
+        bitmap = Bitmap()
+        for key in range((size + CONTAINER_SIZE - 1) // CONTAINER_SIZE):
+            start = key * CONTAINER_BYTES
+            container = int.from_bytes(bits[start:start + CONTAINER_BYTES], 'little')
+            container &= (1 << min(size - (key << CONTAINER_BITS), CONTAINER_SIZE)) - 1
+            container = _optimize(container)
+            if container is not None:
+                bitmap.keys.append(key)
+                bitmap.containers.append(container)
+        return bitmap
+
+    @staticmethod
+    def full(size: int) -> 'Bitmap':
+        """
+        Creates bitmap of all docnos lower than size
+        :param size: number of docnos
+        :return: Bitmap
+        """
+        bitmap = Bitmap()
+        for key in range((size + CONTAINER_SIZE - 1) // CONTAINER_SIZE):
+            n_values = min(size - (key << CONTAINER_BITS), CONTAINER_SIZE)
+            bitmap.keys.append(key)
+            bitmap.containers.append(frozenset(range(n_values)) if n_values <= ARRAY_CONTAINER_LIMIT
+                                     else (1 << n_values) - 1)
+        return bitmap
+
+    def __len__(self):
+        return sum(len(container) if isinstance(container, frozenset) else container.bit_count()
+                   for container in self.containers)
+
+    def __bool__(self):
+        return len(self.keys) > 0
+
+    def __iter__(self) -> Iterator[int]:
+        """
+        Iterates over the docnos in ascending order
+        :return: iterator of docnos
+        """
+        for key, container in zip(self.keys, self.containers):
+            base = key << CONTAINER_BITS
+            values = sorted(container) if isinstance(container, frozenset) else _bitset_values(container)
+            yield from (values if base == 0 else map(base.__add__, values))
+
+    def __and__(self, other: 'Bitmap') -> 'Bitmap':
+        result = Bitmap()
+        other_containers = dict(zip(other.keys, other.containers))
+        for key, container in zip(self.keys, self.containers):
+            if key in other_containers:
+                container = _and(container, other_containers[key])
+                if container is not None:
+                    result.keys.append(key)
+                    result.containers.append(container)
+        return result
+
+    def __or__(self, other: 'Bitmap') -> 'Bitmap':
+        containers = dict(zip(self.keys, self.containers))
+        for key, container in zip(other.keys, other.containers):
+            containers[key] = _or(containers[key], container) if key in containers else container
+        keys = sorted(containers)
+        return Bitmap(keys, [containers[key] for key in keys])
+
+    def __sub__(self, other: 'Bitmap') -> 'Bitmap':
+        """
+        Returns docnos of this bitmap that are not in the other bitmap (and not)
+        """
+        result = Bitmap()
+        other_containers = dict(zip(other.keys, other.containers))
+        for key, container in zip(self.keys, self.containers):
+            if key in other_containers:
+                container = _and_not(container, other_containers[key])
+                if container is None:
+                    continue
+            result.keys.append(key)
+            result.containers.append(container)
+        return result
+
+    def size_in_bytes(self) -> int:
+        """
+        Returns approximate memory used by the containers
+        :return: number of bytes
+        """
+        return sum(8 * len(container) if isinstance(container, frozenset) else CONTAINER_BYTES
+                   for container in self.containers)
@@ -1,6 +1,6 @@
 import math
 from datetime import datetime
-from typing import List, Union
+from typing import List, Union, Dict
 
 
 class Document:
@@ -11,7 +11,7 @@ class Document:
 
     def __init__(self, doc_id: str, tokens: List[str], title: Union[str, None], text: str,
                  date: datetime = datetime.now(),
-                 additional_properties: {} = None):
+                 additional_properties: {} = None, positional: bool = False):
         """
         Initializes the document object
         :param doc_id: the document id
@@ -19,6 +19,7 @@ class Document:
         :param text: text of the document
         :param date: date the document was indexed
         :param additional_properties: additional properties
+        :param positional: keep positions of the terms for positional indices
         """
         if additional_properties is None:
             additional_properties = {}
@@ -31,6 +32,8 @@ class Document:
         self.bow_log, self.bow_int = Document.calculate_bow(tokens)
         self.length = len(tokens)  # length of the document
         self.properties = additional_properties
+        # dictionary of term: ascending positions of the term in the tokens, None if positions are not kept
+        self.positions = Document.term_positions(tokens) if positional else None
 
     @property
     def terms(self):
@@ -40,6 +43,59 @@ class Document:
         """
         return list(self.bow_log.keys())
 
+    def to_dict(self) -> dict:
+        """
+        Serializes the preprocessed document to a json serializable dictionary
+        :return: dictionary
+        """
+        return {
+            'id': self.id,
+            'title': self.title,
+            'text': self.text,
+            'date': self.date.isoformat() if self.date else None,
+            'properties': self.properties,
+            'terms': self.bow_int,
+            'length': self.length,
+            'positions': self.positions,
+        }
+
+    @staticmethod
+    def from_dict(document: dict) -> 'Document':
+        """
+        Creates document from a dictionary created by to_dict(). The text is not preprocessed again
+        :param document: dictionary with the document
+        :return: Document
+        """
+        return Document.from_terms(doc_id=document['id'], bow_int=document['terms'], length=document['length'],
+                                   title=document['title'], text=document['text'],
+                                   date=datetime.fromisoformat(document['date']) if document['date'] else None,
+                                   additional_properties=document['properties'],
+                                   positions=document.get('positions'))
+
+    @staticmethod
+    def from_terms(doc_id: str, bow_int: Dict[str, int], length: int, title: Union[str, None], text: str,
+                   date: datetime, additional_properties: {} = None,
+                   positions: Dict[str, List[int]] = None) -> 'Document':
+        """
+        Creates document from already counted terms, e.g. when the text was preprocessed in another process
+        :param doc_id: the document id
+        :param bow_int: dictionary of term: frequency in the document
+        :param length: number of tokens of the document
+        :param title: title of the document
+        :param text: text of the document
+        :param date: date the document was indexed
+        :param additional_properties: additional properties
+        :param positions: dictionary of term: ascending positions of the term, None if positions are not kept
+        :return: Document
+        """
+        result = Document(doc_id=doc_id, tokens=[], title=title, text=text, date=date,
+                          additional_properties=additional_properties)
+        result.bow_int = bow_int
+        result.bow_log = Document.log_bow(bow_int)
+        result.length = length
+        result.positions = positions
+        return result
+
     def __str__(self):
         return f'Document:\n\tid: {self.id}\n\ttokens: {self.terms}'
 
@@ -50,13 +106,44 @@ class Document:
         This property is lazy initialized
         :return:
         """
-        bow_log, bow_int = {}, {}
+        bow_int = Document.count_terms(tokens)
+        return Document.log_bow(bow_int), bow_int
+
+    @staticmethod
+    def count_terms(tokens: List[str]) -> Dict[str, int]:
+        """
+        Returns bag of words with integer term frequencies
+        :param tokens: tokens of the document
+        :return: dictionary of term: frequency in the document
+        """
+        bow_int = {}
         for token in tokens:
-            if token not in bow_log:
-                bow_log[token], bow_int[token] = 1, 1
+            if token not in bow_int:
+                bow_int[token] = 1
             else:
-                bow_log[token] += 1
                 bow_int[token] += 1
-        for token in bow_log:
-            bow_log[token] = 1 + math.log(bow_log[token])
-        return bow_log, bow_int
+        return bow_int
+
+    @staticmethod
+    def term_positions(tokens: List[str]) -> Dict[str, List[int]]:
+        """
+        Returns positions of the terms in the tokens
+        :param tokens: tokens of the document
+        :return: dictionary of term: ascending positions of the term
+        """
+        positions = {}
+        for position, token in enumerate(tokens):
+            if token not in positions:
+                positions[token] = [position]
+            else:
+                positions[token].append(position)
+        return positions
+
+    @staticmethod
+    def log_bow(bow_int: Dict[str, int]) -> Dict[str, float]:
+        """
+        Returns bag of words with precalculated log tf values
+        :param bow_int: bag of words with integer term frequencies
+        :return: dictionary of term: 1 + log(tf)
+        """
+        return {token: 1 + math.log(tf) for token, tf in bow_int.items()}
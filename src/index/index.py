@@ -1,45 +1,372 @@
-import json
+import itertools
 import logging
+import os
+import threading
 import uuid
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple, Iterable
 
 from fastapi import UploadFile
 
 from src.api.dtos import DocumentDto, IndexDto, ModelVariant, QueryDto, DocumentSearchResultDto
 from src.index.document import Document
 from src.index.index_config import IndexConfig
-from src.index.term_info import TermInfo
+from src.index.json_stream import iter_json_documents, batched
+from src.index.merge_policy import TieredMergePolicy
+from src.index.result_cache import ResultCache, RESULT_CACHE_SIZE
+from src.index.segment import Segment
+from src.index.segment_file import SegmentFile, write_segment, stored_fields_cache
+from src.index.snapshot import IndexSnapshot, SnapshotDocuments
+from src.index.term_info import decoded_postings_cache
+from src.index.write_ahead_log import WriteAheadLog
+from src.preprocessing.parallel_preprocessing import PreprocessingPool
 from src.search_model.bm25_model import Bm25Model
-from src.search_model.boolean_model import BooleanModel
+from src.search_model.boolean_model import BooleanModel, parsed_query_cache
 from src.search_model.search_model import SearchModel
 from src.search_model.tfidf_model import TfIdfModel
 
 # All indexes
 _indices = {}
 models = ['tf_idf', 'bool', 'bm25']
+SEGMENT_FILE_EXTENSION = '.seg'
+LOG_FILE_EXTENSION = '.wal'
+LOG_CHECKPOINT_SIZE = 64 * 1024 * 1024  # size of the write-ahead log in bytes after which a checkpoint is made
+INGEST_BATCH_SIZE = 1000  # number of documents from an uploaded file that are preprocessed and indexed at once
+MAX_BATCH_QUERIES = 10000  # maximum number of queries in a single batch search
+_index_directory: Optional[str] = None  # directory where indices are persisted, None if persistence is disabled
 
 logger = logging.getLogger(__name__)
 
 
 class Index:
     """
-    Index is a structure that holds all specific documents of the same type (semantically)
+    Index is a structure that holds all specific documents of the same type (semantically).
+    Documents are stored in immutable segments - each added batch creates a new segment and segments are
+    merged in the background.
+    Searches read a snapshot of the index and never take a lock. Writers are serialized by the write lock and every
+    modification is published as a new snapshot with a higher generation
     """
 
-    def __init__(self, config: IndexConfig, initial_batch: List[Document] = None):
+    def __init__(self, config: IndexConfig, initial_batch: List[Document] = None,
+                 merge_policy: TieredMergePolicy = None, preprocessing_workers: int = None,
+                 result_cache_size: int = RESULT_CACHE_SIZE):
         self.config: IndexConfig = config
-        self.inverted_idx: Dict[str, TermInfo] = {}  # inverted index for searching
-        self.documents: Dict[str, Document] = {}  # dictionary of all documents in the index
+        # Results of searches of the current generation, size is the total number of cached result rows
+        self.result_cache = ResultCache(result_cache_size)
+        # Worker processes for preprocessing of document batches, None uses all CPUs
+        self.preprocessing_pool = PreprocessingPool(config.preprocessor, preprocessing_workers)
+        # Current snapshot of the index, replaced atomically by writers
+        self._snapshot = IndexSnapshot(0, ())
+        self.documents = SnapshotDocuments(self)  # read-only dictionary of all documents in the index
+        self.merge_policy = merge_policy if merge_policy is not None else TieredMergePolicy()
         self.models: Dict[str, SearchModel] = {
-            'tfidf': TfIdfModel(self, self.config.preprocessor),
+            'tfidf': TfIdfModel(self, self.config.preprocessor, backend=self.config.scoring_backend),
             'bool': BooleanModel(self, self.config.preprocessor),
-            'bm25': Bm25Model(self, self.config.preprocessor)
+            'bm25': Bm25Model(self, self.config.preprocessor, pruning=self.config.pruning,
+                              backend=self.config.scoring_backend)
         }
+        # Write-ahead log - if attached every modification is logged before it is acknowledged
+        self.wal: Optional[WriteAheadLog] = None
+        self.checkpoint_path: Optional[str] = None  # segment file the log is checkpointed to
+        self._write_lock = threading.RLock()  # writers must apply operations in the same order they are logged
+        self._checkpoint_lock = threading.Lock()  # only one checkpoint is written at a time
+        # Background merging of segments, the merge thread also makes checkpoints requested by writers
+        self._merge_condition = threading.Condition()
+        self._merge_thread: Optional[threading.Thread] = None
+        self._merge_pending = False
+        self._checkpoint_pending = False
+        self._closed = False
 
         if initial_batch:  # add initial batch if it is provided
             self.add_batch(initial_batch)
 
+    @classmethod
+    def open(cls, path: str, config: IndexConfig = None) -> 'Index':
+        """
+        Opens index saved via Index.save(). The segment file is memory mapped - postings reference the mapped
+        memory and stored fields of the documents are decoded only when they are accessed
+        :param path: path to the segment file
+        :param config: configuration of the index, if None the configuration saved in the segment is used
+        :return: Index
+        """
+        segment_file = SegmentFile(path)
+        index = cls(config if config is not None else segment_file.index_config())
+        index._publish([index._load_segment(segment_file, 0)])
+        logger.info(f'Opened index {index.config.name} with {len(index.documents)} documents from {path}')
+        return index
+
+    @property
+    def segments(self) -> Tuple[Segment, ...]:
+        """
+        Segments of the current snapshot ordered from the oldest
+        :return: tuple of segments
+        """
+        return self._snapshot.segments
+
+    def snapshot(self) -> IndexSnapshot:
+        """
+        Returns the current snapshot of the index. The snapshot stays consistent even if the index is modified
+        while it is being used
+        :return: IndexSnapshot
+        """
+        return self._snapshot
+
+    def _publish(self, segments: List[Segment], changes: int = 0):
+        """
+        Publishes new generation of the index. Must be called while holding the write lock
+        :param segments: segments of the new generation
+        :param changes: number of documents added, replaced or deleted by the new generation
+        :return: None
+        """
+        snapshot = IndexSnapshot(self._snapshot.generation + 1, tuple(segments), self._snapshot.changes + changes)
+        # Data the models derive from the snapshot (e.g. tf-idf norms) is computed here, never by a search
+        for model in self.models.values():
+            model.prepare(snapshot)
+        self._snapshot = snapshot
+
+    def _load_segment(self, segment_file: SegmentFile, changes: int) -> Segment:
+        """
+        Loads segment from the file together with the data of the models stored in it
+        :param segment_file: the segment file
+        :param changes: number of changed documents of the snapshot the file was saved from
+        :return: Segment
+        """
+        segment = segment_file.load_segment()
+        if segment_file.document_norms is not None:
+            TfIdfModel.set_document_norms(segment, segment_file.document_norms, changes)
+        return segment
+
+    def save(self, path: str):
+        """
+        Saves the index to a segment file. All segments are merged into the saved one and deleted documents are purged
+        :param path: path to the segment file
+        :return: None
+        """
+        self._save_segments(path, self._snapshot)
+
+    def _save_segments(self, path: str, snapshot: IndexSnapshot):
+        """
+        Merges segments of the snapshot and writes them to a segment file
+        :param path: path to the segment file
+        :param snapshot: snapshot to save
+        :return: None
+        """
+        segments = snapshot.segments
+        segment = segments[0] if len(segments) == 1 and segments[0].live_docs is None else Segment.merge(segments)
+        terms = ((term, segment.postings[term]) for term in sorted(segment.postings))
+        # The saved segment contains exactly the live documents of the snapshot, so norms for its statistics
+        # are valid once the file is opened
+        norms = self.models['tfidf'].document_norms(segment, snapshot, renormalization_threshold=0)
+        write_segment(path, self.config, segment.documents, terms, positional=segment.positional,
+                      document_norms=norms)
+        logger.info(f'Saved index {self.config.name} with {len(segment)} documents to {path}')
+
+    def attach_log(self, log_path: str, checkpoint_path: str, replay: bool = True):
+        """
+        Attaches write-ahead log to the index. Every following add / delete is logged before it is acknowledged
+        :param log_path: path to the log file
+        :param checkpoint_path: path to the segment file the log is checkpointed to
+        :param replay: if True operations recorded in an existing log are applied to the index first,
+        otherwise the existing log is discarded
+        :return: None
+        """
+        with self._write_lock:
+            records = WriteAheadLog.read_records(log_path) if os.path.exists(log_path) else []
+            if replay:
+                self._replay_log(records)
+
+            self.wal = WriteAheadLog(log_path)
+            self.checkpoint_path = checkpoint_path
+            if not replay or len(records) == 0:
+                # The log always starts with the configuration so the index can be recovered without a checkpoint
+                self.wal.reset([self._config_log_record()])
+
+    def _config_log_record(self) -> dict:
+        """
+        Returns log record with the configuration of the index
+        :return: dictionary
+        """
+        return {'op': 'config', 'config': self.config.to_dict()}
+
+    def _replay_log(self, records: List[dict]):
+        """
+        Applies logged operations to the index
+        :param records: records read from the write-ahead log
+        :return: None
+        """
+        for record in records:
+            if record['op'] == 'add':
+                self._add_documents([Document.from_dict(document) for document in record['documents']])
+            elif record['op'] == 'delete':
+                self._delete_documents(record['ids'])
+        logger.info(f'Replayed {len(records)} log records in index {self.config.name}')
+
+    def _log(self, record: dict) -> Optional[int]:
+        """
+        Appends the record to the write-ahead log if the log is attached. Must be called while holding the write lock
+        :param record: record to log
+        :return: log sequence number or None if there is no log
+        """
+        return self.wal.append(record) if self.wal is not None else None
+
+    def _commit_log(self, lsn: Optional[int]):
+        """
+        Waits until the logged record is durable. This is done outside the write lock so concurrent writers
+        share one fsync. Requests a checkpoint in the background when the log grows too large
+        :param lsn: log sequence number returned by _log()
+        :return: None
+        """
+        if lsn is None:
+            return
+        self.wal.sync(lsn)
+        if os.path.getsize(self.wal.path) > LOG_CHECKPOINT_SIZE:
+            self._schedule_checkpoint()
+
+    def checkpoint(self):
+        """
+        Saves the index to its segment file and truncates the write-ahead log. The segment file is written without
+        holding the write lock, so writers are not blocked - operations logged in the meantime stay in the log.
+        The saved segments are then replaced by the saved one, so stored fields of the documents are read from
+        the file instead of being kept in memory
+        :return: None
+        """
+        if self.wal is None:
+            return
+        with self._checkpoint_lock:
+            with self._write_lock:
+                # Operations are logged and applied under the write lock, so the snapshot contains exactly
+                # the operations logged up to the current log sequence number
+                snapshot, lsn = self._snapshot, self.wal.written_lsn
+
+            self._save_segments(self.checkpoint_path, snapshot)
+            saved = self._load_segment(SegmentFile(self.checkpoint_path), snapshot.changes)
+            with self._write_lock:
+                if self.wal is None:
+                    return  # the index was closed
+                self._replace_segments(list(snapshot.segments), saved)
+                self.wal.truncate(lsn, [self._config_log_record()])
+
+    def close(self):
+        """
+        Stops background merging and preprocessing workers and closes the write-ahead log of the index
+        :return: None
+        """
+        self.preprocessing_pool.close()
+        with self._merge_condition:
+            self._closed = True
+            self._merge_condition.notify_all()
+        if self._merge_thread is not None:
+            self._merge_thread.join()
+
+        with self._write_lock:
+            if self.wal is not None:
+                self.wal.close()
+                self.wal = None
+
+    def _schedule_merge(self):
+        """
+        Wakes up the background merge thread, the thread is started on the first call
+        :return: None
+        """
+        with self._merge_condition:
+            if self._closed:
+                return
+            self._merge_pending = True
+            if self._merge_thread is None:
+                self._merge_thread = threading.Thread(target=self._merge_loop, daemon=True,
+                                                      name=f'merge-{self.config.name}')
+                self._merge_thread.start()
+            self._merge_condition.notify()
+
+    def _schedule_checkpoint(self):
+        """
+        Requests checkpoint in the background merge thread
+        :return: None
+        """
+        with self._merge_condition:
+            self._checkpoint_pending = True
+        self._schedule_merge()
+
+    def _merge_loop(self):
+        """
+        Body of the background merge thread. Merges segments until the merge policy finds nothing to merge
+        and then waits for new segments. Requested checkpoints are made between the merges, so they are not delayed
+        by merges of segments that keep being added
+        :return: None
+        """
+        while True:
+            with self._merge_condition:
+                while not self._merge_pending and not self._closed:
+                    self._merge_condition.wait()
+                if self._closed:
+                    return
+                self._merge_pending = False
+
+            try:
+                while True:
+                    with self._merge_condition:
+                        checkpoint, self._checkpoint_pending = self._checkpoint_pending, False
+                    if checkpoint:
+                        self.checkpoint()
+                    if not self.merge_segments():
+                        break
+            except Exception as e:
+                logger.exception(f'Merging segments or checkpoint of index {self.config.name} failed: {e}')
+
+    def merge_segments(self) -> bool:
+        """
+        Performs one merge selected by the merge policy. The merge itself runs without holding the write lock,
+        the merged segment is published only if none of the merged segments was replaced in the meantime
+        :return: True if the policy selected a merge, False if there is nothing to merge
+        """
+        snapshot = self._snapshot
+        positions = self.merge_policy.find_merge(snapshot.segments)
+        if positions is None:
+            return False
+
+        sources = [snapshot.segments[position] for position in positions]
+        merged = Segment.merge(sources)
+        # Merged segment has the same statistics as its sources, so the models prepare it without the write lock
+        for model in self.models.values():
+            model.prepare_segment(merged, snapshot)
+        with self._write_lock:
+            merged = self._replace_segments(sources, merged)
+            logger.debug(f'Merged {len(sources)} segments with {merged.n_live} documents in index {self.config.name}')
+        return True
+
+    def _replace_segments(self, sources: List[Segment], merged: Segment) -> Segment:
+        """
+        Publishes segment merged from the source segments in place of them. Must be called while holding
+        the write lock
+        :param sources: merged segments in the order they were merged
+        :param merged: segment with the live documents of the sources at the time they were merged
+        :return: published version of the merged segment
+        """
+        current = self._snapshot.segments
+        versions = {segment.segment_id: segment for segment in current}
+
+        # Documents deleted while the merge was running must be deleted in the merged segment as well
+        deleted, merged_docno = [], 0
+        for source in sources:
+            version = versions.get(source.segment_id)
+            if version is source:
+                merged_docno += source.n_live
+                continue
+            for docno in source.live_docnos():
+                if version is None or not version.is_live(docno):
+                    deleted.append(merged_docno)
+                merged_docno += 1
+        if len(deleted) > 0:
+            merged = merged.delete(deleted)
+
+        # The merged segment takes place of the first source segment
+        source_ids = {source.segment_id for source in sources}
+        position = next((position for position, segment in enumerate(current)
+                         if segment.segment_id in source_ids), len(current))
+        remaining = [segment for segment in current if segment.segment_id not in source_ids]
+        self._publish(remaining[:position] + ([merged] if merged.n_live > 0 else []) + remaining[position:])
+        return merged
+
     @staticmethod
     def get_next_doc_id() -> str:
         """
@@ -48,39 +375,37 @@ class Index:
         """
         return str(uuid.uuid4())
 
-    def _recalculate_models(self):
-        """
-        Runs recalculate() method of all models
-        :return:
-        """
-        for model in self.models.values():
-            model.recalculate()
-
     def add_batch(self, documents: List[Document]):
         """
         Adds batch of documents to the index, if some documents already exist they will be replaced
         :param documents: list of documents to be added
         :return:
         """
-        # Iterate over the list
-        for document in documents:
-            # If the document already exists in the index, remove it
-            if document.id in self.documents:
-                self.delete_document(document.id)
+        with self._write_lock:
+            lsn = self._log({'op': 'add', 'documents': [document.to_dict() for document in documents]})
+            self._add_documents(documents)
+        self._commit_log(lsn)
 
-            # Get list of all terms and iterate over them
-            for term in document.terms:
-                # If the term is not in the index, add it
-                if term not in self.inverted_idx:
-                    self.inverted_idx[term] = TermInfo(document, term)
-                else:
-                    # Otherwise append the document to the term
-                    self.inverted_idx[term].append_document(document, term)
+    def _add_documents(self, documents: List[Document]):
+        """
+        Adds documents to the index as a new segment. Replaced documents are deleted in the same generation
+        so a search never sees the index without them
+        :param documents: list of documents to be added
+        :return: None
+        """
+        # If the same id is in the batch multiple times the last document wins
+        batch = list({document.id: document for document in documents}.values())
+        if len(batch) == 0:
+            return
 
-            # Add the document to the index
-            self.documents[document.id] = document
+        # If some documents already exist in the index, remove them
+        snapshot = self._snapshot
+        replaced = [document.id for document in batch if snapshot.get_document(document.id) is not None]
+        segments = self._remove_documents(snapshot.segments, replaced)
 
-        self._recalculate_models()
+        # Build new segment from the batch and publish it
+        self._publish(segments + [Segment.build(batch)], len(batch) + len(replaced))
+        self._schedule_merge()
 
     def add_document(self, document: Document):
         """
@@ -97,32 +422,54 @@ class Index:
         :return: preprocessed Document object
         """
         document_id = document.id if document.id else self.get_next_doc_id()
-        processable_text = document.text
-        if document.title:  # title is optional so it may be None
-            processable_text += ' ' + document.title
-        logger.info(f'Preprocessing document id: {document_id}')
-        document_tokens = self.config.preprocessor.get_tokens(processable_text)
+        logger.debug(f'Preprocessing document id: {document_id}')
+        document_tokens = self.config.preprocessor.get_tokens(self._get_processable_text(document))
         return Document(doc_id=document_id,
                         tokens=document_tokens,
                         title=document.title,
                         text=document.text, date=document.date if document.date is not None else datetime.now(),
-                        additional_properties=document.additionalProperties)
+                        additional_properties=document.additionalProperties, positional=self.config.positional)
+
+    @staticmethod
+    def _get_processable_text(document: DocumentDto) -> str:
+        """
+        Returns text of the document that is preprocessed
+        :param document: DocumentDto object
+        :return: text and title of the document
+        """
+        processable_text = document.text
+        if document.title:  # title is optional so it may be None
+            processable_text += ' ' + document.title
+        return processable_text
 
     def preprocess_batch(self, documents: List[DocumentDto]):
         """
-        Preprocesses batch of documents
+        Preprocesses batch of documents. The texts are preprocessed in parallel by the preprocessing pool.
+        Throws ValueError listing all documents that could not be preprocessed
         :param documents: List of DocumentDto objects
-        :return: List of preprocessed Document objects
+        :return: List of preprocessed Document objects in the same order as the DocumentDto objects
         """
-        count = 0
+        results = self.preprocessing_pool.preprocess([self._get_processable_text(document) for document in documents],
+                                                     positional=self.config.positional)
+
         # noinspection PyTypeChecker
         result: List[Document] = [None] * len(documents)
-        for i, document in enumerate(documents):
-            result[i] = self.preprocess_document(document)
-            logger.info('Preprocessed document id: %s', document.id)
-            count += 1
-            logger.info('Preprocessed %s documents', count)
-        logger.info('Batch preprocessed, total documents in index: %s', len(self.documents))
+        errors = []
+        for i, (document, (bow_int, length, error, positions)) in enumerate(zip(documents, results)):
+            document_id = document.id if document.id else self.get_next_doc_id()
+            if error is not None:
+                errors.append(f'document {i} (id: {document_id}): {error}')
+                continue
+            result[i] = Document.from_terms(doc_id=document_id, bow_int=bow_int, length=length,
+                                            title=document.title, text=document.text,
+                                            date=document.date if document.date is not None else datetime.now(),
+                                            additional_properties=document.additionalProperties,
+                                            positions=positions)
+
+        if len(errors) > 0:
+            raise ValueError(f'Preprocessing of {len(errors)} documents failed: ' + '; '.join(errors[:10]) +
+                             ('; ...' if len(errors) > 10 else ''))
+        logger.info('Preprocessed batch of %s documents', len(result))
         return result
 
     def delete_batch(self, documents: List[str]):
@@ -131,31 +478,51 @@ class Index:
         :param documents: List of all documents to be deleted
         :return:
         """
-        # Iterate over the list
+        with self._write_lock:
+            lsn = self._log({'op': 'delete', 'ids': documents})
+            self._delete_documents(documents)
+        self._commit_log(lsn)
+        logger.info(f'Batch of {len(documents)} documents deleted')
+
+    def _delete_documents(self, documents: List[str]):
+        """
+        Deletes documents from the index
+        :param documents: List of ids of the documents to be deleted
+        :return: None
+        """
+        snapshot, existing = self._snapshot, []
         for document_id in documents:
-            if document_id not in self.documents:
+            if snapshot.get_document(document_id) is None:
                 # Skip the id if it does not exist
                 logger.info(f'Document with id {document_id} does not exist in the index')
                 continue
+            existing.append(document_id)
 
-            document = self.documents[document_id]  # get the document
-            del self.documents[document_id]  # delete the key
-
-            # Iterate over the terms and delete the document from the term
-            for term in document.terms:
-                if term not in self.inverted_idx:
-                    # This should not happen unless the index is corrupt
-                    logger.error(f'Term {term} does not exist in the index')
-                    continue
+        if len(existing) > 0:
+            self._publish(self._remove_documents(snapshot.segments, existing), len(existing))
+            self._schedule_merge()
 
-                term_info = self.inverted_idx[term]  # get reference to the term info
-                term_info.remove_document(document_id)  # remove the linked document from the term
-                if term_info.is_empty():
-                    # If the term info is empty delete it
-                    del self.inverted_idx[term]  # delete the term from the dictionary
-
-        self._recalculate_models()
-        logger.info(f'Batch of {len(documents)} documents deleted')
+    @staticmethod
+    def _remove_documents(segments: Iterable[Segment], document_ids: List[str]) -> List[Segment]:
+        """
+        Removes documents from the segments. Documents are only marked as deleted in the live docs
+        of new versions of their segments, they are physically removed when the segments are merged
+        :param segments: segments of the index
+        :param document_ids: ids of the documents
+        :return: list of segments without the documents
+        """
+        if len(document_ids) == 0:
+            return list(segments)
+
+        result = []
+        for segment in segments:
+            docnos = [docno for docno in map(segment.find, document_ids) if docno is not None]
+            if len(docnos) > 0:
+                segment = segment.delete(docnos)
+                if segment.n_live == 0:
+                    continue  # there is nothing left in the segment
+            result.append(segment)
+        return result
 
     def delete_document(self, doc_id: str):
         """
@@ -172,36 +539,95 @@ class Index:
         :return: dictionary for json response
         """
         query, model, n_items = query_dto.query, query_dto.model, query_dto.topK
+        offset = self._get_offset(query_dto)
         # Model variant gets validated in the controller via Pydantic, so we can assume it's valid
         search_model = self.models[model.value]
-        search_result = search_model.search(query, n_items)
+        search_result = search_model.search(query, n_items, self.snapshot(), offset=offset)
+        return self._to_search_result_dto(model, search_result, query_dto.explain is True)
+
+    def search_batch(self, query_dtos: List[QueryDto]) -> List[DocumentSearchResultDto]:
+        """
+        Performs all searches on the same snapshot of the index. Queries of each model are searched together,
+        so they are preprocessed at once and the models can share work between them
+        :param query_dtos: list of QueryDto objects
+        :return: list of results in the order of the queries
+        """
+        if len(query_dtos) > MAX_BATCH_QUERIES:
+            raise ValueError(f'Batch cannot contain more than {MAX_BATCH_QUERIES} queries')
+        offsets = [self._get_offset(query_dto) for query_dto in query_dtos]
+        snapshot = self.snapshot()
+
+        results: List[Optional[DocumentSearchResultDto]] = [None] * len(query_dtos)
+        for model in ModelVariant:
+            positions = [i for i, query_dto in enumerate(query_dtos) if query_dto.model == model]
+            if len(positions) == 0:
+                continue
+            queries = [(query_dtos[i].query, query_dtos[i].topK, offsets[i]) for i in positions]
+            for i, search_result in zip(positions, self.models[model.value].search_batch(queries, snapshot)):
+                results[i] = self._to_search_result_dto(model, search_result, query_dtos[i].explain is True)
+        logger.info(f'Searched batch of {len(query_dtos)} queries in index {self.config.name}')
+        return results
 
+    @staticmethod
+    def _get_offset(query_dto: QueryDto) -> int:
+        """
+        Returns validated offset of the query
+        :param query_dto: QueryDto object
+        :return: offset, 0 if it is not set
+        """
+        offset = query_dto.offset if query_dto.offset is not None else 0
+        if offset < 0:
+            raise ValueError('Offset cannot be negative')
+        return offset
+
+    @staticmethod
+    def _to_search_result_dto(model: ModelVariant, search_result, explain: bool = False) -> DocumentSearchResultDto:
+        """
+        Converts result of a search model to DocumentSearchResultDto
+        :param model: model variant that produced the result
+        :param search_result: result returned by the model
+        :param explain: include plan of a boolean query
+        :return: DocumentSearchResultDto
+        """
         if model == ModelVariant.BOOL:
             return DocumentSearchResultDto(
                 documents=[DocumentDto.from_domain_object(item) for item in search_result[0]],
                 stopwords=search_result[1],
-                totalDocuments=search_result[2]
+                totalDocuments=search_result[2],
+                plan=search_result[3] if explain else None
             )
 
-        # Otherwise all other models return list of dictionaries that contain the document domain object and score
+        # Otherwise all other models return list of tuples of score and the document domain object
         return DocumentSearchResultDto(
-            documents=[DocumentDto.from_domain_object(item['document'], item['score']) for item in search_result[0]],
+            documents=[DocumentDto.from_domain_object(document, score) for score, document in search_result[0]],
             totalDocuments=search_result[1]
         )
 
+    def cache_stats(self) -> dict:
+        """
+        Returns statistics of the caches used by searches of the index
+        :return: dictionary with statistics of the result cache of the index, the shared stored fields cache,
+        the term normalization cache of the preprocessor (counts only preprocessing in this process),
+        the shared cache of parsed boolean queries and the shared cache of decoded compressed postings
+        """
+        term_cache = getattr(self.config.preprocessor, 'term_cache', None)
+        return {'results': self.result_cache.stats(), 'storedFields': stored_fields_cache.stats(),
+                'terms': term_cache.stats() if term_cache is not None else None,
+                'parsedQueries': parsed_query_cache.stats(), 'decodedPostings': decoded_postings_cache.stats()}
+
     def to_dto(self, n_example_docs=10) -> IndexDto:
         """
         Converts this to IndexDto
         :return: instance of IndexDto
         """
-        n_example_docs = n_example_docs if len(self.documents) > n_example_docs else len(self.documents)
+        snapshot = self.snapshot()
         example_docs = [DocumentDto.from_domain_object(doc) for doc in
-                        list(self.documents.values())[:n_example_docs]]
+                        itertools.islice(snapshot.documents(), n_example_docs)]
         return IndexDto(
             name=self.config.name,
             models=list(self.models.keys()),
-            nTerms=len(self.inverted_idx),
-            nDocs=len(self.documents),
+            nTerms=snapshot.n_terms,
+            nDocs=snapshot.n_docs,
             exampleDocuments=example_docs
         )
 
@@ -227,33 +653,37 @@ class Index:
         return DocumentDto(id=doc_dict['id'] if 'id' in doc_dict else None, text=doc_dict['text'],
                            additionalProperties={prop: val for prop, val in doc_dict.items() if prop != 'text'})
 
-    def add_json_to_index(self, upload_file: UploadFile) -> List[Document]:
+    def add_json_batch(self, documents: List[dict]) -> int:
+        """
+        Preprocesses documents parsed from json and adds them to the index
+        :param documents: list of dictionaries with the documents
+        :return: number of added documents
+        """
+        documents = self.preprocess_batch([self._parse_document_from_dict(document) for document in documents])
+        self.add_batch(documents)
+        return len(documents)
+
+    def add_json_to_index(self, upload_file: UploadFile, batch_size: int = INGEST_BATCH_SIZE) -> int:
         """
-        Adds json to index if possible. Throws ValueError if json is not valid
-        :param upload_file:
-        :return: List of all processed documents
+        Adds documents from a json file to index. The file can contain json array / object or newline delimited json
+        and it may be gzip compressed. The file is parsed incrementally and the documents are preprocessed and indexed
+        in batches, so memory does not depend on the size of the file.
+        Throws ValueError if json is not valid, batches that were indexed before the error are kept
+        :param upload_file: uploaded file
+        :param batch_size: number of documents indexed at once
+        :return: number of added documents
         """
+        count = 0
         try:
-            json_data = json.load(upload_file.file)
-            if isinstance(json_data, dict):
-                # If its dict we have a single document
-                doc = self.preprocess_document(self._parse_document_from_dict(json_data))
-                self.add_document(doc)
-                return [doc]
-            elif isinstance(json_data, list):
-                # Else we have an array of documents
-                docs = [self._parse_document_from_dict(doc) for doc in json_data]
-                docs = self.preprocess_batch(docs)
-                self.add_batch(docs)
-                return docs
-            else:
-                # Or something random so throw an error
-                raise ValueError()
+            for batch in batched(iter_json_documents(upload_file.file), batch_size):
+                count += self.add_json_batch(batch)
+                logger.info(f'Added {count} documents from file {upload_file.filename} to index {self.config.name}')
         except ValueError as e:
             raise ValueError(
-                'Invalid JSON file received. Make sure the file is a valid JSON '
-                'array / object containing only Document(s).'
+                f'Invalid JSON file received ({e}). Make sure the file is a valid JSON array / object or newline '
+                f'delimited JSON containing only Document(s). {count} documents were added before the error.'
             )
+        return count
 
 
 def get_index(name: str) -> Index:
@@ -267,15 +697,34 @@ def get_index(name: str) -> Index:
     return _indices[name]
 
 
+def _index_paths(name: str):
+    """
+    Returns paths of the segment file and the write-ahead log of the index
+    :param name: Name of the index
+    :return: tuple of segment file path and log path
+    """
+    return (os.path.join(_index_directory, name + SEGMENT_FILE_EXTENSION),
+            os.path.join(_index_directory, name + LOG_FILE_EXTENSION))
+
+
 def add_index(name: str, index: Index):
     """
-    Adds index to the list of indices.py
+    Adds index to the list of indices.py. If persistence is enabled write-ahead log is attached to the index
     :param name: Name of the index
     :param index: Index to add
     :return: None
     """
     if name in _indices:
         raise ValueError(f'Index {name} already exists')
+
+    if _index_directory is not None and index.wal is None:
+        segment_path, log_path = _index_paths(name)
+        if os.path.exists(segment_path):
+            os.remove(segment_path)  # leftover of an index that could not be loaded
+        index.attach_log(log_path, segment_path, replay=False)
+        if len(index.documents) > 0:
+            # Documents added before the log was attached are not logged so they must be checkpointed
+            index.checkpoint()
     _indices[name] = index
 
 
@@ -287,7 +736,54 @@ def delete_index(name: str):
     """
     if name not in _indices:
         raise ValueError(f'Index {name} does not exist')
-    del _indices[name]
+    index = _indices.pop(name)
+    index.close()
+    if _index_directory is not None:
+        for path in _index_paths(name):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def save_indices():
+    """
+    Checkpoints all indices - saves them to their segment files and truncates their write-ahead logs
+    :return: None
+    """
+    for index in _indices.values():
+        index.checkpoint()
+
+
+def load_indices(directory: str) -> List[str]:
+    """
+    Enables persistence of indices in the directory and recovers all indices saved there.
+    Each index is opened from its last checkpoint and operations from its write-ahead log are replayed on top of it
+    :param directory: directory with the segment files and logs
+    :return: names of all loaded indices
+    """
+    global _index_directory
+    os.makedirs(directory, exist_ok=True)
+    _index_directory = directory
+
+    loaded = []
+    names = sorted({os.path.splitext(file)[0] for file in os.listdir(directory)
+                    if os.path.splitext(file)[1] in (SEGMENT_FILE_EXTENSION, LOG_FILE_EXTENSION)})
+    for name in names:
+        segment_path, log_path = _index_paths(name)
+        try:
+            if os.path.exists(segment_path):
+                index = Index.open(segment_path)
+            else:
+                # Index was never checkpointed - the configuration is the first record of the log
+                records = WriteAheadLog.read_records(log_path)
+                if len(records) == 0 or records[0]['op'] != 'config':
+                    raise ValueError('write-ahead log does not contain configuration of the index')
+                index = Index(IndexConfig.from_dict(records[0]['config']))
+            index.attach_log(log_path, segment_path)
+            _indices[name] = index
+            loaded.append(name)
+        except ValueError as e:
+            logger.error(f'Could not load index {name}: {e}')
+    return loaded
 
 
 def get_all_indices() -> List[IndexDto]:
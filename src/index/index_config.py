@@ -1,4 +1,5 @@
-from src.preprocessing.preprocessing import Preprocessor
+from src.preprocessing.preprocessing import Preprocessor, PreprocessorConfig
+from src.search_model.vectorized import PYTHON_BACKEND, check_scoring_backend
 
 
 class IndexConfig:
@@ -6,11 +7,47 @@ class IndexConfig:
     Configuration for the index object
     """
 
-    def __init__(self, name, preprocessor: Preprocessor):
+    def __init__(self, name, preprocessor: Preprocessor, scoring_backend: str = PYTHON_BACKEND,
+                 positional: bool = False, pruning: bool = True):
         """
         Constructor for the IndexConfig object
         :param name: name of the index
         :param preprocessor: preprocessor to use
+        :param scoring_backend: backend of the ranked models - python or numpy (requires NumPy)
+        :param positional: store positions of the terms in the postings, required by phrase and proximity queries
+        :param pruning: evaluate top-k BM25 queries with dynamic pruning, False scores all matching documents
         """
+        check_scoring_backend(scoring_backend)
         self.name = name
         self.preprocessor = preprocessor
+        self.scoring_backend = scoring_backend
+        self.positional = positional
+        self.pruning = pruning
+
+    def to_dict(self) -> dict:
+        """
+        Serializes the configuration to a json serializable dictionary
+        :return: dictionary
+        """
+        preprocessor_config = getattr(self.preprocessor, 'config', None)
+        return {
+            'name': self.name,
+            'preprocessor': preprocessor_config.to_dict() if isinstance(preprocessor_config, PreprocessorConfig)
+            else None,
+            'scoring_backend': self.scoring_backend,
+            'positional': self.positional,
+            'pruning': self.pruning,
+        }
+
+    @staticmethod
+    def from_dict(config: dict) -> 'IndexConfig':
+        """
+        Creates configuration from a dictionary created by to_dict()
+        :param config: dictionary with the configuration
+        :return: IndexConfig
+        """
+        if config['preprocessor'] is None:
+            raise ValueError(f'Configuration of index {config["name"]} does not contain preprocessor configuration')
+        return IndexConfig(name=config['name'], preprocessor=Preprocessor(PreprocessorConfig(**config['preprocessor'])),
+                           scoring_backend=config.get('scoring_backend', PYTHON_BACKEND),
+                           positional=config.get('positional', False), pruning=config.get('pruning', True))
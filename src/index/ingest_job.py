@@ -0,0 +1,343 @@
+import itertools
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from typing import Dict, Optional, BinaryIO, List
+
+from src.index.index import get_index, INGEST_BATCH_SIZE
+from src.index.json_stream import JsonDocuments, batched
+
+logger = logging.getLogger(__name__)
+
+MAX_CONCURRENT_JOBS = 2  # number of jobs that are executed at the same time
+UPLOAD_FILE_EXTENSION = '.upload'
+STATE_FILE_EXTENSION = '.json'
+
+_jobs: Dict[str, 'IngestJob'] = {}
+_jobs_lock = threading.Lock()
+_job_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_JOBS, thread_name_prefix='ingest')
+_jobs_directory: Optional[str] = None  # directory with uploaded files and job states, temporary if not set
+
+
+class JobStatus(Enum):
+    """
+    Status of an ingestion job
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+    INTERRUPTED = 'interrupted'  # the application stopped while the job was running
+
+
+# Jobs in these states can be resumed from their last checkpoint
+RESUMABLE_STATUSES = {JobStatus.FAILED, JobStatus.CANCELLED, JobStatus.INTERRUPTED}
+
+
+class IngestJob:
+    """
+    Background job that adds documents from an uploaded json file to an index. The upload is stored in the jobs
+    directory and the number of indexed documents is checkpointed after every batch, so the job can be resumed
+    from the last checkpoint if it fails or the application stops
+    """
+
+    def __init__(self, job_id: str, index_name: str, filename: str, total_bytes: int, documents_done: int = 0,
+                 bytes_done: int = 0, resume_offset: Optional[int] = None, status: JobStatus = JobStatus.QUEUED,
+                 error: str = None):
+        """
+        Initializes the job
+        :param job_id: id of the job
+        :param index_name: name of the index the documents are added to
+        :param filename: name of the uploaded file
+        :param total_bytes: size of the uploaded file
+        :param documents_done: number of documents from the beginning of the file that were already indexed
+        :param bytes_done: number of bytes of the file that were already processed
+        :param resume_offset: byte offset in the decompressed file after the last indexed document, None if the
+        documents are in a json array, which has to be parsed from the beginning
+        :param status: status of the job
+        :param error: error message if the job failed
+        """
+        self.id = job_id
+        self.index_name = index_name
+        self.filename = filename
+        self.total_bytes = total_bytes
+        self.documents_done = documents_done
+        self.bytes_done = bytes_done
+        self.resume_offset = resume_offset
+        self.status = status
+        self.error = error
+        # Progress of the current run used to estimate the speed
+        self._run_started: Optional[float] = None
+        self._run_documents = 0
+        self._run_bytes = 0
+        self._cancel_requested = threading.Event()
+
+    @property
+    def upload_path(self) -> str:
+        """
+        Path to the stored uploaded file
+        :return: str
+        """
+        return os.path.join(_get_jobs_directory(), self.id + UPLOAD_FILE_EXTENSION)
+
+    @property
+    def state_path(self) -> str:
+        """
+        Path to the file with the checkpointed state of the job
+        :return: str
+        """
+        return os.path.join(_get_jobs_directory(), self.id + STATE_FILE_EXTENSION)
+
+    def documents_per_second(self) -> float:
+        """
+        Speed of the current run
+        :return: number of documents indexed per second
+        """
+        if self._run_started is None:
+            return 0.0
+        elapsed = time.monotonic() - self._run_started
+        return self._run_documents / elapsed if elapsed > 0 else 0.0
+
+    def eta_seconds(self) -> Optional[float]:
+        """
+        Estimates remaining time of the job from the part of the file processed in the current run.
+        The number of documents in the file is not known until it is parsed, so the estimate is based on bytes
+        :return: estimated number of seconds or None if the job is not running or the speed is not known yet
+        """
+        if self.status != JobStatus.RUNNING or self._run_started is None or self._run_bytes == 0:
+            return None
+        elapsed = time.monotonic() - self._run_started
+        return elapsed * max(self.total_bytes - self.bytes_done, 0) / self._run_bytes
+
+    def to_dict(self) -> dict:
+        """
+        Serializes the persistent state of the job
+        :return: json serializable dictionary
+        """
+        return {
+            'id': self.id,
+            'index_name': self.index_name,
+            'filename': self.filename,
+            'total_bytes': self.total_bytes,
+            'documents_done': self.documents_done,
+            'bytes_done': self.bytes_done,
+            'resume_offset': self.resume_offset,
+            'status': self.status.value,
+            'error': self.error,
+        }
+
+    @staticmethod
+    def from_dict(job: dict) -> 'IngestJob':
+        """
+        Creates job from a dictionary created by to_dict()
+        :param job: dictionary with the job state
+        :return: IngestJob
+        """
+        return IngestJob(job_id=job['id'], index_name=job['index_name'], filename=job['filename'],
+                         total_bytes=job['total_bytes'], documents_done=job['documents_done'],
+                         bytes_done=job['bytes_done'], resume_offset=job.get('resume_offset'),
+                         status=JobStatus(job['status']), error=job['error'])
+
+    def _save_state(self):
+        """
+        Atomically writes the state of the job to the jobs directory
+        :return: None
+        """
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, self.state_path)
+
+    def _document_id(self, position: int) -> str:
+        """
+        Returns id for a document without id. The id depends only on the position of the document in the file
+        so documents indexed again after resuming the job replace their previous versions
+        :param position: position of the document in the file
+        :return: id of the document
+        """
+        return str(uuid.uuid5(uuid.UUID(self.id), str(position)))
+
+    def _run(self, batch_size: int):
+        """
+        Executes the job, called in a thread of the job executor
+        :param batch_size: number of documents indexed at once
+        :return: None
+        """
+        if self._cancel_requested.is_set():
+            self.status = JobStatus.CANCELLED
+            self._save_state()
+            return
+
+        self.status, self.error = JobStatus.RUNNING, None
+        self._run_started, self._run_documents, self._run_bytes = time.monotonic(), 0, 0
+        self._save_state()
+        logger.info(f'Job {self.id} started indexing {self.filename} from document {self.documents_done}')
+        try:
+            index = get_index(self.index_name)
+            with open(self.upload_path, 'rb') as f:
+                if self.resume_offset is not None:
+                    # Documents outside of an array are independent, parsing continues after the last indexed one
+                    stream = JsonDocuments(f, self.resume_offset)
+                    documents = enumerate(stream, self.documents_done)
+                else:
+                    stream = JsonDocuments(f)
+                    documents = itertools.islice(enumerate(stream), self.documents_done, None)
+                start_bytes = self.bytes_done
+                for batch in batched(documents, batch_size):
+                    if self._cancel_requested.is_set():
+                        self.status = JobStatus.CANCELLED
+                        break
+                    if get_index(self.index_name) is not index:
+                        raise ValueError(f'Index {self.index_name} was deleted')
+
+                    for position, document in batch:
+                        if 'id' not in document:
+                            document['id'] = self._document_id(position)
+                    index.add_json_batch([document for _, document in batch])
+
+                    # Checkpoint - the batch is durable in the index once add_json_batch returns
+                    self.documents_done += len(batch)
+                    self.bytes_done = max(self.bytes_done, f.tell())
+                    self.resume_offset = None if stream.is_array else stream.offset
+                    self._run_documents += len(batch)
+                    self._run_bytes = self.bytes_done - start_bytes
+                    self._save_state()
+                else:
+                    self.status = JobStatus.COMPLETED
+                    self.bytes_done = self.total_bytes
+        except Exception as e:
+            logger.exception(f'Job {self.id} failed: {e}')
+            self.status, self.error = JobStatus.FAILED, str(e)
+
+        self._save_state()
+        if self.status == JobStatus.COMPLETED and os.path.exists(self.upload_path):
+            os.remove(self.upload_path)
+        logger.info(f'Job {self.id} {self.status.value} after indexing {self.documents_done} documents')
+
+
+def _get_jobs_directory() -> str:
+    """
+    Returns directory of the jobs, creates a temporary one if load_jobs() was not called
+    :return: path to the directory
+    """
+    global _jobs_directory
+    if _jobs_directory is None:
+        _jobs_directory = tempfile.mkdtemp(prefix='irsp-jobs-')
+    return _jobs_directory
+
+
+def submit_job(index_name: str, file: BinaryIO, filename: str, batch_size: int = INGEST_BATCH_SIZE) -> IngestJob:
+    """
+    Stores the uploaded file and submits job that adds its documents to the index
+    :param index_name: name of the index
+    :param file: uploaded file
+    :param filename: name of the uploaded file
+    :param batch_size: number of documents indexed at once
+    :return: submitted IngestJob
+    """
+    get_index(index_name)  # throws ValueError if the index does not exist
+    job = IngestJob(job_id=str(uuid.uuid4()), index_name=index_name, filename=filename, total_bytes=0)
+    with open(job.upload_path, 'wb') as f:
+        shutil.copyfileobj(file, f)
+        job.total_bytes = f.tell()
+    job._save_state()
+
+    with _jobs_lock:
+        _jobs[job.id] = job
+    _job_executor.submit(job._run, batch_size)
+    logger.info(f'Submitted job {job.id} indexing {filename} ({job.total_bytes} bytes) to index {index_name}')
+    return job
+
+
+def get_job(job_id: str) -> IngestJob:
+    """
+    Gets job by id
+    :param job_id: id of the job
+    :return: IngestJob
+    """
+    with _jobs_lock:
+        if job_id not in _jobs:
+            raise ValueError(f'Job {job_id} does not exist')
+        return _jobs[job_id]
+
+
+def get_all_jobs() -> List[IngestJob]:
+    """
+    Gets all jobs
+    :return: list of jobs
+    """
+    with _jobs_lock:
+        return list(_jobs.values())
+
+
+def cancel_job(job_id: str) -> IngestJob:
+    """
+    Requests cancellation of the job. Running job stops after the batch that is being indexed,
+    documents indexed so far are kept and the job can be resumed later
+    :param job_id: id of the job
+    :return: IngestJob
+    """
+    job = get_job(job_id)
+    if job.status not in (JobStatus.QUEUED, JobStatus.RUNNING):
+        raise ValueError(f'Job {job_id} is not running')
+    job._cancel_requested.set()
+    return job
+
+
+def resume_job(job_id: str, batch_size: int = INGEST_BATCH_SIZE) -> IngestJob:
+    """
+    Resumes failed, cancelled or interrupted job from its last checkpoint
+    :param job_id: id of the job
+    :param batch_size: number of documents indexed at once
+    :return: IngestJob
+    """
+    job = get_job(job_id)
+    if job.status not in RESUMABLE_STATUSES:
+        raise ValueError(f'Job {job_id} cannot be resumed in state {job.status.value}')
+    if not os.path.exists(job.upload_path):
+        raise ValueError(f'Uploaded file of job {job_id} does not exist anymore')
+
+    job._cancel_requested.clear()
+    job.status = JobStatus.QUEUED
+    job._save_state()
+    _job_executor.submit(job._run, batch_size)
+    return job
+
+
+def load_jobs(directory: str) -> List[str]:
+    """
+    Sets directory of the jobs and loads jobs saved there. Jobs that were queued or running when the application
+    stopped are marked as interrupted so they can be resumed
+    :param directory: directory with the job states and uploaded files
+    :return: ids of all loaded jobs
+    """
+    global _jobs_directory
+    os.makedirs(directory, exist_ok=True)
+    _jobs_directory = directory
+
+    loaded = []
+    for file in sorted(os.listdir(directory)):
+        if os.path.splitext(file)[1] != STATE_FILE_EXTENSION:
+            continue
+        try:
+            with open(os.path.join(directory, file), 'r', encoding='utf-8') as f:
+                job = IngestJob.from_dict(json.load(f))
+        except (ValueError, KeyError) as e:
+            logger.error(f'Could not load job {file}: {e}')
+            continue
+
+        if job.status in (JobStatus.QUEUED, JobStatus.RUNNING):
+            job.status = JobStatus.INTERRUPTED
+            job._save_state()
+        with _jobs_lock:
+            _jobs[job.id] = job
+        loaded.append(job.id)
+    return loaded
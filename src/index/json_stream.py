@@ -0,0 +1,213 @@
+import codecs
+import gzip
+import json
+from typing import BinaryIO, Iterator, Iterable, List, Optional, TypeVar
+
+GZIP_MAGIC = b'\x1f\x8b'
+READ_SIZE = 1024 * 1024  # number of bytes read from the file at once
+MAX_DOCUMENT_SIZE = 64 * 1024 * 1024  # maximum size of a single json document in characters
+
+_WHITESPACE = ' \t\n\r'
+_decoder = json.JSONDecoder()
+
+T = TypeVar('T')
+
+
+class _JsonReader:
+    """
+    Buffered reader of a text stream that decodes json values one by one. Only the unparsed part of the stream
+    is kept in memory
+    """
+
+    def __init__(self, file: BinaryIO, offset: int = 0):
+        """
+        Initializes the reader
+        :param file: binary file, gzip compressed files are decompressed transparently
+        :param offset: byte offset in the decompressed file the reading starts at
+        """
+        # Peek at the first bytes to detect gzip, the file may not be seekable so the bytes are kept
+        head = file.read(len(GZIP_MAGIC))
+        if head == GZIP_MAGIC:
+            if file.seekable():
+                file.seek(0)
+                file = gzip.GzipFile(fileobj=file, mode='rb')
+                head = b''
+            else:
+                raise ValueError('Gzip compressed file must be seekable')
+        if offset > 0:
+            if not file.seekable():
+                raise ValueError('File must be seekable to be read from an offset')
+            file.seek(offset)
+            head = b''
+        else:
+            # Byte order mark is skipped, it is counted in the offsets
+            head += file.read(len(codecs.BOM_UTF8) - len(head))
+            if head.startswith(codecs.BOM_UTF8):
+                head, offset = head[len(codecs.BOM_UTF8):], len(codecs.BOM_UTF8)
+        self._file = file
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = self._utf8.decode(head)
+        self._position = 0
+        self._eof = False
+        # Byte offset of the character at _offset_position of the buffer, it is advanced only when it is needed
+        self._offset = offset
+        self._offset_position = 0
+
+    @property
+    def offset(self) -> int:
+        """
+        Byte offset of the consumed part of the decompressed file
+        :return: int
+        """
+        self._offset += len(self._buffer[self._offset_position:self._position].encode('utf-8'))
+        self._offset_position = self._position
+        return self._offset
+
+    def _fill(self, min_size: int = READ_SIZE) -> bool:
+        """
+        Reads next block of the file into the buffer, the already parsed part of the buffer is dropped
+        :param min_size: number of bytes read if it is larger than READ_SIZE
+        :return: False if the end of the file was reached
+        """
+        if self._eof:
+            return False
+        data = self._file.read(max(READ_SIZE, min_size))
+        self._offset = self.offset
+        self._buffer = self._buffer[self._position:] + self._utf8.decode(data, final=len(data) == 0)
+        self._position = self._offset_position = 0
+        self._eof = len(data) == 0
+        return True
+
+    def peek(self) -> str:
+        """
+        Skips whitespace and returns the next character without consuming it
+        :return: next character or empty string at the end of the file
+        """
+        while True:
+            while self._position < len(self._buffer) and self._buffer[self._position] in _WHITESPACE:
+                self._position += 1
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+            if not self._fill():
+                return ''
+
+    def consume(self) -> str:
+        """
+        Skips whitespace and consumes the next character
+        :return: the character or empty string at the end of the file
+        """
+        char = self.peek()
+        self._position += len(char)
+        return char
+
+    def value(self):
+        """
+        Decodes the next json value. More data is read until the value is complete, each read at least doubles
+        the unparsed part of the buffer, so a large value is parsed in linear time even though the parsing
+        starts from the beginning of the value after every read
+        :return: decoded value
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buffer, self._position)
+                # A value that ends exactly at the end of the buffer may continue in the next block (e.g. a number)
+                if end < len(self._buffer) or self._eof:
+                    self._position = end
+                    return value
+            except json.JSONDecodeError as e:
+                if self._eof:
+                    raise ValueError(f'Invalid JSON: {e.msg}')
+                if len(self._buffer) - self._position > MAX_DOCUMENT_SIZE:
+                    raise ValueError(f'JSON document is larger than {MAX_DOCUMENT_SIZE} characters or invalid')
+            self._fill(len(self._buffer) - self._position)
+
+
+class JsonDocuments:
+    """
+    Documents incrementally parsed from a file. The file can contain a json array of documents, a single
+    json document or newline delimited json (one document per line), optionally gzip compressed.
+    Documents are yielded as soon as they are parsed so memory does not depend on the size of the file.
+    Documents that are not in an array are independent, so the parsing can continue from the offset after any
+    of them, e.g. when indexing of the file is resumed
+    """
+
+    def __init__(self, file: BinaryIO, offset: int = 0):
+        """
+        Initializes the documents, the file is read when they are iterated
+        :param file: binary file
+        :param offset: byte offset in the decompressed file after a document that is not in an array,
+        parsing starts there
+        """
+        self._file = file
+        self._start_offset = offset
+        self._reader: Optional[_JsonReader] = None
+        self.is_array: Optional[bool] = None  # whether the documents are in an array, known once iterated
+
+    @property
+    def offset(self) -> int:
+        """
+        Byte offset in the decompressed file after the last parsed document
+        :return: int
+        """
+        return self._reader.offset if self._reader is not None else self._start_offset
+
+    def __iter__(self) -> Iterator[dict]:
+        self._reader = reader = _JsonReader(self._file, self._start_offset)
+        self.is_array = reader.peek() == '['
+        if self.is_array:
+            reader.consume()
+            if reader.peek() == ']':
+                reader.consume()
+            else:
+                while True:
+                    yield _check_document(reader.value())
+                    separator = reader.consume()
+                    if separator == ']':
+                        break
+                    if separator != ',':
+                        raise ValueError('Invalid JSON: expected , or ] in the array of documents')
+            if reader.peek() != '':
+                raise ValueError('Invalid JSON: unexpected data after the array of documents')
+            return
+
+        # Otherwise there is a single document or a sequence of documents separated by whitespace (NDJSON)
+        while reader.peek() != '':
+            yield _check_document(reader.value())
+
+
+def iter_json_documents(file: BinaryIO) -> Iterator[dict]:
+    """
+    Incrementally parses documents from a file, see JsonDocuments
+    :param file: binary file
+    :return: iterator of the parsed documents
+    """
+    return iter(JsonDocuments(file))
+
+
+def _check_document(document) -> dict:
+    """
+    Checks that the parsed value is a document
+    :param document: parsed json value
+    :return: the document
+    """
+    if not isinstance(document, dict):
+        raise ValueError('Invalid JSON: documents must be JSON objects')
+    return document
+
+
+def batched(items: Iterable[T], batch_size: int) -> Iterator[List[T]]:
+    """
+    Splits items to batches
+    :param items: iterable of items
+    :param batch_size: maximum number of items in a batch
+    :return: iterator of lists of items
+    """
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if len(batch) > 0:
+        yield batch
@@ -0,0 +1,66 @@
+from typing import Iterable, Optional
+
+from src.index.bitmap import Bitmap
+
+
+class LiveDocs:
+    """
+    Bitset of documents in a segment that were not deleted. Instances are never modified once created,
+    deleting documents creates a new copy so searches that use the old one are not affected
+    """
+
+    def __init__(self, size: int, bits: bytearray = None, n_live: int = None):
+        """
+        Initializes the bitset
+        :param size: number of documents in the segment
+        :param bits: bits of the bitset, if None all documents are live
+        :param n_live: number of set bits, must be provided together with bits
+        """
+        self.size = size
+        if bits is None:
+            bits = bytearray(b'\xff') * ((size + 7) // 8)
+            n_live = size
+        self.bits = bits
+        self.n_live = n_live
+        self._deleted: Optional[frozenset] = None
+        self._bitmap: Optional[Bitmap] = None
+
+    def __contains__(self, docno: int) -> bool:
+        """
+        Returns True if the document is live
+        :param docno: docno of the document
+        :return: bool
+        """
+        return self.bits[docno >> 3] & (1 << (docno & 7)) != 0
+
+    def delete(self, docnos: Iterable[int]) -> 'LiveDocs':
+        """
+        Returns copy of the bitset with given documents deleted
+        :param docnos: docnos of the deleted documents
+        :return: new LiveDocs
+        """
+        bits, n_live = bytearray(self.bits), self.n_live
+        for docno in docnos:
+            mask = 1 << (docno & 7)
+            if bits[docno >> 3] & mask:
+                bits[docno >> 3] &= ~mask & 0xff
+                n_live -= 1
+        return LiveDocs(self.size, bits, n_live)
+
+    def deleted_docnos(self) -> frozenset:
+        """
+        Returns docnos of the deleted documents. The set is computed once since the bitset is never modified
+        :return: frozenset of docnos
+        """
+        if self._deleted is None:
+            self._deleted = frozenset(docno for docno in range(self.size) if docno not in self)
+        return self._deleted
+
+    def bitmap(self) -> Bitmap:
+        """
+        Returns compressed bitmap of the live documents. The bitmap is computed once since the bitset is never modified
+        :return: Bitmap
+        """
+        if self._bitmap is None:
+            self._bitmap = Bitmap.from_bitset(self.bits, self.size)
+        return self._bitmap
@@ -0,0 +1,145 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Any, Iterable, List
+
+
+class LruCache:
+    """
+    Thread-safe cache with bounded size. When the cache is full the least recently used entries are evicted
+    """
+
+    def __init__(self, max_size: int, sizeof: Callable[[Any], int] = None):
+        """
+        Initializes the cache
+        :param max_size: maximum total size of the entries, 0 disables the cache
+        :param sizeof: function returning size of a value, if None every entry has size 1
+        """
+        if max_size < 0:
+            raise ValueError('Cache size cannot be negative')
+        self.max_size = max_size
+        self.sizeof = sizeof
+        self._items: OrderedDict = OrderedDict()  # key -> (value, size)
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key: Hashable, default=None) -> Any:
+        """
+        Returns value of the key and marks it as recently used
+        :param key: the key
+        :param default: value returned if the key is not cached
+        :return: cached value or default
+        """
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key][0]
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any):
+        """
+        Caches the value, evicts the least recently used entries if the cache is full.
+        Values larger than the whole cache are not cached
+        :param key: the key
+        :param value: the value
+        :return: None
+        """
+        size = self.sizeof(value) if self.sizeof is not None else 1
+        with self._lock:
+            self._insert(key, value, size)
+
+    def _insert(self, key: Hashable, value: Any, size: int):
+        """
+        Caches the value, the lock must be held by the caller
+        :param key: the key
+        :param value: the value
+        :param size: size of the value
+        :return: None
+        """
+        if key in self._items:
+            self._size -= self._items.pop(key)[1]
+        if size > self.max_size:
+            return
+        self._items[key] = value, size
+        self._size += size
+        while self._size > self.max_size:
+            self._size -= self._items.popitem(last=False)[1][1]
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Returns cached value of the key or computes and caches it. The value is computed outside the lock,
+        so concurrent misses of the same key may compute it more than once
+        :param key: the key
+        :param compute: function that computes the value
+        :return: the value
+        """
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key][0]
+            self.misses += 1
+
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def get_or_compute_many(self, keys: Iterable[Hashable], compute: Callable[[Hashable], Any]) -> List[Any]:
+        """
+        Returns cached values of all keys, the missing values are computed and cached. The cache is locked once
+        to look up the whole batch and once to cache the computed values, which are computed outside the lock.
+        Each missing key is computed once even if it repeats in the batch, its other occurrences count as hits
+        :param keys: the keys
+        :param compute: function computing the value of a key
+        :return: list of values in the order of the keys
+        """
+        keys = list(keys)
+        values, missing = [None] * len(keys), {}
+        with self._lock:
+            items = self._items
+            for position, key in enumerate(keys):
+                entry = items.get(key)
+                if entry is not None:
+                    items.move_to_end(key)
+                    values[position] = entry[0]
+                else:
+                    missing.setdefault(key, []).append(position)
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+        if len(missing) == 0:
+            return values
+
+        computed = []
+        for key, positions in missing.items():
+            value = compute(key)
+            computed.append((key, value, self.sizeof(value) if self.sizeof is not None else 1))
+            for position in positions:
+                values[position] = value
+        with self._lock:
+            for key, value, size in computed:
+                self._insert(key, value, size)
+        return values
+
+    def clear(self):
+        """
+        Removes all entries, the counters are kept
+        :return: None
+        """
+        with self._lock:
+            self._items.clear()
+            self._size = 0
+
+    def stats(self) -> dict:
+        """
+        Returns statistics of the cache
+        :return: dictionary with the number of entries, their total size, maximum size, hits and misses
+        """
+        with self._lock:
+            return {'entries': len(self._items), 'size': self._size, 'maxSize': self.max_size, 'hits': self.hits,
+                    'misses': self.misses}
@@ -0,0 +1,65 @@
+import math
+from typing import List, Optional, Dict
+
+from src.index.segment import Segment
+
+
+class TieredMergePolicy:
+    """
+    Size based merge policy. Segments are assigned to tiers by their size - each tier holds segments
+    up to merge_factor times larger than the previous one. Once there are merge_factor segments
+    in the same tier they are merged into one segment of a higher tier, so every document is merged
+    only logarithmically many times. Each document is stored in exactly one segment so the merged segments
+    do not need to be adjacent.
+    Segments with too many deleted documents are rewritten on their own to purge the deleted documents
+    """
+
+    def __init__(self, merge_factor: int = 10, min_segment_size: int = 100, max_segment_size: int = 5_000_000,
+                 max_deleted_ratio: float = 0.3):
+        """
+        Initializes the policy
+        :param merge_factor: number of segments of the same tier that are merged together
+        :param min_segment_size: all segments smaller than this are considered to be in the lowest tier
+        :param max_segment_size: segments with more documents than this are never merged with other segments
+        :param max_deleted_ratio: segments with higher ratio of deleted documents are purged
+        """
+        if merge_factor < 2:
+            raise ValueError('Merge factor must be at least 2')
+        self.merge_factor = merge_factor
+        self.min_segment_size = min_segment_size
+        self.max_segment_size = max_segment_size
+        self.max_deleted_ratio = max_deleted_ratio
+
+    def _tier(self, segment: Segment) -> int:
+        """
+        Returns tier of the segment
+        :param segment: segment
+        :return: tier number, 0 is the lowest tier
+        """
+        if segment.n_live <= self.min_segment_size:
+            return 0
+        return int(math.log(segment.n_live / self.min_segment_size, self.merge_factor)) + 1
+
+    def find_merge(self, segments: List[Segment]) -> Optional[List[int]]:
+        """
+        Finds segments that should be merged. Lower tiers are preferred since they are the cheapest
+        to merge and contribute the most to the number of segments
+        :param segments: list of segments of the index
+        :return: sorted positions of the segments to merge or None if nothing should be merged
+        """
+        tiers: Dict[int, List[int]] = {}
+        for position, segment in enumerate(segments):
+            if segment.n_live <= self.max_segment_size:
+                tiers.setdefault(self._tier(segment), []).append(position)
+
+        for tier in sorted(tiers):
+            if len(tiers[tier]) >= self.merge_factor:
+                # Merge the smallest segments of the tier
+                positions = sorted(tiers[tier], key=lambda position: segments[position].n_live)[:self.merge_factor]
+                return sorted(positions)
+
+        # Nothing to merge, purge the segment with the most deleted documents if there are too many of them
+        position = max(range(len(segments)), key=lambda position: segments[position].deleted_ratio, default=None)
+        if position is not None and segments[position].deleted_ratio > self.max_deleted_ratio:
+            return [position]
+        return None
@@ -0,0 +1,223 @@
+import itertools
+import sys
+from array import array
+from bisect import bisect_left
+from itertools import accumulate, chain
+from operator import sub
+from typing import Sequence, Tuple
+
+# NumPy is an optional dependency, if it is installed it computes the prefix sums of the decoded docno deltas
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+POSTING_BLOCK_SIZE = 128  # number of postings in a block, blocks are the unit of decoding and skipping
+
+# Values of a block are packed to 1, 2 or 4 bytes in the native byte order. Packed values are widened to 32 bit
+# integers by strided copies of their bytes, so a block is unpacked without touching the values one by one
+_TYPECODES = ('B', 'H', 'I' if array('I').itemsize == 4 else 'L')
+_WIDTHS = (1, 2, 4)
+_LIMITS = (1 << 8, 1 << 16)
+# Offset of the lowest byte of a value packed to the width within a 32 bit integer
+_WIDEN_OFFSETS = {width: 0 if sys.byteorder == 'little' else 4 - width for width in _WIDTHS}
+
+_store_ids = itertools.count()
+
+
+def _width_code(max_value: int) -> int:
+    """
+    Returns code of the smallest width that can hold the values
+    :param max_value: maximum of the values
+    :return: index to _WIDTHS
+    """
+    return 0 if max_value < _LIMITS[0] else 1 if max_value < _LIMITS[1] else 2
+
+
+def _widen(buffer: bytearray, start: int, data, width: int):
+    """
+    Copies packed values to a buffer of 32 bit integers
+    :param buffer: the buffer
+    :param start: index of the first integer written
+    :param data: bytes-like object with the packed values
+    :param width: width of the packed values in bytes
+    :return: None
+    """
+    end = 4 * (start + len(data) // width)
+    if width == 4:
+        buffer[4 * start:end] = data
+        return
+    offset = 4 * start + _WIDEN_OFFSETS[width]
+    for byte in range(width):
+        buffer[offset + byte:end:4] = data[byte::width]
+
+
+def _prefix_sums(deltas: bytearray) -> array:
+    """
+    Converts docno deltas to docnos
+    :param deltas: buffer of 32 bit integers
+    :return: array of docnos
+    """
+    docnos = array('i')
+    if np is not None:
+        docnos.frombytes(np.cumsum(np.frombuffer(deltas, dtype=np.int32), dtype=np.int32).tobytes())
+        return docnos
+    docnos.frombytes(deltas)
+    return array('i', accumulate(docnos))
+
+
+class PostingBlocks:
+    """
+    Compressed posting lists of a segment. Each posting list is split to blocks of POSTING_BLOCK_SIZE postings,
+    a block stores differences of consecutive docnos (the first one relative to the last docno of the previous block)
+    followed by the term frequencies, both packed to the smallest byte width that holds all values of the block.
+    Last docno and byte offset of each block are the skip pointers - a docno is found by a binary search
+    in the last docnos and by decoding a single block. Maximum term frequency and minimum document length
+    of each block bound the scores of its postings, so ranked queries can skip blocks without decoding them.
+
+    Block layout: header byte (docno width code << 2 | term frequency width code) | docno deltas | term frequencies
+    """
+
+    def __init__(self, data=None, block_offsets=None, block_lasts=None, block_max_tfs=None, block_min_lengths=None):
+        """
+        Initializes the blocks, if no blocks are provided the store is empty and blocks can be appended
+        :param data: encoded blocks - a bytearray or a read-only memoryview (e.g. over a mmap)
+        :param block_offsets: offsets of the blocks in the data plus the end offset
+        :param block_lasts: last docno of each block
+        :param block_max_tfs: maximum term frequency of each block
+        :param block_min_lengths: minimum length of the documents of each block
+        """
+        self.data = data if data is not None else bytearray()
+        self.block_offsets = block_offsets if block_offsets is not None else array('Q', [0])
+        self.block_lasts = block_lasts if block_lasts is not None else array('i')
+        self.block_max_tfs = block_max_tfs if block_max_tfs is not None else array('i')
+        self.block_min_lengths = block_min_lengths if block_min_lengths is not None else array('i')
+        # Decoded posting lists are cached by the id of the store, ids are never reused unlike id() of the object
+        self.cache_id = next(_store_ids)
+
+    def __len__(self):
+        """
+        Returns number of blocks
+        :return: int
+        """
+        return len(self.block_lasts)
+
+    def size_in_bytes(self) -> int:
+        """
+        Returns size of the encoded blocks and the skip pointers
+        :return: number of bytes
+        """
+        return len(self.data) + 8 * len(self.block_offsets) + 12 * len(self.block_lasts)
+
+    def append(self, docnos, term_frequencies, document_lengths: Sequence[int]) -> int:
+        """
+        Encodes posting list and appends its blocks
+        :param docnos: ascending docnos of the postings
+        :param term_frequencies: term frequencies of the postings
+        :param document_lengths: lengths of the documents of the segment indexed by docno
+        :return: number of the first block of the posting list
+        """
+        first_block, base = len(self.block_lasts), 0
+        for start in range(0, len(docnos), POSTING_BLOCK_SIZE):
+            block_docnos = docnos[start:start + POSTING_BLOCK_SIZE]
+            block_term_frequencies = term_frequencies[start:start + POSTING_BLOCK_SIZE]
+            deltas = array('i', map(sub, block_docnos, chain((base,), block_docnos)))
+            docno_code, tf_code = _width_code(max(deltas)), _width_code(max(block_term_frequencies))
+            self.data.append(docno_code << 2 | tf_code)
+            self.data += array(_TYPECODES[docno_code], deltas).tobytes()
+            self.data += array(_TYPECODES[tf_code], block_term_frequencies).tobytes()
+            self.block_offsets.append(len(self.data))
+            base = block_docnos[-1]
+            self.block_lasts.append(base)
+            self.block_max_tfs.append(max(block_term_frequencies))
+            self.block_min_lengths.append(min(map(document_lengths.__getitem__, block_docnos)))
+        return first_block
+
+    def copy_blocks(self, other: 'PostingBlocks', first_block: int, n_blocks: int) -> int:
+        """
+        Appends encoded blocks of another store without decoding them
+        :param other: the other store
+        :param first_block: number of the first copied block in the other store
+        :param n_blocks: number of copied blocks
+        :return: number of the first copied block in this store
+        """
+        start, end = other.block_offsets[first_block], other.block_offsets[first_block + n_blocks]
+        shift = len(self.data) - start
+        result = len(self.block_lasts)
+        self.data += other.data[start:end]
+        self.block_offsets.extend(offset + shift for offset in
+                                  other.block_offsets[first_block + 1:first_block + n_blocks + 1])
+        self.block_lasts.extend(other.block_lasts[first_block:first_block + n_blocks])
+        self.block_max_tfs.extend(other.block_max_tfs[first_block:first_block + n_blocks])
+        self.block_min_lengths.extend(other.block_min_lengths[first_block:first_block + n_blocks])
+        return result
+
+    def _unpack(self, block: int, length: int, docno_deltas: bytearray, term_frequencies: bytearray, start: int):
+        """
+        Unpacks values of a block to buffers of 32 bit integers
+        :param block: number of the block
+        :param length: number of postings in the block
+        :param docno_deltas: buffer the docno deltas are written to
+        :param term_frequencies: buffer the term frequencies are written to
+        :param start: index of the first posting of the block in the buffers
+        :return: None
+        """
+        # Strided slices of a memoryview are not contiguous, so the block is copied to bytes first
+        data = bytes(self.data[self.block_offsets[block]:self.block_offsets[block + 1]])
+        docno_width, tf_width = _WIDTHS[data[0] >> 2], _WIDTHS[data[0] & 3]
+        docnos_end = 1 + length * docno_width
+        _widen(docno_deltas, start, data[1:docnos_end], docno_width)
+        _widen(term_frequencies, start, data[docnos_end:docnos_end + length * tf_width], tf_width)
+
+    def decode(self, first_block: int, length: int) -> Tuple[array, array]:
+        """
+        Decodes posting list
+        :param first_block: number of the first block of the posting list
+        :param length: number of postings
+        :return: tuple of docnos and term frequencies
+        """
+        docno_deltas, term_frequencies = bytearray(4 * length), bytearray(4 * length)
+        for block, start in enumerate(range(0, length, POSTING_BLOCK_SIZE), first_block):
+            self._unpack(block, min(POSTING_BLOCK_SIZE, length - start), docno_deltas, term_frequencies, start)
+        # Deltas continue across the blocks, so the docnos of the whole posting list are one prefix sum
+        docnos = _prefix_sums(docno_deltas)
+        result = array('i')
+        result.frombytes(term_frequencies)
+        return docnos, result
+
+    def decode_block(self, first_block: int, length: int, block: int) -> Tuple[array, array]:
+        """
+        Decodes one block of a posting list
+        :param first_block: number of the first block of the posting list
+        :param length: number of postings of the posting list
+        :param block: number of the decoded block
+        :return: tuple of docnos and term frequencies of the block
+        """
+        block_length = min(POSTING_BLOCK_SIZE, length - (block - first_block) * POSTING_BLOCK_SIZE)
+        docno_deltas, term_frequencies = bytearray(4 * block_length), bytearray(4 * block_length)
+        self._unpack(block, block_length, docno_deltas, term_frequencies, 0)
+        deltas = array('i')
+        deltas.frombytes(docno_deltas)
+        docnos = array('i', accumulate(deltas, initial=self.block_lasts[block - 1] if block > first_block else 0))
+        del docnos[0]
+        result = array('i')
+        result.frombytes(term_frequencies)
+        return docnos, result
+
+    def find(self, first_block: int, length: int, docno: int) -> int:
+        """
+        Finds posting of the docno using the skip pointers, only one block is decoded
+        :param first_block: number of the first block of the posting list
+        :param length: number of postings
+        :param docno: the docno
+        :return: index of the posting in the posting list or -1 if the posting list does not contain the docno
+        """
+        n_blocks = (length + POSTING_BLOCK_SIZE - 1) // POSTING_BLOCK_SIZE
+        block = bisect_left(self.block_lasts, docno, first_block, first_block + n_blocks)
+        if block == first_block + n_blocks:
+            return -1
+        docnos, _ = self.decode_block(first_block, length, block)
+        position = bisect_left(docnos, docno)
+        if position == len(docnos) or docnos[position] != docno:
+            return -1
+        return (block - first_block) * POSTING_BLOCK_SIZE + position
@@ -0,0 +1,60 @@
+import threading
+from typing import Hashable, Callable, Any
+
+from src.index.lru_cache import LruCache
+
+RESULT_CACHE_SIZE = 1_000_000  # maximum total number of result rows cached by an index
+
+
+class ResultCache:
+    """
+    Cache of search results of an index. Results are valid only for the generation of the snapshot they were
+    computed on - every modification of the index publishes a new generation, so once a search of a newer generation
+    arrives all cached results are dropped. Size of the cache is the total number of cached result rows
+    """
+
+    def __init__(self, max_rows: int = RESULT_CACHE_SIZE):
+        """
+        Initializes the cache
+        :param max_rows: maximum total number of cached result rows, 0 disables the cache
+        """
+        # Each entry costs one row even if the result is empty
+        self._cache = LruCache(max_rows, sizeof=lambda entry: max(entry[1], 1))
+        self._generation = -1
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, generation: int, key: Hashable, compute: Callable[[], Any],
+                       count_rows: Callable[[Any], int]) -> Any:
+        """
+        Returns cached result of the search or computes and caches it
+        :param generation: generation of the snapshot the search runs on
+        :param key: normalized search (model, query terms, number of results, offset)
+        :param compute: function that performs the search
+        :param count_rows: function returning number of rows of the result
+        :return: the result
+        """
+        with self._lock:
+            if generation > self._generation:
+                self._generation = generation
+                self._cache.clear()
+            current = generation == self._generation
+        if not current:
+            return compute()  # search of an old snapshot, its results cannot be cached
+
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached[0]
+        result = compute()
+        with self._lock:
+            if generation == self._generation:
+                self._cache.put(key, (result, count_rows(result)))
+        return result
+
+    def stats(self) -> dict:
+        """
+        Returns statistics of the cache
+        :return: dictionary with the number of entries, cached rows, maximum number of rows, hits and misses
+        """
+        stats = self._cache.stats()
+        stats['generation'] = self._generation
+        return stats
@@ -0,0 +1,222 @@
+import itertools
+from array import array
+from typing import List, Dict, Iterable, Mapping, Optional, Sequence
+
+from src.index.bitmap import Bitmap
+from src.index.document import Document
+from src.index.live_docs import LiveDocs
+from src.index.posting_blocks import PostingBlocks
+from src.index.term_info import TermInfo
+from src.index.varint import encode_deltas
+
+_segment_ids = itertools.count()
+
+
+class Segment:
+    """
+    Immutable inverted index over a subset of documents of the index. New documents are always added
+    as a new segment and segments are combined by merging, so a segment is never modified once it is published.
+    Documents are addressed by docnos local to the segment.
+    Deleted documents are only marked in the live docs bitset, they are physically removed when the segment is merged
+    """
+
+    def __init__(self, documents: Sequence[Document], postings: Mapping[str, TermInfo], live_docs: LiveDocs = None,
+                 segment_id: int = None, positional: bool = False, docnos: Mapping[str, int] = None,
+                 document_lengths: Sequence[int] = None, total_length: int = None):
+        """
+        Initializes the segment
+        :param documents: documents of the segment, position in the sequence is the docno of the document
+        :param postings: mapping of term -> postings with docnos local to this segment
+        :param live_docs: bitset of documents that were not deleted, None if no document was deleted
+        :param segment_id: id shared by all versions of the segment that differ only in deleted documents
+        :param positional: whether all postings store positions of the terms
+        :param docnos: mapping of document id -> docno, computed from the documents if None
+        :param document_lengths: length of each document, computed from the documents if None
+        :param total_length: sum of the document lengths, computed if None
+        """
+        self.documents = documents
+        self.postings = postings
+        self.positional = positional
+        self.live_docs: Optional[LiveDocs] = live_docs
+        self.segment_id = segment_id if segment_id is not None else next(_segment_ids)
+        self.docnos: Mapping[str, int] = docnos if docnos is not None else \
+            {document.id: docno for docno, document in enumerate(documents)}
+        # Statistics of the live documents - document frequencies in the postings include deleted documents
+        # so the number of deleted documents containing each term is kept separately
+        self.document_lengths = document_lengths if document_lengths is not None else \
+            array('i', (document.length for document in documents))
+        self.total_length = total_length if total_length is not None else sum(self.document_lengths)
+        self.deleted_frequencies: Dict[str, int] = {}
+        # Data derived from the segment by the search models (e.g. document norms), shared by all versions
+        self.model_data: Dict[str, object] = {}
+
+    def __len__(self):
+        """
+        Returns number of documents in the segment including the deleted ones
+        :return: int
+        """
+        return len(self.documents)
+
+    @property
+    def n_live(self) -> int:
+        """
+        Number of documents that were not deleted
+        :return: int
+        """
+        return len(self.documents) if self.live_docs is None else self.live_docs.n_live
+
+    @property
+    def deleted_ratio(self) -> float:
+        """
+        Ratio of deleted documents in the segment
+        :return: float
+        """
+        return 1 - self.n_live / len(self.documents) if len(self.documents) > 0 else 0.0
+
+    def is_live(self, docno: int) -> bool:
+        """
+        Checks whether the document was not deleted
+        :param docno: docno of the document
+        :return: bool
+        """
+        return self.live_docs is None or docno in self.live_docs
+
+    def find(self, document_id: str) -> Optional[int]:
+        """
+        Finds live document with given id
+        :param document_id: id of the document
+        :return: docno of the document or None if the segment does not contain live document with the id
+        """
+        docno = self.docnos.get(document_id)
+        return docno if docno is not None and self.is_live(docno) else None
+
+    def document_frequency(self, term: str) -> int:
+        """
+        Returns number of live documents in the segment containing the term
+        :param term: the term
+        :return: int
+        """
+        term_info = self.postings.get(term)
+        if term_info is None:
+            return 0
+        return term_info.document_frequency - self.deleted_frequencies.get(term, 0)
+
+    def delete(self, docnos: Iterable[int]) -> 'Segment':
+        """
+        Creates new version of the segment with given documents marked as deleted. Postings and documents are shared,
+        live docs and statistics are copied
+        :param docnos: docnos of the deleted documents
+        :return: new Segment
+        """
+        segment = Segment.__new__(Segment)
+        segment.documents, segment.postings, segment.docnos = self.documents, self.postings, self.docnos
+        segment.positional = self.positional
+        segment.document_lengths = self.document_lengths
+        segment.segment_id, segment.model_data = self.segment_id, self.model_data
+        segment.live_docs = self.live_docs if self.live_docs is not None else LiveDocs(len(self.documents))
+        segment.total_length, segment.deleted_frequencies = self.total_length, dict(self.deleted_frequencies)
+
+        deleted = [docno for docno in set(docnos) if docno in segment.live_docs]
+        segment.live_docs = segment.live_docs.delete(deleted)
+        for docno in deleted:
+            document = self.documents[docno]
+            segment.total_length -= document.length
+            for term in document.bow_int:
+                segment.deleted_frequencies[term] = segment.deleted_frequencies.get(term, 0) + 1
+        return segment
+
+    def live_docnos(self) -> Iterable[int]:
+        """
+        Returns all docnos of live documents in ascending order
+        :return: iterable of docnos
+        """
+        if self.live_docs is None:
+            return range(len(self.documents))
+        return (docno for docno in range(len(self.documents)) if docno in self.live_docs)
+
+    def live_bitmap(self) -> Bitmap:
+        """
+        Returns compressed bitmap of docnos of the live documents, the bitmap is computed once for each version
+        :return: Bitmap
+        """
+        if self.live_docs is not None:
+            return self.live_docs.bitmap()
+        # All documents are live in every version without deletions, so the bitmap is shared by them
+        bitmap = self.model_data.get('full_bitmap')
+        if bitmap is None:
+            bitmap = Bitmap.full(len(self.documents))
+            self.model_data['full_bitmap'] = bitmap
+        return bitmap
+
+    @staticmethod
+    def build(documents: List[Document]) -> 'Segment':
+        """
+        Builds new segment from a batch of documents. The segment is positional if all documents have positions
+        of their terms
+        :param documents: list of documents with unique ids
+        :return: Segment
+        """
+        positional = all(document.positions is not None for document in documents)
+        postings: Dict[str, TermInfo] = {}
+        for docno, document in enumerate(documents):
+            for term, term_frequency in document.bow_int.items():
+                if term not in postings:
+                    postings[term] = TermInfo.with_positions() if positional else TermInfo()
+                postings[term].append_document(docno, term_frequency,
+                                               encode_deltas(document.positions[term]) if positional else None)
+        segment = Segment(documents, postings, positional=positional)
+        Segment._compress_postings(postings, segment.document_lengths)
+        return segment
+
+    @staticmethod
+    def merge(segments: List['Segment']) -> 'Segment':
+        """
+        Merges segments into one and purges deleted documents. Live documents keep their relative order,
+        so the n-th live document of the i-th segment gets docno equal to the number of live documents before it.
+        Positions are kept only if all segments are positional
+        :param segments: segments to merge
+        :return: merged Segment
+        """
+        positional = all(segment.positional for segment in segments)
+        documents, postings = [], {}
+        for segment in segments:
+            base = len(documents)
+            if segment.live_docs is None:
+                # Fast path - nothing was deleted so the postings can be copied with docnos shifted by base
+                documents.extend(segment.documents)
+                for term, term_info in segment.postings.items():
+                    if term not in postings:
+                        postings[term] = TermInfo.with_positions() if positional else TermInfo()
+                    postings[term].extend(term_info, base)
+                continue
+
+            # Map docnos of the segment to the merged segment, -1 marks deleted documents
+            new_docnos = [-1] * len(segment)
+            for docno in segment.live_docnos():
+                new_docnos[docno] = len(documents)
+                documents.append(segment.documents[docno])
+
+            for term, term_info in segment.postings.items():
+                merged = postings.get(term)
+                for index, (docno, term_frequency) in enumerate(zip(*term_info.decode())):
+                    if new_docnos[docno] == -1:
+                        continue
+                    if merged is None:
+                        merged = postings[term] = TermInfo.with_positions() if positional else TermInfo()
+                    merged.append_document(new_docnos[docno], term_frequency,
+                                           term_info.encoded_positions(index) if positional else None)
+        segment = Segment(documents, postings, positional=positional)
+        Segment._compress_postings(postings, segment.document_lengths)
+        return segment
+
+    @staticmethod
+    def _compress_postings(postings: Dict[str, TermInfo], document_lengths: Sequence[int]):
+        """
+        Compresses postings of a new segment to blocks shared by all its terms
+        :param postings: postings of the segment
+        :param document_lengths: lengths of the documents of the segment indexed by docno
+        :return: None
+        """
+        blocks = PostingBlocks()
+        for term_info in postings.values():
+            term_info.compress(blocks, document_lengths)
@@ -0,0 +1,540 @@
+import itertools
+import json
+import lzma
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from collections.abc import ItemsView, Mapping, Sequence, ValuesView
+from datetime import datetime
+from typing import Dict, List, Iterable, Optional, Tuple
+
+from src.index.document import Document
+from src.index.index_config import IndexConfig
+from src.index.lru_cache import LruCache
+from src.index.posting_blocks import PostingBlocks
+from src.index.segment import Segment
+from src.index.term_info import TermInfo
+
+# Binary segment format
+# ---------------------
+# The file starts with a fixed header followed by a table of sections. Each section is aligned to 8 bytes
+# so the numeric sections can be cast to arrays directly from the memory map without copying.
+#
+#   header:  magic (8B) | format version (u32) | byte order (u32) | n_docs (u64) | n_terms (u64)
+#   table:   (offset u64, length u64) for each section in the order of SECTIONS
+#
+# Numeric arrays are stored in the native byte order of the machine that wrote the file (recorded in the header).
+#
+# Stored fields (title, text, date, properties and terms) are kept in compressed blocks of STORED_BLOCK_SIZE
+# consecutive documents, each block is a compressed utf-8 json array. Compression and block size are recorded
+# in the metadata.
+#
+# Positional segments store positions of the terms in each posting delta encoded as varints, the position
+# sections of other segments are empty.
+#
+# Postings are stored as PostingBlocks - delta encoded docnos and term frequencies packed in blocks with skip
+# pointers, postings are decoded from the memory map when they are read. Maximum term frequency and minimum
+# document length of each posting block bound the scores of ranked queries.
+#
+# Norms of the tf-idf vectors of the documents are computed from the statistics of the saved segment, so the first
+# query after the segment is opened does not decode every posting list to compute them.
+#
+# Opening a segment reads only the header, terms and documents are found by binary searches over the mapped
+# term dictionary and the docnos sorted by document id.
+SEGMENT_MAGIC = b'IRSPSEG\x00'
+SEGMENT_FORMAT_VERSION = 2
+
+_HEADER = struct.Struct('<8sIIQQ')
+_SECTION_ENTRY = struct.Struct('<QQ')
+_BYTE_ORDERS = {'little': 0, 'big': 1}
+_ALIGNMENT = 8
+
+SECTIONS = [
+    'metadata',  # json with the index configuration
+    'doc_id_offsets',  # array('Q') of n_docs + 1 offsets to the doc_ids blob
+    'doc_ids',  # utf-8 encoded document ids
+    'doc_lengths',  # array('i') with length of each document
+    'term_offsets',  # array('Q') of n_terms + 1 offsets to the terms blob
+    'terms',  # utf-8 encoded terms sorted lexicographically
+    'posting_offsets',  # array('Q') of n_terms + 1 numbers of postings preceding each term
+    'collection_frequencies',  # array('q') collection frequency of each term
+    'posting_block_starts',  # array('Q') of n_terms + 1 numbers of the first posting block of each term
+    'posting_block_offsets',  # array('Q') of n_posting_blocks + 1 offsets to the posting blocks blob
+    'posting_block_lasts',  # array('i') last docno of each posting block
+    'posting_blocks',  # encoded posting blocks
+    'stored_block_offsets',  # array('Q') of n_blocks + 1 offsets to the stored blocks blob
+    'stored_blocks',  # compressed blocks of stored fields
+    'posting_position_offsets',  # array('Q') of n_postings + 1 offsets to the positions blob
+    'posting_positions',  # delta encoded positions of all postings
+    'doc_id_order',  # array('i') docnos sorted by the utf-8 encoded document ids
+    'posting_block_max_tfs',  # array('i') maximum term frequency of each posting block
+    'posting_block_min_lengths',  # array('i') minimum document length of each posting block
+    'doc_norms',  # array('d') norm of the tf-idf vector of each document, empty if the norms are not stored
+]
+STORED_BLOCK_SIZE = 16  # number of documents in a block of stored fields
+STORED_FIELDS_CACHE_SIZE = 1024  # number of decoded blocks kept in memory across all segment files
+_COMPRESSORS = {
+    'zlib': (zlib.compress, zlib.decompress),
+    'lzma': (lzma.compress, lzma.decompress),
+    'none': (bytes, bytes),
+}
+
+# Decoded blocks of stored fields shared by all segment files, keyed by (segment file, block number)
+stored_fields_cache = LruCache(STORED_FIELDS_CACHE_SIZE)
+_segment_file_ids = itertools.count()
+
+
+def _stored_fields(document: Document) -> dict:
+    """
+    Returns fields of the document that are not part of the inverted index
+    :param document: the document
+    :return: json serializable dictionary
+    """
+    return {
+        'title': document.title,
+        'text': document.text,
+        'date': document.date.isoformat() if document.date else None,
+        'properties': document.properties,
+        'terms': document.bow_int,
+    }
+
+
+def write_segment(path: str, config: IndexConfig, documents: List[Document], terms: Iterable[Tuple[str, TermInfo]],
+                  compression: str = 'zlib', positional: bool = False, document_norms: Sequence[float] = None):
+    """
+    Writes segment file. The file is first written to a temporary location and then atomically moved to the path
+    so any reader that has the old file mapped keeps a consistent view
+    :param path: path of the segment file
+    :param config: configuration of the index
+    :param documents: list of documents, position in the list is the docno of the document in the segment
+    :param terms: iterable of (term, postings) sorted by term
+    :param compression: compression of the stored fields - zlib, lzma or none
+    :param positional: store positions of the terms, all postings must be positional
+    :param document_norms: norms of the tf-idf vectors of the documents indexed by docno, None does not store them
+    :return: None
+    """
+    if compression not in _COMPRESSORS:
+        raise ValueError(f'Unsupported compression {compression}')
+    compress = _COMPRESSORS[compression][0]
+
+    doc_id_offsets, doc_ids, doc_lengths = array('Q', [0]), bytearray(), array('i')
+    encoded_ids = []
+    stored_block_offsets, stored_blocks = array('Q', [0]), bytearray()
+    for block_start in range(0, len(documents), STORED_BLOCK_SIZE):
+        block = documents[block_start:block_start + STORED_BLOCK_SIZE]
+        for document in block:
+            encoded_ids.append(document.id.encode('utf-8'))
+            doc_ids += encoded_ids[-1]
+            doc_id_offsets.append(len(doc_ids))
+            doc_lengths.append(document.length)
+        stored_blocks += compress(json.dumps([_stored_fields(document) for document in block],
+                                             ensure_ascii=False).encode('utf-8'))
+        stored_block_offsets.append(len(stored_blocks))
+    doc_id_order = array('i', sorted(range(len(encoded_ids)), key=encoded_ids.__getitem__))
+
+    # Total length of the documents is kept in the metadata so opening the segment does not sum the lengths
+    metadata = dict(config.to_dict(), stored_fields={'compression': compression, 'block_size': STORED_BLOCK_SIZE},
+                    total_length=sum(doc_lengths))
+    sections: Dict[str, bytes] = {'metadata': json.dumps(metadata).encode('utf-8')}
+
+    term_offsets, terms_blob = array('Q', [0]), bytearray()
+    posting_offsets, collection_frequencies = array('Q', [0]), array('q')
+    posting_block_starts, posting_blocks = array('Q'), PostingBlocks()
+    position_offsets, positions = array('Q', [0] if positional else []), bytearray()
+    for term, term_info in terms:
+        terms_blob += term.encode('utf-8')
+        term_offsets.append(len(terms_blob))
+        # Compressed postings are copied without decoding
+        posting_block_starts.append(term_info.write_blocks(posting_blocks, doc_lengths))
+        posting_offsets.append(posting_offsets[-1] + term_info.document_frequency)
+        collection_frequencies.append(term_info.collection_frequency)
+        if positional:
+            base, end = term_info.position_offsets[0], term_info.position_offsets[-1]
+            shift = len(positions) - base
+            position_offsets.extend(offset + shift for offset in term_info.position_offsets[1:])
+            positions += term_info.positions[base:end]
+
+    sections.update({
+        'doc_id_offsets': doc_id_offsets.tobytes(),
+        'doc_ids': bytes(doc_ids),
+        'doc_lengths': doc_lengths.tobytes(),
+        'term_offsets': term_offsets.tobytes(),
+        'terms': bytes(terms_blob),
+        'posting_offsets': posting_offsets.tobytes(),
+        'collection_frequencies': collection_frequencies.tobytes(),
+        'posting_block_starts': posting_block_starts.tobytes() + array('Q', [len(posting_blocks)]).tobytes(),
+        'posting_block_offsets': posting_blocks.block_offsets.tobytes(),
+        'posting_block_lasts': posting_blocks.block_lasts.tobytes(),
+        'posting_blocks': bytes(posting_blocks.data),
+        'stored_block_offsets': stored_block_offsets.tobytes(),
+        'stored_blocks': bytes(stored_blocks),
+        'posting_position_offsets': position_offsets.tobytes(),
+        'posting_positions': bytes(positions),
+        'doc_id_order': doc_id_order.tobytes(),
+        'posting_block_max_tfs': posting_blocks.block_max_tfs.tobytes(),
+        'posting_block_min_lengths': posting_blocks.block_min_lengths.tobytes(),
+        'doc_norms': array('d', document_norms).tobytes() if document_norms is not None else b'',
+    })
+
+    # Compute position of each section
+    table_size = _HEADER.size + _SECTION_ENTRY.size * len(SECTIONS)
+    position, section_table = table_size, []
+    for name in SECTIONS:
+        position += -position % _ALIGNMENT
+        section_table.append((position, len(sections[name])))
+        position += len(sections[name])
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(SEGMENT_MAGIC, SEGMENT_FORMAT_VERSION, _BYTE_ORDERS[sys.byteorder],
+                             len(documents), len(term_offsets) - 1))
+        for offset, length in section_table:
+            f.write(_SECTION_ENTRY.pack(offset, length))
+        for name, (offset, _) in zip(SECTIONS, section_table):
+            f.write(b'\x00' * (offset - f.tell()))
+            f.write(sections[name])
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class SegmentFile:
+    """
+    Read-only view of a segment file. The file is memory mapped so only the pages that are actually
+    accessed are loaded by the operating system
+    """
+
+    def __init__(self, path: str):
+        """
+        Opens and validates the segment file
+        :param path: path to the segment file
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+
+        if len(self._mmap) < _HEADER.size:
+            raise ValueError(f'File {path} is not a valid segment file')
+        magic, version, byte_order, self.n_docs, self.n_terms = _HEADER.unpack_from(self._mmap, 0)
+        if magic != SEGMENT_MAGIC:
+            raise ValueError(f'File {path} is not a valid segment file')
+        if version != SEGMENT_FORMAT_VERSION:
+            raise ValueError(f'Unsupported segment format version {version} in file {path}')
+        if byte_order != _BYTE_ORDERS[sys.byteorder]:
+            raise ValueError(f'Segment file {path} was written on a machine with different byte order')
+
+        self._sections = {}
+        for idx, name in enumerate(SECTIONS):
+            self._sections[name] = _SECTION_ENTRY.unpack_from(self._mmap, _HEADER.size + idx * _SECTION_ENTRY.size)
+
+        self.doc_id_offsets = self._section('doc_id_offsets', 'Q')
+        self.doc_lengths = self._section('doc_lengths', 'i')
+        self.term_offsets = self._section('term_offsets', 'Q')
+        self.posting_offsets = self._section('posting_offsets', 'Q')
+        self.collection_frequencies = self._section('collection_frequencies', 'q')
+        self.posting_block_starts = self._section('posting_block_starts', 'Q')
+        self.posting_blocks = PostingBlocks(self._section('posting_blocks'),
+                                            self._section('posting_block_offsets', 'Q'),
+                                            self._section('posting_block_lasts', 'i'),
+                                            self._section('posting_block_max_tfs', 'i'),
+                                            self._section('posting_block_min_lengths', 'i'))
+        # Positional segment has an offset for each posting plus the end offset, other segments have none
+        self.positional = self._sections['posting_position_offsets'][1] > 0
+        if self.positional:
+            self.posting_position_offsets = self._section('posting_position_offsets', 'Q')
+            self.posting_positions = self._section('posting_positions')
+        self._metadata = json.loads(bytes(self._section('metadata')).decode('utf-8'))
+        self.doc_id_order = self._section('doc_id_order', 'i')
+        self.document_norms = self._section('doc_norms', 'd') if self._sections['doc_norms'][1] > 0 else None
+        self._cache_id = next(_segment_file_ids)
+        self.stored_block_offsets = self._section('stored_block_offsets', 'Q')
+        self.stored_block_size = self._metadata['stored_fields']['block_size']
+        compression = self._metadata['stored_fields']['compression']
+        if compression not in _COMPRESSORS:
+            raise ValueError(f'Unsupported compression {compression} in segment file {path}')
+        self._decompress = _COMPRESSORS[compression][1]
+
+    def _section(self, name: str, fmt: str = None) -> memoryview:
+        """
+        Returns memoryview of the section, numeric sections are cast to the given format
+        :param name: name of the section
+        :param fmt: struct format of the items in the section
+        :return: memoryview
+        """
+        offset, length = self._sections[name]
+        view = self._view[offset:offset + length]
+        return view.cast(fmt) if fmt else view
+
+    def index_config(self) -> IndexConfig:
+        """
+        Creates index configuration from the metadata of the segment
+        :return: IndexConfig
+        """
+        return IndexConfig.from_dict(self._metadata)
+
+    def doc_id(self, docno: int) -> str:
+        """
+        Returns id of the document with given docno
+        :param docno: docno of the document
+        :return: id of the document
+        """
+        offset = self._sections['doc_ids'][0]
+        return str(self._view[offset + self.doc_id_offsets[docno]:offset + self.doc_id_offsets[docno + 1]], 'utf-8')
+
+    def term(self, term_no: int) -> str:
+        """
+        Returns term at given position in the term dictionary
+        :param term_no: position of the term
+        :return: the term
+        """
+        offset = self._sections['terms'][0]
+        return str(self._view[offset + self.term_offsets[term_no]:offset + self.term_offsets[term_no + 1]], 'utf-8')
+
+    def find_term(self, term: str) -> Optional[int]:
+        """
+        Finds position of the term in the term dictionary by a binary search. Terms are sorted lexicographically,
+        which is the same order as the order of their utf-8 encoding
+        :param term: the term
+        :return: position of the term or None if the segment does not contain it
+        """
+        offset, offsets = self._sections['terms'][0], self.term_offsets
+        key = term.encode('utf-8')
+        low, high = 0, self.n_terms
+        while low < high:
+            middle = (low + high) // 2
+            if bytes(self._view[offset + offsets[middle]:offset + offsets[middle + 1]]) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.n_terms and self._view[offset + offsets[low]:offset + offsets[low + 1]] == key:
+            return low
+        return None
+
+    def find_document(self, document_id: str) -> Optional[int]:
+        """
+        Finds docno of the document by a binary search over the docnos sorted by document id
+        :param document_id: id of the document
+        :return: docno of the document or None if the segment does not contain it
+        """
+        offset, offsets, order = self._sections['doc_ids'][0], self.doc_id_offsets, self.doc_id_order
+        key = document_id.encode('utf-8')
+        low, high = 0, self.n_docs
+        while low < high:
+            middle = (low + high) // 2
+            docno = order[middle]
+            if bytes(self._view[offset + offsets[docno]:offset + offsets[docno + 1]]) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.n_docs:
+            docno = order[low]
+            if self._view[offset + offsets[docno]:offset + offsets[docno + 1]] == key:
+                return docno
+        return None
+
+    def term_info(self, term_no: int) -> TermInfo:
+        """
+        Returns postings of the term at given position. Postings are not copied - they reference the memory map
+        :param term_no: position of the term
+        :return: TermInfo
+        """
+        start, end = self.posting_offsets[term_no], self.posting_offsets[term_no + 1]
+        position_offsets, positions = (self.posting_position_offsets[start:end + 1], self.posting_positions) \
+            if self.positional else (None, None)
+        return TermInfo.compressed(self.posting_blocks, self.posting_block_starts[term_no], end - start,
+                                   self.collection_frequencies[term_no], position_offsets, positions)
+
+    def load_segment(self) -> Segment:
+        """
+        Creates segment backed by this file. Nothing is decoded when the segment is created - terms, documents
+        and their ids are looked up in the memory map when they are accessed
+        :return: Segment
+        """
+        return Segment(MappedDocuments(self), MappedPostings(self), positional=self.positional,
+                       docnos=MappedDocnos(self), document_lengths=self.doc_lengths,
+                       total_length=self._metadata['total_length'])
+
+    def stored_fields(self, docno: int) -> dict:
+        """
+        Returns stored fields of the document. The block containing the document is decompressed and kept
+        in the shared cache, so accessing other documents of the block is cheap. The returned dictionary is shared
+        with the cache
+        :param docno: docno of the document
+        :return: dictionary of stored fields
+        """
+        block_no, position = divmod(docno, self.stored_block_size)
+        return stored_fields_cache.get_or_compute((self._cache_id, block_no), lambda: self._read_block(block_no))[
+            position]
+
+    def _read_block(self, block_no: int) -> List[dict]:
+        """
+        Decompresses block of stored fields
+        :param block_no: number of the block
+        :return: list of stored fields of the documents in the block
+        """
+        offset = self._sections['stored_blocks'][0]
+        start, end = self.stored_block_offsets[block_no], self.stored_block_offsets[block_no + 1]
+        return json.loads(self._decompress(self._view[offset + start:offset + end]).decode('utf-8'))
+
+
+class MappedDocument(Document):
+    """
+    Document loaded from a segment file. Only the id and length are kept in memory, the remaining fields
+    are read from the stored fields of the segment whenever they are accessed
+    """
+
+    positions = None  # positions of the terms are stored in the postings of the segment
+
+    def __init__(self, segment_file: SegmentFile, docno: int):
+        """
+        Initializes the document, this does not read the stored fields
+        :param segment_file: segment the document is stored in
+        :param docno: docno of the document in the segment
+        """
+        # Base constructor is intentionally not called - it would compute the bag of words
+        self._segment_file = segment_file
+        self._docno = docno
+        self.id = segment_file.doc_id(docno)
+        self.length = segment_file.doc_lengths[docno]
+
+    def __getattr__(self, name):
+        """
+        Reads stored field of the document. Fields are not kept in the document so the memory is bounded
+        by the stored fields cache
+        :param name: name of the attribute
+        :return: value of the attribute
+        """
+        if name not in _MAPPED_FIELDS or '_segment_file' not in self.__dict__:
+            raise AttributeError(name)
+
+        stored_fields = self._segment_file.stored_fields(self._docno)
+        if name == 'bow_log':
+            # Log term frequencies are derived from the terms, they are cached together with the decoded block
+            if 'bow_log' not in stored_fields:
+                stored_fields['bow_log'] = Document.log_bow(stored_fields['terms'])
+            return stored_fields['bow_log']
+        if name == 'date':
+            return datetime.fromisoformat(stored_fields['date']) if stored_fields['date'] else None
+        return stored_fields[_MAPPED_FIELDS[name]]
+
+
+# Attributes of MappedDocument read from the stored fields -> key in the stored fields
+_MAPPED_FIELDS = {
+    'title': 'title',
+    'text': 'text',
+    'date': 'date',
+    'properties': 'properties',
+    'bow_int': 'terms',
+    'bow_log': 'bow_log',
+}
+
+
+class MappedDocuments(Sequence):
+    """
+    Documents of a segment file, position in the sequence is the docno. MappedDocument is created when
+    the document is accessed
+    """
+
+    def __init__(self, segment_file: SegmentFile):
+        self._segment_file = segment_file
+
+    def __len__(self):
+        return self._segment_file.n_docs
+
+    def __getitem__(self, docno):
+        if isinstance(docno, slice):
+            return [MappedDocument(self._segment_file, position) for position in range(*docno.indices(len(self)))]
+        if docno < 0:
+            docno += len(self)
+        if not 0 <= docno < len(self):
+            raise IndexError(docno)
+        return MappedDocument(self._segment_file, docno)
+
+
+class MappedPostings(Mapping):
+    """
+    Read-only mapping of term -> postings of a segment file. Terms are found by a binary search over the mapped
+    term dictionary, so no term is decoded before it is looked up. Iteration follows the order of the dictionary
+    """
+
+    def __init__(self, segment_file: SegmentFile):
+        self._segment_file = segment_file
+
+    def __getitem__(self, term: str) -> TermInfo:
+        term_no = self._segment_file.find_term(term)
+        if term_no is None:
+            raise KeyError(term)
+        return self._segment_file.term_info(term_no)
+
+    def get(self, term: str, default=None):
+        term_no = self._segment_file.find_term(term)
+        return self._segment_file.term_info(term_no) if term_no is not None else default
+
+    def __contains__(self, term) -> bool:
+        return isinstance(term, str) and self._segment_file.find_term(term) is not None
+
+    def __len__(self):
+        return self._segment_file.n_terms
+
+    def __iter__(self):
+        return (self._segment_file.term(term_no) for term_no in range(self._segment_file.n_terms))
+
+    def items(self):
+        return _MappedPostingItems(self)
+
+    def values(self):
+        return _MappedPostingValues(self)
+
+
+class _MappedPostingItems(ItemsView):
+    """
+    Items of MappedPostings read in the order of the term dictionary without searching for each term
+    """
+
+    def __iter__(self):
+        segment_file = self._mapping._segment_file
+        for term_no in range(segment_file.n_terms):
+            yield segment_file.term(term_no), segment_file.term_info(term_no)
+
+
+class _MappedPostingValues(ValuesView):
+    """
+    Values of MappedPostings read in the order of the term dictionary without searching for each term
+    """
+
+    def __iter__(self):
+        segment_file = self._mapping._segment_file
+        return (segment_file.term_info(term_no) for term_no in range(segment_file.n_terms))
+
+
+class MappedDocnos(Mapping):
+    """
+    Read-only mapping of document id -> docno of a segment file. Ids are found by a binary search over the docnos
+    sorted by id
+    """
+
+    def __init__(self, segment_file: SegmentFile):
+        self._segment_file = segment_file
+
+    def get(self, document_id: str, default=None):
+        docno = self._segment_file.find_document(document_id)
+        return docno if docno is not None else default
+
+    def __getitem__(self, document_id: str) -> int:
+        docno = self.get(document_id)
+        if docno is None:
+            raise KeyError(document_id)
+        return docno
+
+    def __contains__(self, document_id) -> bool:
+        return isinstance(document_id, str) and self.get(document_id) is not None
+
+    def __len__(self):
+        return self._segment_file.n_docs
+
+    def __iter__(self):
+        return (self._segment_file.doc_id(docno) for docno in range(self._segment_file.n_docs))
@@ -0,0 +1,109 @@
+from collections.abc import Mapping
+from typing import Tuple, Optional, Iterator
+
+from src.index.document import Document
+from src.index.segment import Segment
+
+
+class IndexSnapshot:
+    """
+    Consistent read view of the index. Snapshot references immutable segments, so it never changes once created.
+    Writers publish a new snapshot with higher generation instead of modifying the current one, therefore a search
+    that pinned a snapshot can run without any locks while documents are being added or deleted
+    """
+
+    def __init__(self, generation: int, segments: Tuple[Segment, ...], changes: int = 0):
+        """
+        Initializes the snapshot
+        :param generation: generation of the index, incremented with every published change
+        :param segments: segments of the index ordered from the oldest
+        :param changes: number of documents added, replaced or deleted since the index was created. Merges do not
+        change it, so it changes exactly when the document frequencies may have changed
+        """
+        self.generation = generation
+        self.segments = segments
+        self.changes = changes
+        self.n_docs = sum(segment.n_live for segment in segments)
+        self.total_length = sum(segment.total_length for segment in segments)
+        # Values derived from the snapshot (e.g. idf values) that can be cached for the lifetime of the snapshot
+        self.cache = {}
+
+    @property
+    def average_document_length(self) -> float:
+        """
+        Average length of the live documents
+        :return: float
+        """
+        return self.total_length / self.n_docs if self.n_docs > 0 else 0
+
+    def document_frequency(self, term: str) -> int:
+        """
+        Returns number of live documents containing the term
+        :param term: the term
+        :return: int
+        """
+        return sum(segment.document_frequency(term) for segment in self.segments)
+
+    @property
+    def n_terms(self) -> int:
+        """
+        Number of distinct terms contained in at least one live document. Computed once per snapshot
+        :return: int
+        """
+        if 'n_terms' not in self.cache:
+            terms = set()
+            for segment in self.segments:
+                deleted = segment.deleted_frequencies
+                terms.update(term for term, term_info in segment.postings.items()
+                             if term_info.document_frequency > deleted.get(term, 0))
+            self.cache['n_terms'] = len(terms)
+        return self.cache['n_terms']
+
+    def get_document(self, document_id: str) -> Optional[Document]:
+        """
+        Finds live document with given id
+        :param document_id: id of the document
+        :return: Document or None if it does not exist
+        """
+        for segment in reversed(self.segments):
+            docno = segment.find(document_id)
+            if docno is not None:
+                return segment.documents[docno]
+        return None
+
+    def documents(self) -> Iterator[Document]:
+        """
+        Iterates over all live documents
+        :return: iterator of documents
+        """
+        for segment in self.segments:
+            for docno in segment.live_docnos():
+                yield segment.documents[docno]
+
+
+class SnapshotDocuments(Mapping):
+    """
+    Read-only mapping of document id -> document over the current snapshot of the index
+    """
+
+    def __init__(self, index):
+        """
+        Initializes the mapping
+        :param index: index whose current snapshot is used for every access
+        """
+        self._index = index
+
+    def __getitem__(self, document_id: str) -> Document:
+        document = self._index.snapshot().get_document(document_id)
+        if document is None:
+            raise KeyError(document_id)
+        return document
+
+    def __contains__(self, document_id) -> bool:
+        return self._index.snapshot().get_document(document_id) is not None
+
+    def __len__(self) -> int:
+        return self._index.snapshot().n_docs
+
+    def __iter__(self) -> Iterator[str]:
+        return (document.id for document in self._index.snapshot().documents())
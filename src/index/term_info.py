@@ -1,69 +1,325 @@
-from typing import Dict
+from array import array
+from bisect import bisect_left
+from typing import List, Optional, Sequence, Tuple
 
-from src.index.document import Document
-from src.index.document_info import DocumentInfo
+from src.index.lru_cache import LruCache
+from src.index.posting_blocks import PostingBlocks, POSTING_BLOCK_SIZE
+from src.index.varint import decode_deltas
+
+DECODED_POSTINGS_CACHE_SIZE = 64 * 1024 * 1024  # maximum approximate size in bytes of decoded compressed postings
+
+# Decoded compressed posting lists shared by all segments, keyed by (blocks, first block, number of postings)
+decoded_postings_cache = LruCache(DECODED_POSTINGS_CACHE_SIZE, sizeof=lambda postings: 8 * len(postings[0]))
 
 
 class TermInfo:
     """
-    Represents search_model information for specific term
+    Represents search_model information for specific term.
+    Postings are stored as two parallel arrays - sorted document numbers (docnos) and term frequencies. Postings
+    of published segments are compressed to PostingBlocks of the segment, their arrays are decoded when they are
+    accessed and kept in the shared decoded postings cache.
+    Positional postings additionally keep positions of the term in each document, delta encoded as varints
     """
 
-    def __init__(self, document: Document, term_name: str):
+    __slots__ = ('_docnos', '_term_frequencies', 'collection_frequency', 'position_offsets', 'positions', '_blocks',
+                 '_first_block', '_length')
+
+    def __init__(self, docnos=None, term_frequencies=None, collection_frequency: int = 0, position_offsets=None,
+                 positions=None):
+        """
+        Initializes posting list for the term. If no postings are provided the posting list is empty
+        :param docnos: sorted document numbers - either an array or a read-only memoryview (e.g. over a mmap)
+        :param term_frequencies: term frequencies for each of the docnos
+        :param collection_frequency: sum of all term frequencies
+        :param position_offsets: offsets of the encoded positions of each posting plus the end offset,
+        None if the postings are not positional
+        :param positions: encoded positions - a bytearray or a read-only memoryview, offsets index into it
+        """
+        # Document numbers are dense integers assigned by the index, term frequencies are raw integer counts
+        self._docnos = docnos if docnos is not None else array('i')
+        self._term_frequencies = term_frequencies if term_frequencies is not None else array('i')
+        self.collection_frequency = collection_frequency
+        # Positions of the i-th posting are positions[position_offsets[i]:position_offsets[i + 1]]
+        self.position_offsets = position_offsets
+        self.positions = positions
+        # Compressed postings - blocks of the segment, number of the first block and number of postings
+        self._blocks: Optional[PostingBlocks] = None
+        self._first_block = 0
+        self._length = 0
+
+    @staticmethod
+    def compressed(blocks: PostingBlocks, first_block: int, length: int, collection_frequency: int,
+                   position_offsets=None, positions=None) -> 'TermInfo':
+        """
+        Creates term info of compressed postings
+        :param blocks: blocks with the postings
+        :param first_block: number of the first block of the postings
+        :param length: number of postings
+        :param collection_frequency: sum of all term frequencies
+        :param position_offsets: offsets of the encoded positions of each posting plus the end offset,
+        None if the postings are not positional
+        :param positions: encoded positions
+        :return: TermInfo
+        """
+        term_info = TermInfo(collection_frequency=collection_frequency, position_offsets=position_offsets,
+                             positions=positions)
+        term_info._docnos = term_info._term_frequencies = None
+        term_info._blocks, term_info._first_block, term_info._length = blocks, first_block, length
+        return term_info
+
+    @staticmethod
+    def with_positions() -> 'TermInfo':
+        """
+        Creates empty positional posting list
+        :return: TermInfo
+        """
+        return TermInfo(position_offsets=array('Q', [0]), positions=bytearray())
+
+    @property
+    def docnos(self):
+        """
+        Sorted document numbers of the postings
+        :return: array or a read-only memoryview
+        """
+        return self._docnos if self._blocks is None else self._decoded()[0]
+
+    @property
+    def term_frequencies(self):
         """
-        TermInfo can only be initialized with some document
-        :param document: document that contains this term
-        :param term_name: name of the term
+        Term frequencies of the postings
+        :return: array or a read-only memoryview
         """
-        # Documents are stored as a dictionary with document id as key and document as value
-        doc_term_frequency = document.bow_log[term_name]
-        self.documents: Dict[str, DocumentInfo] = {document.id: DocumentInfo(document, doc_term_frequency)}
-        self.collection_frequency = doc_term_frequency
-        self.document_frequency = 1
+        return self._term_frequencies if self._blocks is None else self._decoded()[1]
 
-    def append_document(self, document: Document, term_name: str):
+    @property
+    def document_frequency(self) -> int:
         """
-        Appends document to the dictionary of documents
-        :param document: document to be appended
-        :param term_name: name of this term
+        Number of documents containing this term
+        :return: int
         """
+        return self._length if self._blocks is not None else len(self._docnos)
 
-        # First we need to check whether a document
-        # with the same id already exists in the dictionary
-        if document.id in self.documents:
-            # Remove the old document
-            old_document_info = self.documents[document.id]
-            self.document_frequency -= 1  # this is just to make the code cleaner without else statement
-            del self.documents[document.id]
+    @property
+    def has_positions(self) -> bool:
+        """
+        Whether positions of the term are stored
+        :return: bool
+        """
+        return self.position_offsets is not None
+
+    def append_document(self, docno: int, term_frequency: int, positions: Optional[bytes] = None):
+        """
+        Appends document to the posting list
+        :param docno: document number of the document
+        :param term_frequency: frequency of the term in the document
+        :param positions: positions of the term in the document encoded by encode_deltas(), required if the posting
+        list is positional and ignored otherwise
+        """
+        self._ensure_writable()
+        if self.has_positions and positions is None:
+            raise ValueError('Positions of the term are required by positional postings')
 
-            # Recalculate collection frequency
-            self.collection_frequency -= old_document_info.term_frequency
+        # The index assigns docnos in ascending order so in almost all cases we can simply append
+        if len(self._docnos) == 0 or self._docnos[-1] < docno:
+            self._docnos.append(docno)
+            self._term_frequencies.append(term_frequency)
+            self.collection_frequency += term_frequency
+            if self.has_positions:
+                self.positions += positions
+                self.position_offsets.append(len(self.positions))
+            return
 
-        # Append the new document
-        term_frequency = document.bow_log[term_name]
+        position = bisect_left(self._docnos, docno)
+        if self._docnos[position] == docno:
+            # Document is already present so replace its frequency
+            self.collection_frequency -= self._term_frequencies[position]
+            self._term_frequencies[position] = term_frequency
+            if self.has_positions:
+                self._splice_positions(position, 1, positions)
+        else:
+            self._docnos.insert(position, docno)
+            self._term_frequencies.insert(position, term_frequency)
+            if self.has_positions:
+                self._splice_positions(position, 0, positions)
         self.collection_frequency += term_frequency
-        document_info = DocumentInfo(document, term_frequency)
-        self.documents[document.id] = document_info
-        self.document_frequency += 1
 
-    def remove_document(self, document_id: str):
+    def extend(self, other: 'TermInfo', docno_shift: int):
+        """
+        Appends all postings of another posting list, its docnos must be higher than the docnos of this one
+        after the shift
+        :param other: the other posting list
+        :param docno_shift: number added to the docnos of the other posting list
+        :return: None
+        """
+        self._ensure_writable()
+        docnos, term_frequencies = other.decode()
+        self._docnos.extend(docno + docno_shift for docno in docnos)
+        self._term_frequencies.extend(term_frequencies)
+        self.collection_frequency += other.collection_frequency
+        if self.has_positions:
+            base, end = other.position_offsets[0], other.position_offsets[-1]
+            shift = len(self.positions) - base
+            self.position_offsets.extend(offset + shift for offset in other.position_offsets[1:])
+            self.positions += other.positions[base:end]
+
+    def remove_document(self, docno: int):
         """
         Removes document from the specified term
-        :param document_id: id of the document
+        :param docno: document number of the document
         :return:
         """
-        if document_id not in self.documents:
+        position = self.find(docno)
+        if position == -1:
             return  # nothing to do
 
-        # Remove the document
-        document_info = self.documents[document_id]
-        self.collection_frequency -= document_info.term_frequency
-        self.document_frequency -= 1
-        del self.documents[document_id]
+        self._ensure_writable()
+        self.collection_frequency -= self._term_frequencies[position]
+        del self._docnos[position]
+        del self._term_frequencies[position]
+        if self.has_positions:
+            self._splice_positions(position, 1, None)
+
+    def _splice_positions(self, index: int, n_removed: int, positions: Optional[bytes]):
+        """
+        Replaces encoded positions of n_removed postings starting at index by positions of one posting
+        :param index: index of the first posting
+        :param n_removed: number of postings whose positions are removed (0 or 1)
+        :param positions: encoded positions of the new posting, None if no posting is inserted
+        :return: None
+        """
+        start, end = self.position_offsets[index], self.position_offsets[index + n_removed]
+        inserted = positions if positions is not None else b''
+        self.positions[start:end] = inserted
+        shift = len(inserted) - (end - start)
+        offsets = self.position_offsets[:index + 1]
+        if positions is not None:
+            offsets.append(start + len(inserted))
+        offsets.extend(offset + shift for offset in self.position_offsets[index + n_removed + 1:])
+        self.position_offsets = offsets
+
+    def _ensure_writable(self):
+        """
+        Copies compressed postings or postings loaded from a memory mapped segment to in-memory arrays so they can
+        be modified
+        :return: None
+        """
+        if self._blocks is not None:
+            self._docnos, self._term_frequencies = self.decode()
+            self._blocks = None
+        elif not isinstance(self._docnos, array):
+            self._docnos = array('i', self._docnos)
+            self._term_frequencies = array('i', self._term_frequencies)
+        if self.has_positions and not isinstance(self.position_offsets, array):
+            # Offsets of mapped postings index into the positions of the whole segment file
+            base, end = self.position_offsets[0], self.position_offsets[-1]
+            self.positions = bytearray(self.positions[base:end])
+            self.position_offsets = array('Q', (offset - base for offset in self.position_offsets))
+
+    def compress(self, blocks: PostingBlocks, document_lengths: Sequence[int]):
+        """
+        Encodes the postings to the blocks, the postings are then read from the blocks
+        :param blocks: blocks of the segment
+        :param document_lengths: lengths of the documents of the segment indexed by docno
+        :return: None
+        """
+        self._first_block = self.write_blocks(blocks, document_lengths)
+        self._length = self.document_frequency
+        self._blocks = blocks
+        self._docnos = self._term_frequencies = None
+
+    def write_blocks(self, blocks: PostingBlocks, document_lengths: Sequence[int]) -> int:
+        """
+        Appends the postings to the blocks, compressed postings are copied without decoding
+        :param blocks: the blocks
+        :param document_lengths: lengths of the documents of the segment indexed by docno
+        :return: number of the first block of the postings
+        """
+        if self._blocks is None:
+            return blocks.append(self._docnos, self._term_frequencies, document_lengths)
+        n_blocks = (self._length + POSTING_BLOCK_SIZE - 1) // POSTING_BLOCK_SIZE
+        return blocks.copy_blocks(self._blocks, self._first_block, n_blocks)
+
+    def block_maxima(self) -> Optional[Tuple[Sequence[int], Sequence[int], Sequence[int]]]:
+        """
+        Returns statistics of the blocks of compressed postings stored in the segment
+        :return: tuple (last docno, maximum term frequency, minimum document length) of sequences with an item
+        for each block, None if the postings are not compressed
+        """
+        if self._blocks is None:
+            return None
+        start = self._first_block
+        end = start + (self._length + POSTING_BLOCK_SIZE - 1) // POSTING_BLOCK_SIZE
+        return (self._blocks.block_lasts[start:end], self._blocks.block_max_tfs[start:end],
+                self._blocks.block_min_lengths[start:end])
+
+    def decode(self) -> Tuple[array, array]:
+        """
+        Returns docnos and term frequencies without caching decoded compressed postings, used when every posting
+        list is read once (e.g. by merging)
+        :return: tuple of docnos and term frequencies
+        """
+        if self._blocks is None:
+            return self._docnos, self._term_frequencies
+        return self._blocks.decode(self._first_block, self._length)
+
+    def _decoded(self) -> Tuple[array, array]:
+        """
+        Returns decoded compressed postings from the shared cache
+        :return: tuple of docnos and term frequencies
+        """
+        if self._length == 0:
+            return array('i'), array('i')
+        return decoded_postings_cache.get_or_compute((self._blocks.cache_id, self._first_block, self._length),
+                                                     lambda: self._blocks.decode(self._first_block, self._length))
+
+    def decode_block(self, block: int) -> Tuple[Sequence[int], Sequence[int]]:
+        """
+        Returns postings of one block of POSTING_BLOCK_SIZE postings, compressed postings decode only the block
+        :param block: number of the block in the posting list
+        :return: tuple of docnos and term frequencies of the block
+        """
+        if self._blocks is not None:
+            return self._blocks.decode_block(self._first_block, self._length, self._first_block + block)
+        start, end = block * POSTING_BLOCK_SIZE, (block + 1) * POSTING_BLOCK_SIZE
+        return self._docnos[start:end], self._term_frequencies[start:end]
+
+    def find(self, docno: int) -> int:
+        """
+        Finds posting of the document, compressed postings decode only the block that may contain it
+        :param docno: document number of the document
+        :return: index of the posting or -1 if the document does not contain the term
+        """
+        if self._blocks is not None:
+            return self._blocks.find(self._first_block, self._length, docno)
+        position = bisect_left(self._docnos, docno)
+        return position if position < len(self._docnos) and self._docnos[position] == docno else -1
+
+    def encoded_positions(self, index: int) -> bytes:
+        """
+        Returns encoded positions of the posting at given index
+        :param index: index of the posting
+        :return: positions encoded by encode_deltas()
+        """
+        return bytes(self.positions[self.position_offsets[index]:self.position_offsets[index + 1]])
+
+    def positions_at(self, index: int) -> List[int]:
+        """
+        Returns positions of the term in the document of the posting at given index
+        :param index: index of the posting
+        :return: ascending positions
+        """
+        return decode_deltas(self.positions[self.position_offsets[index]:self.position_offsets[index + 1]])
+
+    def postings(self):
+        """
+        Returns iterator over (docno, term frequency) pairs
+        :return: iterator of tuples
+        """
+        return zip(self.docnos, self.term_frequencies)
 
     def is_empty(self):
         """
         Checks whether this object has references to any documents
         :return: True if there are no references, False otherwise
         """
-        return len(self.documents) == 0
+        return self.document_frequency == 0
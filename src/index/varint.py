@@ -0,0 +1,62 @@
+from itertools import accumulate
+from typing import Iterable, List
+
+
+def encode_varints(values: Iterable[int]) -> bytes:
+    """
+    Encodes non-negative integers as variable length integers - 7 bits per byte starting from the lowest bits,
+    the highest bit of a byte is set if more bytes of the value follow
+    :param values: non-negative integers
+    :return: encoded bytes
+    """
+    data = bytearray()
+    for value in values:
+        while value >= 0x80:
+            data.append(value & 0x7f | 0x80)
+            value >>= 7
+        data.append(value)
+    return bytes(data)
+
+
+def decode_varints(data) -> List[int]:
+    """
+    Decodes integers encoded by encode_varints()
+    :param data: bytes-like object with the encoded integers
+    :return: list of integers
+    """
+    data = bytes(data)
+    if len(data) == 0 or max(data) < 0x80:
+        return list(data)  # every value fits in a single byte
+
+    values, value, shift = [], 0, 0
+    for byte in data:
+        value |= (byte & 0x7f) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value, shift = 0, 0
+    return values
+
+
+def encode_deltas(values: Iterable[int]) -> bytes:
+    """
+    Encodes ascending non-negative integers as varints of the differences between consecutive values
+    :param values: ascending integers
+    :return: encoded bytes
+    """
+    previous = 0
+    deltas = []
+    for value in values:
+        deltas.append(value - previous)
+        previous = value
+    return encode_varints(deltas)
+
+
+def decode_deltas(data) -> List[int]:
+    """
+    Decodes integers encoded by encode_deltas()
+    :param data: bytes-like object with the encoded integers
+    :return: list of ascending integers
+    """
+    return list(accumulate(decode_varints(data)))
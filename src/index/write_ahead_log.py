@@ -0,0 +1,215 @@
+import json
+import logging
+import os
+import struct
+import threading
+import zlib
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Write-ahead log format
+# ----------------------
+# The log starts with a header (magic + format version) followed by records. Each record is framed as
+#   payload length (u32) | crc32 of the payload (u32) | utf-8 json payload
+# A record that is cut short or fails the checksum marks the end of the log - this happens when the process
+# crashes in the middle of a write, such record was never acknowledged so it is safe to drop it.
+WAL_MAGIC = b'IRSPWAL\x00'
+WAL_FORMAT_VERSION = 1
+
+_HEADER = struct.Struct('<8sI')
+_RECORD_HEADER = struct.Struct('<II')
+
+
+class WriteAheadLog:
+    """
+    Append-only log of index operations. Records are appended to the file buffer immediately and made durable
+    via sync(). Concurrent writers waiting for sync() share a single fsync (group commit)
+    """
+
+    def __init__(self, path: str):
+        """
+        Opens the log for appending, creates it if it does not exist. Any torn record at the end is truncated
+        :param path: path to the log file
+        """
+        self.path = path
+        if os.path.exists(path):
+            _, valid_length = self._read(path)
+            if valid_length != os.path.getsize(path):
+                logger.warning(f'Truncating torn record at the end of write-ahead log {path}')
+                with open(path, 'r+b') as f:
+                    f.truncate(valid_length)
+
+        self._file = open(path, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(_HEADER.pack(WAL_MAGIC, WAL_FORMAT_VERSION))
+            self._file.flush()
+
+        self._write_lock = threading.Lock()  # serializes writes to the file
+        self._sync_condition = threading.Condition()  # guards the sync state below
+        # Log sequence numbers are monotonic counters of appended bytes, they are not reset when the log is truncated
+        self._written_lsn = 0
+        self._synced_lsn = 0
+        self._syncing = False
+        # Records appended after log sequence number _base_lsn start at offset _base_offset of the file
+        self._base_lsn = 0
+        self._base_offset = self._file.tell()
+
+    @staticmethod
+    def _read(path: str):
+        """
+        Reads all valid records from the log
+        :param path: path to the log file
+        :return: tuple of list of records and length of the valid part of the file in bytes
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        if len(data) < _HEADER.size:
+            return [], 0  # the header itself was not written completely
+        magic, version = _HEADER.unpack_from(data, 0)
+        if magic != WAL_MAGIC:
+            raise ValueError(f'File {path} is not a valid write-ahead log')
+        if version != WAL_FORMAT_VERSION:
+            raise ValueError(f'Unsupported write-ahead log format version {version} in file {path}')
+
+        records, position = [], _HEADER.size
+        while position + _RECORD_HEADER.size <= len(data):
+            length, checksum = _RECORD_HEADER.unpack_from(data, position)
+            payload = data[position + _RECORD_HEADER.size:position + _RECORD_HEADER.size + length]
+            if len(payload) != length or zlib.crc32(payload) != checksum:
+                break
+            records.append(json.loads(payload.decode('utf-8')))
+            position += _RECORD_HEADER.size + length
+        return records, position
+
+    @staticmethod
+    def read_records(path: str) -> List[dict]:
+        """
+        Reads all valid records from the log
+        :param path: path to the log file
+        :return: list of records in the order they were appended
+        """
+        return WriteAheadLog._read(path)[0]
+
+    @staticmethod
+    def _encode(record: dict) -> bytes:
+        """
+        Encodes record with its frame
+        :param record: json serializable dictionary
+        :return: bytes of the framed record
+        """
+        payload = json.dumps(record, ensure_ascii=False).encode('utf-8')
+        return _RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+    def append(self, record: dict) -> int:
+        """
+        Appends record to the log. The record is not durable until sync() is called with the returned value
+        :param record: json serializable dictionary
+        :return: log sequence number of the record
+        """
+        data = self._encode(record)
+        with self._write_lock:
+            self._file.write(data)
+            self._written_lsn += len(data)
+            return self._written_lsn
+
+    @property
+    def written_lsn(self) -> int:
+        """
+        Log sequence number of the last appended record
+        :return: int
+        """
+        return self._written_lsn
+
+    def sync(self, lsn: int):
+        """
+        Blocks until all records up to the log sequence number are durable. Only one thread calls fsync at a time,
+        all threads that appended their records before the fsync started are committed by it
+        :param lsn: log sequence number returned by append()
+        :return: None
+        """
+        with self._sync_condition:
+            while self._synced_lsn < lsn:
+                if self._syncing:
+                    # Some other thread is already syncing, wait for it and check whether it covered our record
+                    self._sync_condition.wait()
+                    continue
+
+                self._syncing = True
+                self._sync_condition.release()
+                try:
+                    with self._write_lock:
+                        self._file.flush()
+                        target_lsn = self._written_lsn
+                    os.fsync(self._file.fileno())
+                finally:
+                    self._sync_condition.acquire()
+                    self._syncing = False
+                    self._sync_condition.notify_all()
+                self._synced_lsn = max(self._synced_lsn, target_lsn)
+
+    def reset(self, records: List[dict] = None):
+        """
+        Truncates the log and writes given records to it
+        :param records: records the new log starts with
+        :return: None
+        """
+        self.truncate(None, records)
+
+    def truncate(self, lsn: Optional[int], records: List[dict] = None):
+        """
+        Removes records up to the log sequence number and writes given records before the remaining ones. This is
+        used after a checkpoint when the removed operations are already durable in the segment file, records appended
+        while the checkpoint was written are kept. The new log is written to a temporary file and atomically moved
+        to the path, so a crash leaves either the old or the new log
+        :param lsn: log sequence number of the last removed record, None removes all records
+        :param records: records the new log starts with
+        :return: None
+        """
+        # Syncing threads use the file outside the write lock, so they must finish before the file is replaced
+        with self._sync_condition:
+            while self._syncing:
+                self._sync_condition.wait()
+            self._syncing = True
+
+        synced_lsn = 0
+        try:
+            with self._write_lock:
+                lsn = self._written_lsn if lsn is None else lsn
+                self._file.flush()
+                with open(self.path, 'rb') as f:
+                    f.seek(self._base_offset + lsn - self._base_lsn)
+                    remaining = f.read()
+
+                tmp_path = self.path + '.tmp'
+                with open(tmp_path, 'wb') as f:
+                    f.write(_HEADER.pack(WAL_MAGIC, WAL_FORMAT_VERSION))
+                    for record in records or []:
+                        f.write(self._encode(record))
+                    base_offset = f.tell()
+                    f.write(remaining)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+
+                self._file.close()
+                self._file = open(self.path, 'ab')
+                self._base_lsn, self._base_offset = lsn, base_offset
+                # The remaining records were written to the new file together with the removed ones
+                synced_lsn = self._written_lsn
+        finally:
+            with self._sync_condition:
+                self._syncing = False
+                self._synced_lsn = max(self._synced_lsn, synced_lsn)
+                self._sync_condition.notify_all()
+
+    def close(self):
+        """
+        Flushes and closes the log file
+        :return: None
+        """
+        with self._write_lock:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
@@ -1,4 +1,6 @@
+import re
 from enum import Enum
+from typing import List, Optional, Tuple, Union
 
 from antlr4 import CommonTokenStream, InputStream
 from antlr4.error.ErrorListener import ErrorListener
@@ -15,17 +17,21 @@ class BooleanOperator(Enum):
     AND = 0,
     OR = 1,
     NOT = 2,
+    PHRASE = 3,
+    NEAR = 4,
 
 
 class QueryItem:
     """
     Tree-like structure which holds operator and items its being applied to.
-    Items can either be strings or other QueryItems.
+    Items can either be strings or other QueryItems. Items of a phrase are its terms in order and items of NEAR
+    are two terms or phrases
     """
 
-    def __init__(self, items, operator: BooleanOperator):
+    def __init__(self, items, operator: BooleanOperator, distance: int = None):
         self.items = items
         self.operator = operator
+        self.distance = distance  # maximum number of tokens between the items of NEAR, 0 means adjacent
 
     def __str__(self):
         """
@@ -124,10 +130,171 @@ class BooleanQueryVisitor(BooleanGrammarVisitor):
     def visitParenthesis(self, ctx: BooleanGrammarParser.ParenthesisContext):
         return self.visit(ctx.expression())
 
+    def visitPhraseQuery(self, ctx: BooleanGrammarParser.PhraseQueryContext):
+        return self.visit(ctx.phrase())
 
-def parse_boolean_query(query: str):
+    def visitNear(self, ctx: BooleanGrammarParser.NearContext):
+        distance = int(str(ctx.NEAR())[len('NEAR/'):])
+        return QueryItem([self.visit(ctx.proximityOperand(0)), self.visit(ctx.proximityOperand(1))],
+                         BooleanOperator.NEAR, distance)
+
+    def visitProximityOperand(self, ctx: BooleanGrammarParser.ProximityOperandContext):
+        return self.visit(ctx.phrase()) if ctx.phrase() else str(ctx.QUERY_TERM())
+
+    def visitPhrase(self, ctx: BooleanGrammarParser.PhraseContext):
+        # Terms of the phrase are kept in order, they are not combined by AND like a term chain
+        terms, chain = [], ctx.termChain()
+        while chain is not None:
+            terms.append(str(chain.QUERY_TERM()))
+            chain = chain.termChain()
+        return QueryItem(terms, BooleanOperator.PHRASE)
+
+
+# Tokens of the lexer in resources/anltr/BooleanGrammar.g4, keywords are matched as terms and recognized by their text
+_token_pattern = re.compile(r"(?P<WHITESPACE>[\r\t ]+)|(?P<LPAR>\()|(?P<RPAR>\))|(?P<QUOTE>\")|(?P<NEAR>NEAR/[0-9]+)"
+                            r"|(?P<QUERY_TERM>[,!?':.A-Za-z0-9\u0080-\uFFFF+-]+)")
+_keywords = {'AND', 'OR', 'NOT'}
+
+
+class RecursiveDescentParser:
+    """
+    Hand-written parser of the BooleanGrammar.g4 language, it produces the same QueryItem trees as the ANTLR parser
+    with BooleanQueryVisitor. It only accepts queries that it consumes completely without any error,
+    every other query is left to the ANTLR parser which reports the errors
     """
-    Parse a boolean query and return a QueryItem object
+
+    def __init__(self, query: str):
+        """
+        Initializes the parser
+        :param query: a boolean query
+        """
+        self.tokens = self._tokenize(query)
+        self.position = 0
+
+    @staticmethod
+    def _tokenize(query: str) -> Optional[List[Tuple[str, str]]]:
+        """
+        Splits the query to tokens
+        :param query: a boolean query
+        :return: list of (token type, text) or None if the query contains a character the lexer does not recognize
+        """
+        tokens, position = [], 0
+        while position < len(query):
+            match = _token_pattern.match(query, position)
+            if match is None:
+                return None
+            token_type, text = match.lastgroup, match.group()
+            tokens.append((text if token_type == 'QUERY_TERM' and text in _keywords else token_type, text))
+            position = match.end()
+        return tokens
+
+    def parse(self) -> Optional[Union[QueryItem, str]]:
+        """
+        Parses the query
+        :return: QueryItem or a string, None if the query must be parsed by the ANTLR parser
+        """
+        if self.tokens is None or len(self.tokens) == 0:
+            return None
+        expression = self._or()
+        return expression if expression is not None and self.position == len(self.tokens) else None
+
+    def _type(self, offset: int = 0) -> Optional[str]:
+        position = self.position + offset
+        return self.tokens[position][0] if position < len(self.tokens) else None
+
+    def _binary_operator(self, operator: str) -> bool:
+        """
+        Consumes the operator surrounded by whitespaces if it is the next token
+        :param operator: AND, OR or NEAR
+        :return: True if the operator was consumed
+        """
+        if self._type() == 'WHITESPACE' and self._type(1) == operator and self._type(2) == 'WHITESPACE':
+            self.position += 3
+            return True
+        return False
+
+    def _or(self) -> Optional[Union[QueryItem, str]]:
+        # OR has the lowest precedence and like AND it is left associative
+        left = self._and()
+        while left is not None and self._binary_operator('OR'):
+            right = self._and()
+            left = QueryItem([left, right], BooleanOperator.OR) if right is not None else None
+        return left
+
+    def _and(self) -> Optional[Union[QueryItem, str]]:
+        left = self._unary()
+        while left is not None and self._binary_operator('AND'):
+            right = self._unary()
+            left = QueryItem([left, right], BooleanOperator.AND) if right is not None else None
+        return left
+
+    def _unary(self) -> Optional[Union[QueryItem, str]]:
+        token_type = self._type()
+        if token_type == 'NOT':
+            if self._type(1) != 'WHITESPACE':
+                return None
+            self.position += 2
+            operand = self._unary()
+            return QueryItem([operand], BooleanOperator.NOT) if operand is not None else None
+
+        if token_type == 'LPAR':
+            self.position += 1
+            expression = self._or()
+            if expression is None or self._type() != 'RPAR':
+                return None
+            self.position += 1
+            return expression
+
+        if token_type in ('QUERY_TERM', 'QUOTE'):
+            # NEAR binds tighter than AND and OR, its operands are single terms or phrases
+            start = self.position
+            left = self._proximity_operand()
+            if left is not None and self._binary_operator('NEAR'):
+                distance = int(self.tokens[self.position - 2][1][len('NEAR/'):])
+                right = self._proximity_operand()
+                return QueryItem([left, right], BooleanOperator.NEAR, distance) if right is not None else None
+            if token_type == 'QUOTE':
+                return left
+            self.position = start
+            return self._term_chain()
+        return None
+
+    def _proximity_operand(self) -> Optional[Union[QueryItem, str]]:
+        if self._type() == 'QUOTE':
+            self.position += 1
+            if self._type() != 'QUERY_TERM':
+                return None
+            terms = self._terms()
+            if self._type() != 'QUOTE':
+                return None
+            self.position += 1
+            return QueryItem(terms, BooleanOperator.PHRASE)
+
+        if self._type() == 'QUERY_TERM':
+            self.position += 1
+            return self.tokens[self.position - 1][1]
+        return None
+
+    def _terms(self) -> List[str]:
+        terms = [self.tokens[self.position][1]]
+        self.position += 1
+        while self._type() == 'WHITESPACE' and self._type(1) == 'QUERY_TERM':
+            terms.append(self.tokens[self.position + 1][1])
+            self.position += 2
+        return terms
+
+    def _term_chain(self) -> Union[QueryItem, str]:
+        terms = self._terms()
+        if len(terms) == 1:
+            return terms[0]
+
+        # BooleanQueryVisitor builds the chain from its end - the last two terms followed by the rest in reverse
+        return QueryItem([terms[-2], terms[-1]] + terms[-3::-1], BooleanOperator.AND)
+
+
+def _parse_with_antlr(query: str):
+    """
+    Parse a boolean query using the ANTLR parser
     :param query: a boolean query - string
     :return: a QueryItem object
     """
@@ -139,3 +306,14 @@ def parse_boolean_query(query: str):
     parser.addErrorListener(BooleanErrorListener())
     tree = parser.start()
     return BooleanQueryVisitor().visit(tree)
+
+
+def parse_boolean_query(query: str):
+    """
+    Parse a boolean query and return a QueryItem object. Queries are parsed by the recursive descent parser,
+    the ANTLR parser is used only for the queries it does not accept
+    :param query: a boolean query - string
+    :return: a QueryItem object
+    """
+    parsed_query = RecursiveDescentParser(query).parse()
+    return parsed_query if parsed_query is not None else _parse_with_antlr(query)
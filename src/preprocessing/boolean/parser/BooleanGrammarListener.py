@@ -1,6 +1,6 @@
-# Generated from C:/dev/ir/irsp/resources/anltr\BooleanGrammar.g4 by ANTLR 4.10.1
+# Generated from BooleanGrammar.g4 by ANTLR 4.13.2
 from antlr4 import *
-if __name__ is not None and "." in __name__:
+if "." in __name__:
     from .BooleanGrammarParser import BooleanGrammarParser
 else:
     from BooleanGrammarParser import BooleanGrammarParser
@@ -26,6 +26,24 @@ class BooleanGrammarListener(ParseTreeListener):
         pass
 
 
+    # Enter a parse tree produced by BooleanGrammarParser#phrase.
+    def enterPhrase(self, ctx:BooleanGrammarParser.PhraseContext):
+        pass
+
+    # Exit a parse tree produced by BooleanGrammarParser#phrase.
+    def exitPhrase(self, ctx:BooleanGrammarParser.PhraseContext):
+        pass
+
+
+    # Enter a parse tree produced by BooleanGrammarParser#proximityOperand.
+    def enterProximityOperand(self, ctx:BooleanGrammarParser.ProximityOperandContext):
+        pass
+
+    # Exit a parse tree produced by BooleanGrammarParser#proximityOperand.
+    def exitProximityOperand(self, ctx:BooleanGrammarParser.ProximityOperandContext):
+        pass
+
+
     # Enter a parse tree produced by BooleanGrammarParser#not.
     def enterNot(self, ctx:BooleanGrammarParser.NotContext):
         pass
@@ -62,6 +80,15 @@ class BooleanGrammarListener(ParseTreeListener):
         pass
 
 
+    # Enter a parse tree produced by BooleanGrammarParser#near.
+    def enterNear(self, ctx:BooleanGrammarParser.NearContext):
+        pass
+
+    # Exit a parse tree produced by BooleanGrammarParser#near.
+    def exitNear(self, ctx:BooleanGrammarParser.NearContext):
+        pass
+
+
     # Enter a parse tree produced by BooleanGrammarParser#parenthesis.
     def enterParenthesis(self, ctx:BooleanGrammarParser.ParenthesisContext):
         pass
@@ -71,5 +98,14 @@ class BooleanGrammarListener(ParseTreeListener):
         pass
 
 
+    # Enter a parse tree produced by BooleanGrammarParser#phraseQuery.
+    def enterPhraseQuery(self, ctx:BooleanGrammarParser.PhraseQueryContext):
+        pass
+
+    # Exit a parse tree produced by BooleanGrammarParser#phraseQuery.
+    def exitPhraseQuery(self, ctx:BooleanGrammarParser.PhraseQueryContext):
+        pass
+
+
 
 del BooleanGrammarParser
\ No newline at end of file
@@ -1,4 +1,4 @@
-# Generated from C:/dev/ir/irsp/resources/anltr\BooleanGrammar.g4 by ANTLR 4.10.1
+# Generated from BooleanGrammar.g4 by ANTLR 4.13.2
 # encoding: utf-8
 from antlr4 import *
 from io import StringIO
@@ -10,19 +10,25 @@ else:
 
 def serializedATN():
     return [
-        4,1,7,41,2,0,7,0,2,1,7,1,2,2,7,2,1,0,1,0,1,1,1,1,1,1,1,1,3,1,13,
-        8,1,1,2,1,2,1,2,1,2,1,2,1,2,1,2,1,2,1,2,3,2,24,8,2,1,2,1,2,1,2,1,
-        2,1,2,1,2,1,2,1,2,1,2,1,2,5,2,36,8,2,10,2,12,2,39,9,2,1,2,0,1,4,
-        3,0,2,4,0,0,42,0,6,1,0,0,0,2,12,1,0,0,0,4,23,1,0,0,0,6,7,3,4,2,0,
-        7,1,1,0,0,0,8,13,5,7,0,0,9,10,5,7,0,0,10,11,5,6,0,0,11,13,3,2,1,
-        0,12,8,1,0,0,0,12,9,1,0,0,0,13,3,1,0,0,0,14,15,6,2,-1,0,15,16,5,
-        4,0,0,16,17,3,4,2,0,17,18,5,5,0,0,18,24,1,0,0,0,19,20,5,3,0,0,20,
-        21,5,6,0,0,21,24,3,4,2,4,22,24,3,2,1,0,23,14,1,0,0,0,23,19,1,0,0,
-        0,23,22,1,0,0,0,24,37,1,0,0,0,25,26,10,3,0,0,26,27,5,6,0,0,27,28,
-        5,1,0,0,28,29,5,6,0,0,29,36,3,4,2,4,30,31,10,2,0,0,31,32,5,6,0,0,
-        32,33,5,2,0,0,33,34,5,6,0,0,34,36,3,4,2,3,35,25,1,0,0,0,35,30,1,
-        0,0,0,36,39,1,0,0,0,37,35,1,0,0,0,37,38,1,0,0,0,38,5,1,0,0,0,39,
-        37,1,0,0,0,4,12,23,35,37
+        4,1,9,60,2,0,7,0,2,1,7,1,2,2,7,2,2,3,7,3,2,4,7,4,1,0,1,0,1,1,1,1,
+        1,1,1,1,3,1,17,8,1,1,2,1,2,1,2,1,2,1,3,1,3,3,3,25,8,3,1,4,1,4,1,
+        4,1,4,1,4,1,4,1,4,1,4,1,4,1,4,1,4,1,4,1,4,1,4,1,4,1,4,3,4,43,8,4,
+        1,4,1,4,1,4,1,4,1,4,1,4,1,4,1,4,1,4,1,4,5,4,55,8,4,10,4,12,4,58,
+        9,4,1,4,0,1,8,5,0,2,4,6,8,0,0,62,0,10,1,0,0,0,2,16,1,0,0,0,4,18,
+        1,0,0,0,6,24,1,0,0,0,8,42,1,0,0,0,10,11,3,8,4,0,11,1,1,0,0,0,12,
+        17,5,9,0,0,13,14,5,9,0,0,14,15,5,8,0,0,15,17,3,2,1,0,16,12,1,0,0,
+        0,16,13,1,0,0,0,17,3,1,0,0,0,18,19,5,6,0,0,19,20,3,2,1,0,20,21,5,
+        6,0,0,21,5,1,0,0,0,22,25,5,9,0,0,23,25,3,4,2,0,24,22,1,0,0,0,24,
+        23,1,0,0,0,25,7,1,0,0,0,26,27,6,4,-1,0,27,28,5,4,0,0,28,29,3,8,4,
+        0,29,30,5,5,0,0,30,43,1,0,0,0,31,32,5,3,0,0,32,33,5,8,0,0,33,43,
+        3,8,4,6,34,35,3,6,3,0,35,36,5,8,0,0,36,37,5,7,0,0,37,38,5,8,0,0,
+        38,39,3,6,3,0,39,43,1,0,0,0,40,43,3,4,2,0,41,43,3,2,1,0,42,26,1,
+        0,0,0,42,31,1,0,0,0,42,34,1,0,0,0,42,40,1,0,0,0,42,41,1,0,0,0,43,
+        56,1,0,0,0,44,45,10,4,0,0,45,46,5,8,0,0,46,47,5,1,0,0,47,48,5,8,
+        0,0,48,55,3,8,4,5,49,50,10,3,0,0,50,51,5,8,0,0,51,52,5,2,0,0,52,
+        53,5,8,0,0,53,55,3,8,4,4,54,44,1,0,0,0,54,49,1,0,0,0,55,58,1,0,0,
+        0,56,54,1,0,0,0,56,57,1,0,0,0,57,9,1,0,0,0,58,56,1,0,0,0,5,16,24,
+        42,54,56
     ]
 
 class BooleanGrammarParser ( Parser ):
@@ -35,16 +41,19 @@ class BooleanGrammarParser ( Parser ):
 
     sharedContextCache = PredictionContextCache()
 
-    literalNames = [ "<INVALID>", "'AND'", "'OR'", "'NOT'", "'('", "')'" ]
+    literalNames = [ "<INVALID>", "'AND'", "'OR'", "'NOT'", "'('", "')'", 
+                     "'\"'" ]
 
-    symbolicNames = [ "<INVALID>", "AND", "OR", "NOT", "LPAR", "RPAR", "WHITESPACE", 
-                      "QUERY_TERM" ]
+    symbolicNames = [ "<INVALID>", "AND", "OR", "NOT", "LPAR", "RPAR", "QUOTE", 
+                      "NEAR", "WHITESPACE", "QUERY_TERM" ]
 
     RULE_start = 0
     RULE_termChain = 1
-    RULE_expression = 2
+    RULE_phrase = 2
+    RULE_proximityOperand = 3
+    RULE_expression = 4
 
-    ruleNames =  [ "start", "termChain", "expression" ]
+    ruleNames =  [ "start", "termChain", "phrase", "proximityOperand", "expression" ]
 
     EOF = Token.EOF
     AND=1
@@ -52,12 +61,14 @@ class BooleanGrammarParser ( Parser ):
     NOT=3
     LPAR=4
     RPAR=5
-    WHITESPACE=6
-    QUERY_TERM=7
+    QUOTE=6
+    NEAR=7
+    WHITESPACE=8
+    QUERY_TERM=9
 
     def __init__(self, input:TokenStream, output:TextIO = sys.stdout):
         super().__init__(input, output)
-        self.checkVersion("4.10.1")
+        self.checkVersion("4.13.2")
         self._interp = ParserATNSimulator(self, self.atn, self.decisionsToDFA, self.sharedContextCache)
         self._predicates = None
 
@@ -101,7 +112,7 @@ class BooleanGrammarParser ( Parser ):
         self.enterRule(localctx, 0, self.RULE_start)
         try:
             self.enterOuterAlt(localctx, 1)
-            self.state = 6
+            self.state = 10
             self.expression(0)
         except RecognitionException as re:
             localctx.exception = re
@@ -154,22 +165,22 @@ class BooleanGrammarParser ( Parser ):
         localctx = BooleanGrammarParser.TermChainContext(self, self._ctx, self.state)
         self.enterRule(localctx, 2, self.RULE_termChain)
         try:
-            self.state = 12
+            self.state = 16
             self._errHandler.sync(self)
             la_ = self._interp.adaptivePredict(self._input,0,self._ctx)
             if la_ == 1:
                 self.enterOuterAlt(localctx, 1)
-                self.state = 8
+                self.state = 12
                 self.match(BooleanGrammarParser.QUERY_TERM)
                 pass
 
             elif la_ == 2:
                 self.enterOuterAlt(localctx, 2)
-                self.state = 9
+                self.state = 13
                 self.match(BooleanGrammarParser.QUERY_TERM)
-                self.state = 10
+                self.state = 14
                 self.match(BooleanGrammarParser.WHITESPACE)
-                self.state = 11
+                self.state = 15
                 self.termChain()
                 pass
 
@@ -183,6 +194,128 @@ class BooleanGrammarParser ( Parser ):
         return localctx
 
 
+    class PhraseContext(ParserRuleContext):
+        __slots__ = 'parser'
+
+        def __init__(self, parser, parent:ParserRuleContext=None, invokingState:int=-1):
+            super().__init__(parent, invokingState)
+            self.parser = parser
+
+        def QUOTE(self, i:int=None):
+            if i is None:
+                return self.getTokens(BooleanGrammarParser.QUOTE)
+            else:
+                return self.getToken(BooleanGrammarParser.QUOTE, i)
+
+        def termChain(self):
+            return self.getTypedRuleContext(BooleanGrammarParser.TermChainContext,0)
+
+
+        def getRuleIndex(self):
+            return BooleanGrammarParser.RULE_phrase
+
+        def enterRule(self, listener:ParseTreeListener):
+            if hasattr( listener, "enterPhrase" ):
+                listener.enterPhrase(self)
+
+        def exitRule(self, listener:ParseTreeListener):
+            if hasattr( listener, "exitPhrase" ):
+                listener.exitPhrase(self)
+
+        def accept(self, visitor:ParseTreeVisitor):
+            if hasattr( visitor, "visitPhrase" ):
+                return visitor.visitPhrase(self)
+            else:
+                return visitor.visitChildren(self)
+
+
+
+
+    def phrase(self):
+
+        localctx = BooleanGrammarParser.PhraseContext(self, self._ctx, self.state)
+        self.enterRule(localctx, 4, self.RULE_phrase)
+        try:
+            self.enterOuterAlt(localctx, 1)
+            self.state = 18
+            self.match(BooleanGrammarParser.QUOTE)
+            self.state = 19
+            self.termChain()
+            self.state = 20
+            self.match(BooleanGrammarParser.QUOTE)
+        except RecognitionException as re:
+            localctx.exception = re
+            self._errHandler.reportError(self, re)
+            self._errHandler.recover(self, re)
+        finally:
+            self.exitRule()
+        return localctx
+
+
+    class ProximityOperandContext(ParserRuleContext):
+        __slots__ = 'parser'
+
+        def __init__(self, parser, parent:ParserRuleContext=None, invokingState:int=-1):
+            super().__init__(parent, invokingState)
+            self.parser = parser
+
+        def QUERY_TERM(self):
+            return self.getToken(BooleanGrammarParser.QUERY_TERM, 0)
+
+        def phrase(self):
+            return self.getTypedRuleContext(BooleanGrammarParser.PhraseContext,0)
+
+
+        def getRuleIndex(self):
+            return BooleanGrammarParser.RULE_proximityOperand
+
+        def enterRule(self, listener:ParseTreeListener):
+            if hasattr( listener, "enterProximityOperand" ):
+                listener.enterProximityOperand(self)
+
+        def exitRule(self, listener:ParseTreeListener):
+            if hasattr( listener, "exitProximityOperand" ):
+                listener.exitProximityOperand(self)
+
+        def accept(self, visitor:ParseTreeVisitor):
+            if hasattr( visitor, "visitProximityOperand" ):
+                return visitor.visitProximityOperand(self)
+            else:
+                return visitor.visitChildren(self)
+
+
+
+
+    def proximityOperand(self):
+
+        localctx = BooleanGrammarParser.ProximityOperandContext(self, self._ctx, self.state)
+        self.enterRule(localctx, 6, self.RULE_proximityOperand)
+        try:
+            self.state = 24
+            self._errHandler.sync(self)
+            token = self._input.LA(1)
+            if token in [9]:
+                self.enterOuterAlt(localctx, 1)
+                self.state = 22
+                self.match(BooleanGrammarParser.QUERY_TERM)
+                pass
+            elif token in [6]:
+                self.enterOuterAlt(localctx, 2)
+                self.state = 23
+                self.phrase()
+                pass
+            else:
+                raise NoViableAltException(self)
+
+        except RecognitionException as re:
+            localctx.exception = re
+            self._errHandler.reportError(self, re)
+            self._errHandler.recover(self, re)
+        finally:
+            self.exitRule()
+        return localctx
+
+
     class ExpressionContext(ParserRuleContext):
         __slots__ = 'parser'
 
@@ -323,6 +456,41 @@ class BooleanGrammarParser ( Parser ):
                 return visitor.visitChildren(self)
 
 
+    class NearContext(ExpressionContext):
+
+        def __init__(self, parser, ctx:ParserRuleContext): # actually a BooleanGrammarParser.ExpressionContext
+            super().__init__(parser)
+            self.copyFrom(ctx)
+
+        def proximityOperand(self, i:int=None):
+            if i is None:
+                return self.getTypedRuleContexts(BooleanGrammarParser.ProximityOperandContext)
+            else:
+                return self.getTypedRuleContext(BooleanGrammarParser.ProximityOperandContext,i)
+
+        def WHITESPACE(self, i:int=None):
+            if i is None:
+                return self.getTokens(BooleanGrammarParser.WHITESPACE)
+            else:
+                return self.getToken(BooleanGrammarParser.WHITESPACE, i)
+        def NEAR(self):
+            return self.getToken(BooleanGrammarParser.NEAR, 0)
+
+        def enterRule(self, listener:ParseTreeListener):
+            if hasattr( listener, "enterNear" ):
+                listener.enterNear(self)
+
+        def exitRule(self, listener:ParseTreeListener):
+            if hasattr( listener, "exitNear" ):
+                listener.exitNear(self)
+
+        def accept(self, visitor:ParseTreeVisitor):
+            if hasattr( visitor, "visitNear" ):
+                return visitor.visitNear(self)
+            else:
+                return visitor.visitChildren(self)
+
+
     class ParenthesisContext(ExpressionContext):
 
         def __init__(self, parser, ctx:ParserRuleContext): # actually a BooleanGrammarParser.ExpressionContext
@@ -352,102 +520,152 @@ class BooleanGrammarParser ( Parser ):
                 return visitor.visitChildren(self)
 
 
+    class PhraseQueryContext(ExpressionContext):
+
+        def __init__(self, parser, ctx:ParserRuleContext): # actually a BooleanGrammarParser.ExpressionContext
+            super().__init__(parser)
+            self.copyFrom(ctx)
+
+        def phrase(self):
+            return self.getTypedRuleContext(BooleanGrammarParser.PhraseContext,0)
+
+
+        def enterRule(self, listener:ParseTreeListener):
+            if hasattr( listener, "enterPhraseQuery" ):
+                listener.enterPhraseQuery(self)
+
+        def exitRule(self, listener:ParseTreeListener):
+            if hasattr( listener, "exitPhraseQuery" ):
+                listener.exitPhraseQuery(self)
+
+        def accept(self, visitor:ParseTreeVisitor):
+            if hasattr( visitor, "visitPhraseQuery" ):
+                return visitor.visitPhraseQuery(self)
+            else:
+                return visitor.visitChildren(self)
+
+
 
     def expression(self, _p:int=0):
         _parentctx = self._ctx
         _parentState = self.state
         localctx = BooleanGrammarParser.ExpressionContext(self, self._ctx, _parentState)
         _prevctx = localctx
-        _startState = 4
-        self.enterRecursionRule(localctx, 4, self.RULE_expression, _p)
+        _startState = 8
+        self.enterRecursionRule(localctx, 8, self.RULE_expression, _p)
         try:
             self.enterOuterAlt(localctx, 1)
-            self.state = 23
+            self.state = 42
             self._errHandler.sync(self)
-            token = self._input.LA(1)
-            if token in [BooleanGrammarParser.LPAR]:
+            la_ = self._interp.adaptivePredict(self._input,2,self._ctx)
+            if la_ == 1:
                 localctx = BooleanGrammarParser.ParenthesisContext(self, localctx)
                 self._ctx = localctx
                 _prevctx = localctx
 
-                self.state = 15
+                self.state = 27
                 self.match(BooleanGrammarParser.LPAR)
-                self.state = 16
+                self.state = 28
                 self.expression(0)
-                self.state = 17
+                self.state = 29
                 self.match(BooleanGrammarParser.RPAR)
                 pass
-            elif token in [BooleanGrammarParser.NOT]:
+
+            elif la_ == 2:
                 localctx = BooleanGrammarParser.NotContext(self, localctx)
                 self._ctx = localctx
                 _prevctx = localctx
-                self.state = 19
+                self.state = 31
                 self.match(BooleanGrammarParser.NOT)
-                self.state = 20
+                self.state = 32
+                self.match(BooleanGrammarParser.WHITESPACE)
+                self.state = 33
+                self.expression(6)
+                pass
+
+            elif la_ == 3:
+                localctx = BooleanGrammarParser.NearContext(self, localctx)
+                self._ctx = localctx
+                _prevctx = localctx
+                self.state = 34
+                self.proximityOperand()
+                self.state = 35
+                self.match(BooleanGrammarParser.WHITESPACE)
+                self.state = 36
+                self.match(BooleanGrammarParser.NEAR)
+                self.state = 37
                 self.match(BooleanGrammarParser.WHITESPACE)
-                self.state = 21
-                self.expression(4)
+                self.state = 38
+                self.proximityOperand()
+                pass
+
+            elif la_ == 4:
+                localctx = BooleanGrammarParser.PhraseQueryContext(self, localctx)
+                self._ctx = localctx
+                _prevctx = localctx
+                self.state = 40
+                self.phrase()
                 pass
-            elif token in [BooleanGrammarParser.QUERY_TERM]:
+
+            elif la_ == 5:
                 localctx = BooleanGrammarParser.QueryTermContext(self, localctx)
                 self._ctx = localctx
                 _prevctx = localctx
-                self.state = 22
+                self.state = 41
                 self.termChain()
                 pass
-            else:
-                raise NoViableAltException(self)
+
 
             self._ctx.stop = self._input.LT(-1)
-            self.state = 37
+            self.state = 56
             self._errHandler.sync(self)
-            _alt = self._interp.adaptivePredict(self._input,3,self._ctx)
+            _alt = self._interp.adaptivePredict(self._input,4,self._ctx)
             while _alt!=2 and _alt!=ATN.INVALID_ALT_NUMBER:
                 if _alt==1:
                     if self._parseListeners is not None:
                         self.triggerExitRuleEvent()
                     _prevctx = localctx
-                    self.state = 35
+                    self.state = 54
                     self._errHandler.sync(self)
-                    la_ = self._interp.adaptivePredict(self._input,2,self._ctx)
+                    la_ = self._interp.adaptivePredict(self._input,3,self._ctx)
                     if la_ == 1:
                         localctx = BooleanGrammarParser.AndContext(self, BooleanGrammarParser.ExpressionContext(self, _parentctx, _parentState))
                         self.pushNewRecursionContext(localctx, _startState, self.RULE_expression)
-                        self.state = 25
-                        if not self.precpred(self._ctx, 3):
+                        self.state = 44
+                        if not self.precpred(self._ctx, 4):
                             from antlr4.error.Errors import FailedPredicateException
-                            raise FailedPredicateException(self, "self.precpred(self._ctx, 3)")
-                        self.state = 26
+                            raise FailedPredicateException(self, "self.precpred(self._ctx, 4)")
+                        self.state = 45
                         self.match(BooleanGrammarParser.WHITESPACE)
-                        self.state = 27
+                        self.state = 46
                         self.match(BooleanGrammarParser.AND)
-                        self.state = 28
+                        self.state = 47
                         self.match(BooleanGrammarParser.WHITESPACE)
-                        self.state = 29
-                        self.expression(4)
+                        self.state = 48
+                        self.expression(5)
                         pass
 
                     elif la_ == 2:
                         localctx = BooleanGrammarParser.OrContext(self, BooleanGrammarParser.ExpressionContext(self, _parentctx, _parentState))
                         self.pushNewRecursionContext(localctx, _startState, self.RULE_expression)
-                        self.state = 30
-                        if not self.precpred(self._ctx, 2):
+                        self.state = 49
+                        if not self.precpred(self._ctx, 3):
                             from antlr4.error.Errors import FailedPredicateException
-                            raise FailedPredicateException(self, "self.precpred(self._ctx, 2)")
-                        self.state = 31
+                            raise FailedPredicateException(self, "self.precpred(self._ctx, 3)")
+                        self.state = 50
                         self.match(BooleanGrammarParser.WHITESPACE)
-                        self.state = 32
+                        self.state = 51
                         self.match(BooleanGrammarParser.OR)
-                        self.state = 33
+                        self.state = 52
                         self.match(BooleanGrammarParser.WHITESPACE)
-                        self.state = 34
-                        self.expression(3)
+                        self.state = 53
+                        self.expression(4)
                         pass
 
              
-                self.state = 39
+                self.state = 58
                 self._errHandler.sync(self)
-                _alt = self._interp.adaptivePredict(self._input,3,self._ctx)
+                _alt = self._interp.adaptivePredict(self._input,4,self._ctx)
 
         except RecognitionException as re:
             localctx.exception = re
@@ -462,7 +680,7 @@ class BooleanGrammarParser ( Parser ):
     def sempred(self, localctx:RuleContext, ruleIndex:int, predIndex:int):
         if self._predicates == None:
             self._predicates = dict()
-        self._predicates[2] = self.expression_sempred
+        self._predicates[4] = self.expression_sempred
         pred = self._predicates.get(ruleIndex, None)
         if pred is None:
             raise Exception("No predicate with index:" + str(ruleIndex))
@@ -471,11 +689,11 @@ class BooleanGrammarParser ( Parser ):
 
     def expression_sempred(self, localctx:ExpressionContext, predIndex:int):
             if predIndex == 0:
-                return self.precpred(self._ctx, 3)
+                return self.precpred(self._ctx, 4)
          
 
             if predIndex == 1:
-                return self.precpred(self._ctx, 2)
+                return self.precpred(self._ctx, 3)
          
 
 
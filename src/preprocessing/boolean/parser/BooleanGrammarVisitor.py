@@ -1,6 +1,6 @@
-# Generated from C:/dev/ir/irsp/resources/anltr\BooleanGrammar.g4 by ANTLR 4.10.1
+# Generated from BooleanGrammar.g4 by ANTLR 4.13.2
 from antlr4 import *
-if __name__ is not None and "." in __name__:
+if "." in __name__:
     from .BooleanGrammarParser import BooleanGrammarParser
 else:
     from BooleanGrammarParser import BooleanGrammarParser
@@ -19,6 +19,16 @@ class BooleanGrammarVisitor(ParseTreeVisitor):
         return self.visitChildren(ctx)
 
 
+    # Visit a parse tree produced by BooleanGrammarParser#phrase.
+    def visitPhrase(self, ctx:BooleanGrammarParser.PhraseContext):
+        return self.visitChildren(ctx)
+
+
+    # Visit a parse tree produced by BooleanGrammarParser#proximityOperand.
+    def visitProximityOperand(self, ctx:BooleanGrammarParser.ProximityOperandContext):
+        return self.visitChildren(ctx)
+
+
     # Visit a parse tree produced by BooleanGrammarParser#not.
     def visitNot(self, ctx:BooleanGrammarParser.NotContext):
         return self.visitChildren(ctx)
@@ -39,10 +49,20 @@ class BooleanGrammarVisitor(ParseTreeVisitor):
         return self.visitChildren(ctx)
 
 
+    # Visit a parse tree produced by BooleanGrammarParser#near.
+    def visitNear(self, ctx:BooleanGrammarParser.NearContext):
+        return self.visitChildren(ctx)
+
+
     # Visit a parse tree produced by BooleanGrammarParser#parenthesis.
     def visitParenthesis(self, ctx:BooleanGrammarParser.ParenthesisContext):
         return self.visitChildren(ctx)
 
 
+    # Visit a parse tree produced by BooleanGrammarParser#phraseQuery.
+    def visitPhraseQuery(self, ctx:BooleanGrammarParser.PhraseQueryContext):
+        return self.visitChildren(ctx)
+
+
 
 del BooleanGrammarParser
\ No newline at end of file
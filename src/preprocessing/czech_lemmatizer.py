@@ -1,8 +1,27 @@
+import threading
+
 import simplemma
 
 
 class CzechLemmatizer:
-    langdata = simplemma.load_data('cs')
+    """
+    Lemmatizer of czech words. Language data of simplemma are large, so they are loaded on first use and shared
+    by all instances
+    """
+    langdata = None
+    _langdata_lock = threading.Lock()
+
+    @classmethod
+    def _get_langdata(cls):
+        """
+        Returns language data, loads them if they were not loaded yet
+        :return: simplemma language data
+        """
+        if cls.langdata is None:
+            with cls._langdata_lock:
+                if cls.langdata is None:
+                    cls.langdata = simplemma.load_data('cs')
+        return cls.langdata
 
     def lemmatize(self, word):
-        return simplemma.lemmatize(word, self.langdata)
+        return simplemma.lemmatize(word, self._get_langdata())
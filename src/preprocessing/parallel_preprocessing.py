@@ -0,0 +1,135 @@
+import itertools
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Tuple, Dict, Optional
+
+import nltk
+
+from src.index.document import Document
+from src.preprocessing.preprocessing import Preprocessor, PreprocessorConfig
+
+logger = logging.getLogger(__name__)
+
+# Result of preprocessing of a single text - tuple of bag of words with integer term frequencies, number of tokens,
+# error message and positions of the terms (only if they were requested). If the preprocessing failed the bag of words
+# is None and the error message is set
+PreprocessingResult = Tuple[Optional[Dict[str, int]], int, Optional[str], Optional[Dict[str, List[int]]]]
+
+# Preprocessor of the worker process, created once by the pool initializer
+_worker_preprocessor: Optional[Preprocessor] = None
+
+
+def _init_worker(config: dict, nltk_data_path: List[str]):
+    """
+    Initializes worker process of the pool
+    :param config: configuration of the preprocessor as returned by PreprocessorConfig.to_dict()
+    :param nltk_data_path: resource paths of nltk in the parent process
+    :return: None
+    """
+    global _worker_preprocessor
+    for path in nltk_data_path:
+        if path not in nltk.data.path:
+            nltk.data.path.append(path)
+    _worker_preprocessor = Preprocessor(PreprocessorConfig(**config))
+
+
+def preprocess_text(preprocessor, text: str, positional: bool = False) -> PreprocessingResult:
+    """
+    Preprocesses the text and counts its terms. Errors are returned instead of raised so one invalid document
+    does not fail the whole chunk
+    :param preprocessor: preprocessor to use
+    :param text: text to preprocess
+    :param positional: return positions of the terms as well
+    :return: PreprocessingResult
+    """
+    try:
+        tokens = preprocessor.get_tokens(text)
+    except Exception as e:
+        return None, 0, f'{type(e).__name__}: {e}', None
+    return Document.count_terms(tokens), len(tokens), None, Document.term_positions(tokens) if positional else None
+
+
+def _preprocess_chunk(texts: List[str], positional: bool) -> List[PreprocessingResult]:
+    """
+    Preprocesses chunk of texts in the worker process
+    :param texts: texts to preprocess
+    :param positional: return positions of the terms as well
+    :return: list of results in the same order as the texts
+    """
+    return [preprocess_text(_worker_preprocessor, text, positional) for text in texts]
+
+
+class PreprocessingPool:
+    """
+    Runs preprocessing in a pool of worker processes. Texts are sent to the workers in chunks and the workers
+    return only the counted terms, so little data is transferred between the processes.
+    Batches smaller than one chunk and preprocessors that cannot be recreated from their configuration
+    are preprocessed in the calling process
+    """
+
+    def __init__(self, preprocessor, n_workers: int = None, chunk_size: int = 64):
+        """
+        Initializes the pool, worker processes are started on first use
+        :param preprocessor: preprocessor of the index
+        :param n_workers: number of worker processes, if None the number of CPUs is used
+        :param chunk_size: number of texts sent to a worker at once
+        """
+        if chunk_size < 1:
+            raise ValueError('Chunk size must be at least 1')
+        self.preprocessor = preprocessor
+        self.n_workers = n_workers if n_workers is not None else os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """
+        Returns executor of the pool, starts it if it is not running
+        :return: ProcessPoolExecutor
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.n_workers, initializer=_init_worker,
+                                                     initargs=(self.preprocessor.config.to_dict(),
+                                                               list(nltk.data.path)))
+            return self._executor
+
+    def preprocess(self, texts: List[str], positional: bool = False) -> List[PreprocessingResult]:
+        """
+        Preprocesses the texts
+        :param texts: texts to preprocess
+        :param positional: return positions of the terms as well
+        :return: list of results in the same order as the texts
+        """
+        if self.n_workers <= 1 or len(texts) <= self.chunk_size or not isinstance(self.preprocessor, Preprocessor):
+            return [preprocess_text(self.preprocessor, text, positional) for text in texts]
+
+        chunks = [texts[i:i + self.chunk_size] for i in range(0, len(texts), self.chunk_size)]
+        executor = self._get_executor()
+        results = []
+        try:
+            # map() yields the chunks in the order they were submitted
+            for chunk_results in executor.map(_preprocess_chunk, chunks, itertools.repeat(positional)):
+                results.extend(chunk_results)
+        except BrokenProcessPool:
+            # A worker died (e.g. it was killed by the OS), the pool cannot be used anymore so the next batch starts
+            # a new one
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            executor.shutdown(wait=False)
+            raise ValueError('Preprocessing worker process terminated unexpectedly')
+        return results
+
+    def close(self):
+        """
+        Stops the worker processes
+        :return: None
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
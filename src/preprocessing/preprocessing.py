@@ -1,6 +1,8 @@
 import logging
+import re
 import string
-from typing import List, Tuple, Union
+import threading
+from typing import List, Tuple, Union, Callable, Optional, Dict, FrozenSet
 
 import unicodedata
 
@@ -8,6 +10,7 @@ from nltk import WordNetLemmatizer, PorterStemmer, word_tokenize
 from nltk.corpus import stopwords
 from src.preprocessing.czech_lemmatizer import CzechLemmatizer
 from src.preprocessing.czech_stemmer import CzechStemmer
+from src.preprocessing.term_cache import get_term_cache
 
 supported_langs = ['en', 'cs']
 lang_full_mapping = {'en': 'english', 'cs': 'czech'}
@@ -20,12 +23,34 @@ stemmers = {
     'cs': CzechStemmer()
 }
 
-# Supported lemmatizers
+# Supported lemmatizers - both load their language data on first use
 lemmatizers = {
     'en': WordNetLemmatizer(),
     'cs': CzechLemmatizer()
 }
 
+# Stopwords of each language are read on first use and shared by all preprocessors
+_stopwords: Dict[str, FrozenSet[str]] = {}
+_stopwords_lock = threading.Lock()
+
+# Translate table that removes ASCII punctuation
+punctuation_table = str.maketrans('', '', string.punctuation)
+
+# Characters that word_tokenize (NLTK 3.9+) always splits into separate tokens once ASCII punctuation is removed -
+# unicode quotes and dashes
+_separate_chars = '\u00ab\u201c\u2018\u201e\u00bb\u201d\u2019\u2012-\u2015'
+
+# Contractions that word_tokenize splits into two tokens (gonna -> gon na)
+_contractions = [('can', 'not', r'\b'), ('gim', 'me', r'\b'), ('gon', 'na', r'\b'), ('got', 'ta', r'\b'),
+                 ('lem', 'me', r'\b'), ('wan', 'na', rf'(?=[\s{_separate_chars}]|$)')]
+_contraction_start = '|'.join(rf'\b{first}(?={second}{end})' for first, second, end in _contractions)
+_contraction_end = '|'.join(rf'(?<=\b{first}){second}{end}' for first, second, end in _contractions)
+
+# Tokenizer of the compiled pipeline, it produces the same tokens as word_tokenize on text without ASCII punctuation
+token_pattern = re.compile(rf'[{_separate_chars}]|{_contraction_start}|{_contraction_end}'
+                           rf'|(?:(?!{_contraction_start})[^\s{_separate_chars}])+',
+                           re.IGNORECASE)
+
 
 class PreprocessorConfig:
 
@@ -36,7 +61,8 @@ class PreprocessorConfig:
                  remove_stopwords: bool,
                  use_stemmer: bool,
                  lang: str,
-                 remove_accents_after_stemming: bool
+                 remove_accents_after_stemming: bool,
+                 compiled_pipeline: bool = False
                  ):
         """
         Configuration for preprocessor
@@ -45,6 +71,8 @@ class PreprocessorConfig:
         :param remove_stopwords: remove stopwords
         :param use_stemmer: use stemmer if this is set to false lemmatizer will be used instead
         :param lang: language of the text
+        :param compiled_pipeline: tokenize by a single compiled regex instead of NLTK word_tokenize, the terms are
+        the same but the pipeline is faster. Requires remove_punctuation
         """
         self.lowercase = lowercase
         self.remove_accents = remove_accents_before_stemming
@@ -53,10 +81,74 @@ class PreprocessorConfig:
         self.remove_stopwords = remove_stopwords
         self.use_stemmer = use_stemmer
         self.lang = lang
-        self.lang_full = lang_full_mapping[lang]
+        self.compiled_pipeline = compiled_pipeline
 
         if lang not in supported_langs:
             raise ValueError('Language not supported')
+        self.lang_full = lang_full_mapping[lang]
+
+        if compiled_pipeline and not remove_punctuation:
+            raise ValueError('Compiled pipeline requires punctuation removal')
+
+    def to_dict(self) -> dict:
+        """
+        Returns the configuration as a dictionary of constructor arguments
+        :return: dictionary that can be passed to the constructor as keyword arguments
+        """
+        return {
+            'lowercase': self.lowercase,
+            'remove_accents_before_stemming': self.remove_accents,
+            'remove_punctuation': self.remove_punctuation,
+            'remove_stopwords': self.remove_stopwords,
+            'use_stemmer': self.use_stemmer,
+            'lang': self.lang,
+            'remove_accents_after_stemming': self.remove_accents_after_stemming,
+            'compiled_pipeline': self.compiled_pipeline,
+        }
+
+
+def get_stopwords(lang: str) -> FrozenSet[str]:
+    """
+    Returns stopwords of the language, they are read from the NLTK corpus when the language is first used
+    :param lang: language of the stopwords
+    :return: immutable set of stopwords
+    """
+    with _stopwords_lock:
+        if lang not in _stopwords:
+            _stopwords[lang] = frozenset(stopwords.words(lang_full_mapping[lang]))
+        return _stopwords[lang]
+
+
+class FoldingTable(dict):
+    """
+    Translate table that removes accents and / or punctuation. Both operations work on each character separately,
+    so the mapping of a character is computed when it is first translated and the table only holds characters
+    that occurred in the texts
+    """
+
+    def __init__(self, remove_accents: bool, remove_punctuation: bool):
+        """
+        Initializes the table
+        :param remove_accents: remove accents
+        :param remove_punctuation: remove ASCII punctuation
+        """
+        super().__init__()
+        self.remove_accents = remove_accents
+        self.remove_punctuation = remove_punctuation
+
+    def __missing__(self, code: int) -> Optional[str]:
+        """
+        Computes mapping of the character
+        :param code: code point of the character
+        :return: the folded character(s) or None if the character is removed
+        """
+        folded = chr(code)
+        if self.remove_accents:
+            folded = Preprocessor._remove_accents(folded)
+        if self.remove_punctuation:
+            folded = folded.translate(punctuation_table)
+        self[code] = folded if len(folded) > 0 else None
+        return self[code]
 
 
 class SimplePreprocessor:
@@ -82,10 +174,11 @@ class Preprocessor:
         self.config = config
         self.stemmer = stemmers[self.config.lang]
         self.lemmatizer = lemmatizers[self.config.lang]
-        self.stopwords = {
-            'en': set(stopwords.words('english')),
-            'cs': set(stopwords.words('czech'))
-        }
+        self.stopwords = get_stopwords(self.config.lang) if self.config.remove_stopwords else frozenset()
+        # Normalized terms of the tokens are cached and shared by all preprocessors with the same configuration
+        self.term_cache = get_term_cache((config.lang, config.use_stemmer, config.remove_accents_after_stemming),
+                                         self._create_normalizer(config))
+        self.folding_table = FoldingTable(config.remove_accents, config.remove_punctuation)
 
     def get_tokens(self, text: str, return_detected_stopwords=False) -> Union[list, Tuple[list, set]]:
         """
@@ -94,6 +187,8 @@ class Preprocessor:
         :return: list of terms
         :param return_detected_stopwords:
         """
+        if self.config.compiled_pipeline:
+            return self._get_tokens_compiled(text, return_detected_stopwords)
 
         # Lowercase
         if self.config.lowercase:
@@ -105,7 +200,7 @@ class Preprocessor:
 
         # Remove punctuation
         if self.config.remove_punctuation:
-            text = text.translate(str.maketrans('', '', string.punctuation))
+            text = text.translate(punctuation_table)
 
         # Tokenize
         text = word_tokenize(text, language=self.config.lang_full)
@@ -120,15 +215,7 @@ class Preprocessor:
                 text = self._remove_stopwords(text)
 
         # Use stemmer or lemmatizer
-        tokens = []
-        for token in text:
-            if self.config.use_stemmer:
-                tokens.append(self.stemmer.stem(token))
-            else:
-                tokens.append(self.lemmatizer.lemmatize(token))
-
-        if self.config.remove_accents_after_stemming:
-            tokens = [self._remove_accents(token) for token in tokens]
+        tokens = self.term_cache.normalize(text)
 
         if return_detected_stopwords:
             # Return tuple of tokens and detected stopwords if return_detected_stopwords is set to True
@@ -139,6 +226,49 @@ class Preprocessor:
         # Otherwise just return list of tokens
         return tokens
 
+    def _get_tokens_compiled(self, text: str, return_detected_stopwords=False) -> Union[list, Tuple[list, set]]:
+        """
+        Returns all tokens found in the text using the compiled pipeline - accents and punctuation are removed by
+        one translation, the text is tokenized by one regex and the stopwords are filtered while the tokens
+        are normalized
+        :param text: text to be processed
+        :param return_detected_stopwords: if true the detected stopwords are returned as well
+        :return: list of terms or tuple of list of terms and set of detected stopwords
+        """
+        if self.config.lowercase:
+            text = text.lower()
+        text = text.translate(self.folding_table)
+
+        stopwords = self.stopwords
+        if return_detected_stopwords:
+            detected_stopwords = set()
+
+            def remove_stopwords(tokens):
+                for token in tokens:
+                    if token in stopwords:
+                        detected_stopwords.add(token)
+                    else:
+                        yield token
+
+            tokens = self.term_cache.normalize(remove_stopwords(token_pattern.findall(text)))
+            if len(detected_stopwords) != 0:
+                logger.debug(f'Detected stopwords: {detected_stopwords}')
+            return tokens, detected_stopwords
+
+        return self.term_cache.normalize(token for token in token_pattern.findall(text) if token not in stopwords)
+
+    @staticmethod
+    def _create_normalizer(config: PreprocessorConfig) -> Callable[[str], str]:
+        """
+        Creates function that normalizes a token with the stemmer or lemmatizer of the configuration
+        :param config: configuration of the preprocessor
+        :return: function of token -> term
+        """
+        normalize = stemmers[config.lang].stem if config.use_stemmer else lemmatizers[config.lang].lemmatize
+        if config.remove_accents_after_stemming:
+            return lambda token: Preprocessor._remove_accents(normalize(token))
+        return normalize
+
     @staticmethod
     def _remove_accents(text: str) -> str:
         """
@@ -161,11 +291,11 @@ class Preprocessor:
         if return_detected_stopwords:
             tokens, detected_stopwords = [], []
             for token in text:
-                if token in self.stopwords[self.config.lang]:
+                if token in self.stopwords:
                     detected_stopwords.append(token)
                     continue
                 tokens.append(token)
             return tokens, set(detected_stopwords)
 
         # Otherwise simply return only list of words that are not stopwords
-        return [word for word in text if word not in self.stopwords[self.config.lang]]
+        return [word for word in text if word not in self.stopwords]
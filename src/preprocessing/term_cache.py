@@ -0,0 +1,61 @@
+import threading
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from src.index.lru_cache import LruCache
+
+TERM_CACHE_SIZE = 200_000  # maximum number of cached surface forms of each configuration
+
+
+class TermCache:
+    """
+    Bounded memoization of term normalization (stemming or lemmatization followed by optional accent removal).
+    Few surface forms make up most of the tokens of a text, so most tokens are normalized by a single cache lookup.
+    Tokens of a text are looked up as one batch, so the shared cache is locked once per text and not per token.
+    When the cache is full the least recently used surface forms are evicted
+    """
+
+    def __init__(self, normalize: Callable[[str], str], max_size: int = TERM_CACHE_SIZE):
+        """
+        Initializes the cache
+        :param normalize: function that normalizes a token, it must always return the same term for the same token
+        :param max_size: maximum number of cached tokens, 0 disables the cache
+        """
+        self._normalize = normalize
+        self._terms = LruCache(max_size)  # throws ValueError if the size is negative
+        self.max_size = max_size
+
+    def normalize(self, tokens: Iterable[str]) -> List[str]:
+        """
+        Normalizes the tokens
+        :param tokens: tokens to normalize
+        :return: list of normalized terms in the order of the tokens
+        """
+        return self._terms.get_or_compute_many(tokens, self._normalize)
+
+    def stats(self) -> dict:
+        """
+        Returns statistics of the cache
+        :return: dictionary with the number of entries, maximum size, hits, misses and hit rate
+        """
+        stats = self._terms.stats()
+        lookups = stats['hits'] + stats['misses']
+        return {'entries': stats['entries'], 'maxSize': self.max_size, 'hits': stats['hits'],
+                'misses': stats['misses'], 'hitRate': stats['hits'] / lookups if lookups > 0 else 0.0}
+
+
+# Caches shared by all preprocessors with the same normalization configuration
+_term_caches: Dict[Tuple, TermCache] = {}
+_term_caches_lock = threading.Lock()
+
+
+def get_term_cache(key: Tuple, normalize: Callable[[str], str]) -> TermCache:
+    """
+    Returns cache of the normalization configuration, creates it if it does not exist
+    :param key: configuration of the normalization - every configuration that changes the terms must be part of it
+    :param normalize: function that normalizes a token in this configuration
+    :return: TermCache
+    """
+    with _term_caches_lock:
+        if key not in _term_caches:
+            _term_caches[key] = TermCache(normalize)
+        return _term_caches[key]
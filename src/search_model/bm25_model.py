@@ -1,83 +1,99 @@
 import logging
 import math
-from typing import Set, Dict
+from typing import Dict, Iterable
 
-from src.index.document import Document
+from src.index.segment import Segment
+from src.index.term_info import TermInfo
 from src.preprocessing.preprocessing import Preprocessor
-from src.search_model.search_model import SearchModel
+from src.search_model.ranked_model import RankedModel
+from src.search_model.vectorized import PYTHON_BACKEND, SegmentMatrix
 
 logger = logging.getLogger(__name__)
 
 
-class Bm25Model(SearchModel):
+class Bm25Model(RankedModel):
 
-    def __init__(self, index, preprocessor: Preprocessor, k1: float = 1.2, b: float = 0.75):
-        super().__init__(index)
-        self.average_document_length = 0
-        self.documents = index.documents
-        self.preprocessor = preprocessor
-        # since the model supports CRUD we cannot precompute the idf values but we can cache them until new
-        # document is added
-        self.idf_cache = {}
-        self.n_docs = 0
+    supports_vectorized = True
+
+    def __init__(self, index, preprocessor: Preprocessor, k1: float = 1.2, b: float = 0.75, pruning: bool = True,
+                 backend: str = PYTHON_BACKEND):
+        """
+        Initializes the model
+        :param index: index to search in
+        :param preprocessor: preprocessor of the queries
+        :param k1: term frequency saturation parameter
+        :param b: document length normalization parameter
+        :param pruning: if True, queries for the top documents skip documents that cannot get into them
+        (Block-Max MaxScore), the results are the same as without pruning
+        :param backend: scoring backend - python or numpy
+        """
+        super().__init__(index, preprocessor, backend)
         # Model params
         self.k1 = k1
         self.b = b
+        self.pruning = pruning
 
-    def recalculate(self):
-        self.idf_cache = {}
-        self.average_document_length = sum([document.length for document in self.documents.values()]) / len(
-            self.documents)
-        self.n_docs = len(self.documents)
-
-    def _calculate_document_bm25(self, document: Document, query: Dict[str, int]):
-        score = 0.0
-        for term, query_tf in query.items():
-            if term not in document.bow_int:
-                continue
-
-            if term not in self.idf_cache:  # cache the term's idf value
-                df = self.inverted_idx[term].document_frequency  # document frequency
-                idf = math.log(1 + (self.n_docs - df + .5) / (df + .5))
-                self.idf_cache[term] = idf
-            else:
-                idf = self.idf_cache[term]
-
-            tf = document.bow_int[term]
-            tf = (tf * (self.k1 + 1)) / (
-                    tf + self.k1 * (1 - self.b + self.b * document.length / self.average_document_length))
-
-            score += query_tf * tf * idf
-
-        return score
-
-    def search(self, query: str, top_n: int = None):
+    @staticmethod
+    def _idf(term: str, snapshot) -> float:
         """
-        Search using bm25 as a score
-        :param query: query as a string
-        :param top_n: top n results to return
-        :return: list of dictionaries where each contains the score and the document
+        Returns idf of the term. Since the model supports CRUD we cannot precompute the idf values
+        but we can cache them in the snapshot
+        :param term: the term
+        :param snapshot: snapshot of the index
+        :return: idf
         """
-        tokens = self.preprocessor.get_tokens(query)
-        _, query_terms = Document.calculate_bow(tokens)
+        idf_cache = snapshot.cache.setdefault('bm25_idf', {})
+        if term not in idf_cache:  # cache the term's idf value
+            df = snapshot.document_frequency(term)  # document frequency
+            idf_cache[term] = math.log(1 + (snapshot.n_docs - df + .5) / (df + .5))
+        return idf_cache[term]
 
-        logger.debug(f"Searching for : {query_terms}")
+    def _query_weights(self, term_counts: Dict[str, int], snapshot) -> Dict[str, float]:
+        """
+        Returns frequencies of the query terms
+        """
+        return term_counts
 
-        # Filter out all documents that contain at least one of the terms
-        query_terms_keys = set(query_terms.keys())
-        documents = self._get_documents_containing_terms(query_terms_keys)
-        logger.info(f"Found {len(documents)} documents for terms {query_terms_keys}")
+    def _segment_context(self, segment: Segment, snapshot, query_weights: Dict[str, float]):
+        """
+        Returns lengths of the documents in the segment and the average document length
+        """
+        return segment.document_lengths, snapshot.average_document_length
 
-        # Calculate the score for each document
-        results = [{} for _ in range(len(documents))]
-        for i, document in enumerate(documents.values()):
-            results[i]['score'] = self._calculate_document_bm25(document, query_terms)
-            results[i]['document'] = document
+    def _term_contributions(self, term: str, weight: float, term_info: TermInfo, context, snapshot) -> Iterable[float]:
+        """
+        Returns bm25 scores of the term in the documents
+        """
+        document_lengths, average_document_length = context
+        idf, k1, b = self._idf(term, snapshot), self.k1, self.b
+        return [weight * ((tf * (k1 + 1)) / (tf + k1 * (1 - b + b * document_lengths[docno] / average_document_length)))
+                * idf for docno, tf in term_info.postings()]
 
-        # Sort the documents by score
-        results.sort(key=lambda x: x['score'], reverse=True)
-        total_docs = len(results)
+    def _term_weights(self, term: str, weight: float, matrix: SegmentMatrix, start: int, end: int, context,
+                      snapshot):
+        """
+        Returns bm25 scores of the term in the documents
+        """
+        _, average_document_length = context
+        idf, k1, b = self._idf(term, snapshot), self.k1, self.b
+        tf, document_lengths = matrix.term_frequencies[start:end], matrix.document_lengths[matrix.indices[start:end]]
+        return weight * ((tf * (k1 + 1)) / (tf + k1 * (1 - b + b * document_lengths / average_document_length))) * idf
 
-        # Return either the entire list if top_n is None, < 0 or greater than length of the array, otherwise return
-        # a sublist
-        return results if top_n is None or top_n <= 0 or top_n > len(results) else results[0:top_n], total_docs
+    def _block_upper_bounds(self, term: str, weight: float, term_info: TermInfo, segment: Segment, context,
+                            snapshot):
+        """
+        Returns bm25 score of the maximum term frequency and the minimum document length of each block,
+        the score grows with the term frequency and decreases with the document length so it is an upper bound,
+        and function computing bm25 score of the term in a single document.
+        Deleting documents can only lower the actual maximums, so the stored maxima remain valid upper bounds
+        """
+        block_maxima = term_info.block_maxima()
+        if not self.pruning or block_maxima is None:
+            return None
+        document_lengths, average_document_length = context
+        idf, k1, b = self._idf(term, snapshot), self.k1, self.b
+        lasts, max_tfs, min_lengths = block_maxima
+        bounds = [weight * ((tf * (k1 + 1)) / (tf + k1 * (1 - b + b * length / average_document_length))) * idf
+                  for tf, length in zip(max_tfs, min_lengths)]
+        return lasts, bounds, lambda docno, tf: weight * ((tf * (k1 + 1)) / (
+                tf + k1 * (1 - b + b * document_lengths[docno] / average_document_length))) * idf
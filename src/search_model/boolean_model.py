@@ -1,14 +1,26 @@
+import itertools
 import logging
-from typing import List, Set, Dict, Union, Tuple
+from typing import List, Set, Dict, Union, Tuple, Optional
 
+from src.index.bitmap import Bitmap
 from src.index.document import Document
+from src.index.lru_cache import LruCache
+from src.index.segment import Segment
 from src.index.term_info import TermInfo
 from src.preprocessing.boolean.boolean_parser import parse_boolean_query, QueryItem, BooleanOperator
 from src.preprocessing.preprocessing import Preprocessor
+from src.search_model.boolean_planner import QueryPlanner, PlanNode, PlanOperator
 from src.search_model.search_model import SearchModel
 
 logger = logging.getLogger(__name__)
 
+BITMAP_CACHE_SIZE = 16 * 1024 * 1024  # maximum approximate size in bytes of cached term bitmaps of a segment
+PARSED_QUERY_CACHE_SIZE = 10_000  # maximum number of cached preprocessed queries
+
+# Preprocessed queries do not depend on the index, so they are shared by all models with the same preprocessor
+# configuration
+parsed_query_cache = LruCache(PARSED_QUERY_CACHE_SIZE)
+
 
 class BooleanModel(SearchModel):
     """
@@ -21,33 +33,98 @@ class BooleanModel(SearchModel):
     def __init__(self, index, preprocessor: Preprocessor):
         super().__init__(index)
         self.preprocessor = preprocessor
-        self.documents = index.documents
+        # Queries are cached only for preprocessors with a configuration, otherwise there is no key to share them by
+        config = getattr(preprocessor, 'config', None)
+        self._config_key = tuple(sorted(config.to_dict().items())) if config is not None else None
 
-    def search(self, query: str, top_n=None):
+    def search(self, query: str, top_n=None, snapshot=None, offset: int = 0):
         """
         Search for documents matching the query
         :param query: a boolean query
         :param top_n: number of items to return
+        :param snapshot: snapshot of the index to search in, if None the current snapshot is used
+        :param offset: number of matching documents to skip
         :return: List of all matching documents
         """
+        snapshot = self._get_snapshot(snapshot)
+        # Results are cached by the exact query, so cached queries are not even parsed. Whitespace is not normalized,
+        # the grammar does not accept all of it (e.g. a newline), so a query differing only in whitespace may be invalid
+        key = query, top_n if top_n is not None and top_n > 0 else None, offset
+        return self._cached(snapshot, key, lambda: self._search(query, top_n, snapshot, offset),
+                            lambda result: len(result[0]))
+
+    def _search(self, query: str, top_n, snapshot, offset: int):
+        """
+        Search for documents matching the query in the snapshot
+        :param query: a boolean query
+        :param top_n: number of items to return
+        :param snapshot: snapshot of the index
+        :param offset: number of matching documents to skip
+        :return: tuple of matching documents, detected stopwords, total number of matching documents and the plan
+        of the query as a dictionary
+        """
+        preprocessed_query, detected_stopwords = self._parse(query)
+
+        if preprocessed_query is None:
+            return [], detected_stopwords, 0, PlanNode(PlanOperator.EMPTY, 0).to_dict()
+
+        plan = QueryPlanner(snapshot).plan(preprocessed_query)
+        logger.debug(f'Query plan: {plan.to_dict()}')
+
+        # Evaluate the plan in each segment, the documents are returned in the index order
+        limit = offset + top_n if top_n is not None and top_n > 0 else None
+        documents, total_docs = [], 0
+        segments = snapshot.segments if plan.operator != PlanOperator.EMPTY else []
+        for segment in segments:
+            docnos = self._evaluate(plan, segment, {})
+            if segment.live_docs is not None:
+                # Deleted documents are filtered only from the result, AND / OR / NOT commute with the filtering
+                docnos = docnos & segment.live_bitmap()
+            total_docs += len(docnos)
+            if limit is not None:
+                docnos = itertools.islice(docnos, max(limit - len(documents), 0))
+            documents.extend(segment.documents[docno] for docno in docnos)
+        return documents[offset:], detected_stopwords, total_docs, plan.to_dict()
+
+    def _parse(self, query: str) -> Tuple[Union[QueryItem, str, None], Set[str]]:
+        """
+        Parses and preprocesses the query, the results are cached by the query and configuration of the preprocessor
+        :param query: a boolean query
+        :return: tuple of preprocessed query (None if it has no terms) and detected stopwords
+        """
+        if self._config_key is None:
+            return self._parse_uncached(query)
+        preprocessed_query, detected_stopwords = parsed_query_cache.get_or_compute(
+            (self._config_key, query), lambda: self._parse_uncached(query))
+        return preprocessed_query, set(detected_stopwords)
+
+    def _parse_uncached(self, query: str) -> Tuple[Union[QueryItem, str, None], Set[str]]:
+        """
+        Parses and preprocesses the query
+        :param query: a boolean query
+        :return: tuple of preprocessed query (None if it has no terms) and detected stopwords
+        """
         try:
             detected_stopwords = set()
             preprocessed_query = self._preprocess_query(parse_boolean_query(query), detected_stopwords)
         except ValueError as e:
             logger.debug(str(e))
             raise ValueError('Query is not valid')
-
-        if preprocessed_query is None:
-            return [], detected_stopwords, 0
-
-        # DFS traverse the parsed query
-        document_ids = list(self._dfs_traverse(preprocessed_query))
-        total_docs = len(document_ids)
-        document_ids = document_ids if top_n is None or top_n <= 0 or top_n > len(document_ids) else document_ids[
-                                                                                                     :top_n]
-        return [self.documents[doc_id] for doc_id in document_ids], detected_stopwords, total_docs
+        return preprocessed_query, detected_stopwords
 
     def _preprocess_query(self, query: Union[QueryItem, str], detected_stopwords: Set[str] = None):
+        if isinstance(query, QueryItem) and query.operator == BooleanOperator.PHRASE:
+            return self._preprocess_phrase(' '.join(query.items), detected_stopwords)
+        if isinstance(query, QueryItem) and query.operator == BooleanOperator.NEAR:
+            # NEAR with an operand without terms (e.g. only stopwords) matches the other operand
+            operands = [self._preprocess_phrase(item if isinstance(item, str) else ' '.join(item.items),
+                                                detected_stopwords) for item in query.items]
+            operands = [operand for operand in operands if operand is not None]
+            if len(operands) < 2:
+                return operands[0] if len(operands) > 0 else None
+            query.items = operands
+            return query
+
         if isinstance(query, str):
             # If we end up with query that is a string this means that there will be either one or more words
             tokens, stopwords = self.preprocessor.get_tokens(query, True)
@@ -72,48 +149,140 @@ class BooleanModel(SearchModel):
         query.items = preprocessed_items
         return query
 
-    def _find_documents_matching_term(self, term) -> Set[str]:
+    def _preprocess_phrase(self, phrase: str, detected_stopwords: Set[str]) -> Union[QueryItem, str, None]:
         """
-        Find all documents containing the term
-        :param token: token to search_model
-        :return:
+        Preprocesses terms of a phrase. Positions of the index are positions in the preprocessed tokens, so stopwords
+        are removed from the phrase the same way they were removed from the documents
+        :param phrase: text of the phrase
+        :param detected_stopwords: set the detected stopwords are added to
+        :return: the phrase, a term if the phrase has only one term or None if it has no terms
         """
-        return set(self.inverted_idx[term].documents.keys() if term in self.inverted_idx else [])
+        tokens, stopwords = self.preprocessor.get_tokens(phrase, True)
+        detected_stopwords.update(stopwords)
+        if len(tokens) == 0:
+            return None
+        return tokens[0] if len(tokens) == 1 else QueryItem(tokens, BooleanOperator.PHRASE)
 
-    def _dfs_traverse(self, query: Union[QueryItem, str]) -> Set[str]:
+    @staticmethod
+    def _find_documents_matching_term(term: str, segment: Segment) -> Bitmap:
         """
-        DFS traversal
-        :param query: query item or a string
-        :param detected_stopwords: set of all detected stopwords that gets updated if any new stopwords are found
-        :return: List of ids of all matching documents
+        Find all documents containing the term. Postings of a segment never change, so the bitmaps are cached
+        and shared by all versions of the segment
+        :param term: term to search_model
+        :param segment: segment to search in
+        :return: bitmap of docnos
         """
-        if isinstance(query, str):
-            return self._find_documents_matching_term(query)
-
-        items = query.items
-        # Check whether the parameter is a string
-        if isinstance(items, str):
-            return self._find_documents_matching_term(items)
-
-        # Else iterate over the list
-        document_ids = set()
-        for idx, item in enumerate(items):
-            # Find matching documents for item
-            matching_docs = self._find_documents_matching_term(item) if isinstance(item, str) else self._dfs_traverse(
-                item)
-
-            # If the operation is AND we need to intersect the sets
-            if query.operator == BooleanOperator.AND:
-                # If the index is 0 the set is empty so fill it with the docs for first item
-                document_ids = matching_docs if idx == 0 else document_ids.intersection(matching_docs)
-                continue
+        if term not in segment.postings:
+            return Bitmap()
+        cache = segment.model_data.get('boolean_bitmaps')
+        if cache is None:
+            cache = segment.model_data.setdefault('boolean_bitmaps',
+                                                  LruCache(BITMAP_CACHE_SIZE, sizeof=Bitmap.size_in_bytes))
+        return cache.get_or_compute(term, lambda: Bitmap.from_sorted(segment.postings[term].docnos))
 
-            # If the operation is OR we need to union the sets
-            if query.operator == BooleanOperator.OR:
-                document_ids = document_ids.union(matching_docs)
-                continue
+    def _evaluate(self, node: PlanNode, segment: Segment, evaluated: Dict[str, Bitmap]) -> Bitmap:
+        """
+        Evaluates the plan in the segment
+        :param node: node of the plan
+        :param segment: segment the plan is evaluated in
+        :param evaluated: results of already evaluated nodes by their keys, so duplicate sub-expressions
+        are evaluated once
+        :return: bitmap of docnos of all matching documents
+        """
+        if node.key in evaluated:
+            return evaluated[node.key]
 
-            # Otherwise we need a set that contains everything except the ids we have found for current item
-            document_ids = set(self.documents.keys()).difference(matching_docs)
+        if node.operator == PlanOperator.TERM:
+            result = self._find_documents_matching_term(node.term, segment)
+        elif node.operator == PlanOperator.ALL:
+            result = segment.live_bitmap()
+        elif node.operator == PlanOperator.EMPTY:
+            result = Bitmap()
+        elif node.operator == PlanOperator.NOT:
+            result = segment.live_bitmap() - self._evaluate(node.children[0], segment, evaluated)
+        elif node.operator == PlanOperator.OR:
+            result = Bitmap()
+            for child in node.children:
+                result = result | self._evaluate(child, segment, evaluated)
+        elif node.operator in (PlanOperator.PHRASE, PlanOperator.NEAR):
+            # Positions are checked only in the documents that contain all operands
+            candidates = self._evaluate(node.children[0], segment, evaluated)
+            for child in node.children[1:]:
+                if not candidates:
+                    break
+                candidates = candidates & self._evaluate(child, segment, evaluated)
+            result = Bitmap.from_sorted([docno for docno in candidates
+                                         if len(self._spans(node, segment, docno)) > 0])
+        else:
+            # AND and AND_NOT - operands are ordered from the smallest, evaluation stops once the result is empty
+            result = self._evaluate(node.children[0], segment, evaluated)
+            for child in node.children[1:]:
+                if not result:
+                    break
+                result = result & self._evaluate(child, segment, evaluated)
+            for child in node.excluded:
+                if not result:
+                    break
+                result = result - self._evaluate(child, segment, evaluated)
 
-        return document_ids
+        evaluated[node.key] = result
+        return result
+
+    def _spans(self, node: PlanNode, segment: Segment, docno: int) -> List[Tuple[int, int]]:
+        """
+        Finds occurrences of a term, phrase or NEAR in the document
+        :param node: TERM, PHRASE or NEAR node of the plan
+        :param segment: segment of the document
+        :param docno: docno of a document containing all terms of the node
+        :return: (first, last) positions of the occurrences ordered by the first position
+        """
+        if node.operator == PlanOperator.TERM:
+            return [(position, position) for position in self._positions(node.term, segment, docno)]
+
+        if node.operator == PlanOperator.PHRASE:
+            # Phrase starts where the i-th term occurs i positions after the start for each term
+            starts = set(self._positions(node.children[0].term, segment, docno))
+            for offset, child in enumerate(node.children[1:], 1):
+                starts.intersection_update(position - offset for position in
+                                           self._positions(child.term, segment, docno))
+                if len(starts) == 0:
+                    break
+            return [(start, start + len(node.children) - 1) for start in sorted(starts)]
+
+        first, second = (self._spans(child, segment, docno) for child in node.children)
+        matching = self._near(first, second, node.distance)
+        return [matching] if matching is not None else []
+
+    @staticmethod
+    def _near(first: List[Tuple[int, int]], second: List[Tuple[int, int]],
+              distance: int) -> Optional[Tuple[int, int]]:
+        """
+        Finds two non-overlapping occurrences with at most distance tokens between them, in either order.
+        Adjacent occurrences have no tokens between them, so NEAR/0 matches them
+        :param first: occurrences of the first operand ordered by the first position
+        :param second: occurrences of the second operand ordered by the first position
+        :param distance: maximum number of tokens between the end of the earlier occurrence and the start
+        of the later one
+        :return: (first, last) position covered by the two occurrences or None if there are no such occurrences
+        """
+        for first_start, first_end in first:
+            for second_start, second_end in second:
+                if second_start - first_end - 1 > distance:
+                    break  # all following occurrences of the second operand are too far
+                if first_end < second_start:
+                    return first_start, second_end
+                if second_end < first_start and first_start - second_end - 1 <= distance:
+                    return second_start, first_end
+        return None
+
+    @staticmethod
+    def _positions(term: str, segment: Segment, docno: int) -> List[int]:
+        """
+        Returns positions of the term in the document
+        :param term: the term
+        :param segment: segment of the document
+        :param docno: docno of a document containing the term
+        :return: ascending positions
+        """
+        term_info = segment.postings[term]
+        return term_info.positions_at(term_info.find(docno))
@@ -0,0 +1,213 @@
+from enum import Enum
+from typing import List, Union
+
+from src.preprocessing.boolean.boolean_parser import QueryItem, BooleanOperator
+
+
+class PlanOperator(Enum):
+    """
+    Operators of a boolean query plan
+    """
+    TERM = 'TERM'  # documents containing the term
+    AND = 'AND'  # intersection of the children
+    AND_NOT = 'AND_NOT'  # intersection of the children without documents matching any excluded node
+    OR = 'OR'  # union of the children
+    NOT = 'NOT'  # live documents that do not match the child
+    PHRASE = 'PHRASE'  # documents containing the child terms at consecutive positions
+    NEAR = 'NEAR'  # documents containing the two children with at most distance tokens between them
+    ALL = 'ALL'  # all live documents
+    EMPTY = 'EMPTY'  # no document
+
+
+class PlanNode:
+    """
+    Node of a boolean query plan with estimated number of matching documents. Nodes with the same key match
+    the same documents
+    """
+
+    def __init__(self, operator: PlanOperator, estimate: int, children: List['PlanNode'] = None,
+                 excluded: List['PlanNode'] = None, term: str = None, distance: int = None):
+        """
+        Initializes the node
+        :param operator: operator of the node
+        :param estimate: estimated number of matching documents
+        :param children: operands in the order they are evaluated, terms of a phrase in their order
+        :param excluded: nodes subtracted from the intersection of the children, only for AND_NOT
+        :param term: the term, only for TERM
+        :param distance: maximum number of tokens between the children, only for NEAR
+        """
+        self.operator = operator
+        self.estimate = estimate
+        self.children = children if children is not None else []
+        self.excluded = excluded if excluded is not None else []
+        self.term = term
+        self.distance = distance
+
+        # Key does not depend on the order of the operands, except for the terms of a phrase
+        if operator == PlanOperator.TERM:
+            self.key = repr(term)
+        elif operator == PlanOperator.PHRASE:
+            self.key = f'{operator.value}({",".join(child.key for child in self.children)})'
+        elif operator == PlanOperator.NEAR:
+            self.key = f'{operator.value}/{distance}({",".join(sorted(child.key for child in self.children))})'
+        else:
+            operands = ','.join(sorted(child.key for child in self.children))
+            excluded_operands = ','.join(sorted(child.key for child in self.excluded))
+            self.key = f'{operator.value}({operands};{excluded_operands})'
+
+    def to_dict(self) -> dict:
+        """
+        Returns the plan as a dictionary, used to explain the query
+        :return: dictionary with the operator, estimated number of documents and the operands
+        """
+        result = {'operator': self.operator.value, 'estimate': self.estimate}
+        if self.term is not None:
+            result['term'] = self.term
+        if self.distance is not None:
+            result['distance'] = self.distance
+        if len(self.children) > 0:
+            result['children'] = [child.to_dict() for child in self.children]
+        if len(self.excluded) > 0:
+            result['excluded'] = [child.to_dict() for child in self.excluded]
+        return result
+
+
+class QueryPlanner:
+    """
+    Converts parsed boolean query to a plan. Nested AND and OR are flattened, terms that no live document contains
+    are folded away, duplicate operands are removed, AND NOT becomes a difference and the operands of AND are ordered
+    by ascending document frequency, so the intersection is computed from the smallest posting lists.
+    Phrases and NEAR require positions, so they can only be planned if all segments of the snapshot are positional
+    """
+
+    def __init__(self, snapshot):
+        """
+        Initializes the planner
+        :param snapshot: snapshot of the index the plan is evaluated in, used for the estimates
+        """
+        self.snapshot = snapshot
+        self.n_docs = snapshot.n_docs
+        self.positional = all(segment.positional for segment in snapshot.segments)
+
+    def plan(self, query: Union[QueryItem, str]) -> PlanNode:
+        """
+        Creates plan of the preprocessed query
+        :param query: query item or a term
+        :return: root of the plan
+        """
+        if isinstance(query, str):
+            return self._term(query)
+        if isinstance(query.items, str):
+            return self._term(query.items)
+
+        if query.operator == BooleanOperator.NOT:
+            # Only the last operand is negated, the same as in the original evaluation of the parsed query
+            return self._not(self.plan(query.items[-1])) if len(query.items) > 0 else self._empty()
+        if query.operator in (BooleanOperator.PHRASE, BooleanOperator.NEAR):
+            if not self.positional:
+                raise ValueError('Phrase and proximity queries require an index with positions')
+            if query.operator == BooleanOperator.PHRASE:
+                return self._phrase([self._term(term) for term in query.items])
+            return self._near([self.plan(item) for item in query.items], query.distance)
+
+        children = [self.plan(item) for item in query.items]
+        if len(children) == 0:
+            return self._empty()
+        return self._and(children) if query.operator == BooleanOperator.AND else self._or(children)
+
+    def _empty(self) -> PlanNode:
+        return PlanNode(PlanOperator.EMPTY, 0)
+
+    def _all(self) -> PlanNode:
+        return PlanNode(PlanOperator.ALL, self.n_docs)
+
+    def _term(self, term: str) -> PlanNode:
+        document_frequency = self.snapshot.document_frequency(term)
+        if document_frequency == 0:
+            return self._empty()
+        return PlanNode(PlanOperator.TERM, document_frequency, term=term)
+
+    def _independent_estimate(self, children: List[PlanNode]) -> int:
+        # Positions are not known while planning, so the estimate is the same as the estimate of AND
+        estimate = float(self.n_docs)
+        for child in children:
+            estimate *= child.estimate / self.n_docs
+        return round(estimate)
+
+    def _phrase(self, children: List[PlanNode]) -> PlanNode:
+        if any(child.operator == PlanOperator.EMPTY for child in children) or len(children) == 0:
+            return self._empty()
+        if len(children) == 1:
+            return children[0]
+        return PlanNode(PlanOperator.PHRASE, self._independent_estimate(children), children)
+
+    def _near(self, children: List[PlanNode], distance: int) -> PlanNode:
+        if any(child.operator == PlanOperator.EMPTY for child in children):
+            return self._empty()
+        return PlanNode(PlanOperator.NEAR, self._independent_estimate(children),
+                        sorted(children, key=lambda node: node.estimate), distance=distance)
+
+    def _not(self, child: PlanNode) -> PlanNode:
+        if child.operator == PlanOperator.EMPTY:
+            return self._all()
+        if child.operator == PlanOperator.ALL:
+            return self._empty()
+        if child.operator == PlanOperator.NOT:
+            # Results are always restricted to live documents, so double negation is the child itself
+            return child.children[0]
+        return PlanNode(PlanOperator.NOT, max(self.n_docs - child.estimate, 0), [child])
+
+    def _and(self, children: List[PlanNode]) -> PlanNode:
+        positive, excluded = {}, {}
+        for child in children:
+            if child.operator == PlanOperator.EMPTY:
+                return self._empty()
+            if child.operator in (PlanOperator.AND, PlanOperator.AND_NOT):
+                positive.update((operand.key, operand) for operand in child.children)
+                excluded.update((operand.key, operand) for operand in child.excluded)
+            elif child.operator == PlanOperator.NOT:
+                excluded[child.children[0].key] = child.children[0]
+            elif child.operator != PlanOperator.ALL:
+                positive[child.key] = child
+
+        if any(key in excluded for key in positive):
+            return self._empty()  # a AND NOT a
+        if len(positive) == 0:
+            # NOT a AND NOT b is NOT (a OR b)
+            return self._not(self._or(list(excluded.values()))) if len(excluded) > 0 else self._all()
+        if len(positive) == 1 and len(excluded) == 0:
+            return next(iter(positive.values()))
+
+        # Estimate assumes that the terms occur independently
+        estimate = float(self.n_docs)
+        for child in positive.values():
+            estimate *= child.estimate / self.n_docs
+        for child in excluded.values():
+            estimate *= 1 - child.estimate / self.n_docs
+
+        # Intersection starts with the smallest operand, the largest excluded operands are subtracted first since
+        # they most likely empty the result
+        return PlanNode(PlanOperator.AND_NOT if len(excluded) > 0 else PlanOperator.AND, round(estimate),
+                        sorted(positive.values(), key=lambda node: node.estimate),
+                        sorted(excluded.values(), key=lambda node: -node.estimate))
+
+    def _or(self, children: List[PlanNode]) -> PlanNode:
+        operands = {}
+        for child in children:
+            if child.operator == PlanOperator.ALL:
+                return self._all()
+            if child.operator == PlanOperator.OR:
+                operands.update((operand.key, operand) for operand in child.children)
+            elif child.operator != PlanOperator.EMPTY:
+                operands[child.key] = child
+
+        if len(operands) == 0:
+            return self._empty()
+        if len(operands) == 1:
+            return next(iter(operands.values()))
+
+        not_matching = 1.0
+        for child in operands.values():
+            not_matching *= 1 - child.estimate / self.n_docs
+        return PlanNode(PlanOperator.OR, round(self.n_docs * (1 - not_matching)),
+                        sorted(operands.values(), key=lambda node: -node.estimate))
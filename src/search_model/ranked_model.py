@@ -0,0 +1,576 @@
+import heapq
+import logging
+from abc import abstractmethod
+from collections import defaultdict, Counter
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Iterable, Any, Tuple, Optional, Sequence, Callable, Set
+
+from src.index.document import Document
+from src.index.segment import Segment
+from src.index.term_info import TermInfo
+from src.search_model.search_model import SearchModel
+from src.search_model.vectorized import PYTHON_BACKEND, NUMPY_BACKEND, check_scoring_backend, segment_matrix, \
+    live_mask, np
+
+logger = logging.getLogger(__name__)
+
+
+class RankedModel(SearchModel):
+    """
+    Base class of models whose score is a sum of contributions of the query terms. Documents are scored
+    term-at-a-time - posting list of each query term is read once and its contributions are added
+    to a score accumulator, so only postings of the query terms are accessed.
+    Models that provide upper bounds of the contributions are evaluated with dynamic pruning (Block-Max MaxScore)
+    when only the top documents are requested.
+    With the numpy backend the contributions are computed for whole rows of the segment term-document matrices
+    and summed by a sparse vector-matrix product instead. Models that support it set supports_vectorized
+    and implement _term_weights(term, weight, matrix, start, end, context, snapshot) returning numpy array
+    of the contributions of the term in its row of the matrix, the same as _term_contributions()
+    """
+
+    # Whether the model implements _term_weights() and can be scored by the numpy backend
+    supports_vectorized = False
+
+    def __init__(self, index, preprocessor, backend: str = PYTHON_BACKEND):
+        """
+        Initializes the model
+        :param index: index to search in
+        :param preprocessor: preprocessor of the queries
+        :param backend: scoring backend - python or numpy
+        """
+        super().__init__(index)
+        self.preprocessor = preprocessor
+        check_scoring_backend(backend)
+        if backend == NUMPY_BACKEND and not self.supports_vectorized:
+            # Contributions of the model cannot be computed for whole matrix rows, so it is scored in python
+            logger.warning(f'{type(self).__name__} does not support the {NUMPY_BACKEND} backend, '
+                           f'{PYTHON_BACKEND} backend is used instead')
+            backend = PYTHON_BACKEND
+        self.backend = backend
+
+    @abstractmethod
+    def _query_weights(self, term_counts: Dict[str, int], snapshot) -> Dict[str, float]:
+        """
+        Returns weights of the query terms
+        :param term_counts: bag of words of the preprocessed query with integer term frequencies
+        :param snapshot: snapshot of the index
+        :return: dictionary of term -> weight, terms that should be ignored are omitted
+        """
+        pass
+
+    def _segment_context(self, segment: Segment, snapshot, query_weights: Dict[str, float]) -> Any:
+        """
+        Returns data the model needs to score documents of the segment, e.g. document lengths
+        :param segment: the segment
+        :param snapshot: snapshot of the index
+        :param query_weights: weights of the query terms
+        :return: context passed to _term_contributions() and _final_score()
+        """
+        return None
+
+    @abstractmethod
+    def _term_contributions(self, term: str, weight: float, term_info: TermInfo, context, snapshot) -> Iterable[float]:
+        """
+        Returns contributions of the term to the scores of the documents in its posting list
+        :param term: the term
+        :param weight: weight of the term in the query
+        :param term_info: postings of the term in the segment
+        :param context: context returned by _segment_context()
+        :param snapshot: snapshot of the index
+        :return: iterable of contributions in the order of the postings
+        """
+        pass
+
+    def _final_score(self, score: float, docno: int, context) -> float:
+        """
+        Returns final score of the document from the accumulated contributions
+        :param score: sum of contributions of the query terms
+        :param docno: docno of the document
+        :param context: context returned by _segment_context()
+        :return: score of the document
+        """
+        return score
+
+    def _final_scores(self, scores, docnos, context):
+        """
+        Returns final scores of the documents from the accumulated contributions, used by the numpy backend
+        :param scores: numpy array of sums of contributions of the query terms
+        :param docnos: numpy array of docnos of the documents
+        :param context: context returned by _segment_context()
+        :return: numpy array of scores of the documents, the same as in _final_score()
+        """
+        return scores
+
+    def _block_upper_bounds(self, term: str, weight: float, term_info: TermInfo, segment: Segment, context,
+                            snapshot) -> Optional[Tuple[Sequence[int], List[float], Callable[[int, int], float]]]:
+        """
+        Returns upper bounds of the contributions of the term in blocks of POSTING_BLOCK_SIZE postings of its
+        posting list together with a function scoring single postings. Models that return them are evaluated
+        with dynamic pruning when only the top documents are requested
+        :param term: the term
+        :param weight: weight of the term in the query
+        :param term_info: postings of the term in the segment
+        :param segment: the segment
+        :param context: context returned by _segment_context()
+        :param snapshot: snapshot of the index
+        :return: tuple of (last docno of each block, upper bound of each block, function of (docno, term frequency)
+        -> contribution returning the same contributions as _term_contributions()) or None if pruning
+        is not supported
+        """
+        return None
+
+    def search(self, query: str, top_n: int = None, snapshot=None, offset: int = 0):
+        """
+        Search for documents containing at least one of the query terms ordered by score. If top_n is set
+        only offset + top_n best documents are kept in a heap instead of sorting all matching documents
+        and if the model provides upper bounds of the contributions, documents that cannot get into the heap
+        are skipped without being scored
+        :param query: query as a string
+        :param top_n: number of results to return
+        :param snapshot: snapshot of the index to search in, if None the current snapshot is used
+        :param offset: number of best results to skip
+        :return: list of tuples (score, document) and total number of documents
+        """
+        snapshot = self._get_snapshot(snapshot)
+        term_counts = Document.count_terms(self.preprocessor.get_tokens(query))
+        return self._cached(snapshot, self._cache_key(term_counts, top_n, offset),
+                            lambda: self._search_weights(self._query_weights(term_counts, snapshot), top_n, snapshot,
+                                                         offset),
+                            lambda result: len(result[0]))
+
+    def search_batch(self, queries: List[Tuple[str, Optional[int], int]], snapshot=None) -> List[Tuple[list, int]]:
+        """
+        Searches for all queries in the same snapshot. The queries are preprocessed together by the preprocessing
+        pool of the index (in worker processes if the batch is large enough) and posting lists of terms repeated
+        with the same weight in several queries are scored only once in each segment
+        :param queries: list of tuples (query, top_n, offset)
+        :param snapshot: snapshot of the index to search in, if None the current snapshot is used
+        :return: list of results of search() in the order of the queries
+        """
+        snapshot = self._get_snapshot(snapshot)
+        preprocessed = self.index.preprocessing_pool.preprocess([query for query, _, _ in queries])
+        query_terms = []
+        for (query, _, _), (term_counts, _, error, _) in zip(queries, preprocessed):
+            if error is not None:
+                raise ValueError(f'Query "{query}" could not be preprocessed: {error}')
+            query_terms.append((self._query_weights(term_counts, snapshot), term_counts))
+
+        term_occurrences = Counter(item for weights, _ in query_terms for item in weights.items())
+        shared = SharedContributions({item for item, count in term_occurrences.items() if count > 1})
+        return [self._cached(snapshot, self._cache_key(term_counts, top_n, offset),
+                             lambda: self._search_weights(weights, top_n, snapshot, offset, shared),
+                             lambda result: len(result[0]))
+                for (weights, term_counts), (_, top_n, offset) in zip(query_terms, queries)]
+
+    @staticmethod
+    def _cache_key(term_counts: Dict[str, int], top_n: Optional[int], offset: int) -> tuple:
+        """
+        Returns key of the search in the result cache - queries with the same terms return the same results
+        regardless of the order of the terms
+        :param term_counts: bag of words of the preprocessed query
+        :param top_n: number of results to return
+        :param offset: number of best results to skip
+        :return: tuple
+        """
+        return tuple(sorted(term_counts.items())), top_n if top_n is not None and top_n > 0 else None, offset
+
+    def _search_weights(self, query_weights: Dict[str, float], top_n: Optional[int], snapshot, offset: int,
+                        shared: 'SharedContributions' = None):
+        """
+        Searches for documents containing the weighted query terms
+        :param query_weights: weights of the query terms
+        :param top_n: number of results to return
+        :param snapshot: snapshot of the index
+        :param offset: number of best results to skip
+        :param shared: contributions shared by the queries of a batch, None if the query is searched alone
+        :return: list of tuples (score, document) and total number of documents
+        """
+        logger.debug(f'Searching for {query_weights}')
+        k = offset + top_n if top_n is not None and top_n > 0 else None
+        if self.backend == NUMPY_BACKEND:
+            return self._search_vectorized(query_weights, snapshot, k, offset, shared)
+
+        # Rows are (score, -position, document) - the position of the document in the index keeps the order
+        # of documents with equal scores stable and the documents are never compared
+        rows: List[Tuple[float, int, Any]] = []
+        total_docs, base = 0, 0
+        for segment in snapshot.segments:
+            if any(term in segment.postings for term in query_weights):
+                context = self._segment_context(segment, snapshot, query_weights)
+                if k is not None:
+                    total_docs += self._search_segment_pruned(segment, base, query_weights, context, snapshot, rows, k,
+                                                              shared)
+                else:
+                    total_docs += self._search_segment(segment, base, query_weights, context, snapshot, rows, k,
+                                                       shared)
+            base += len(segment)
+
+        logger.info(f"Found {total_docs} documents for terms {set(query_weights.keys())}")
+
+        # Sort the kept documents by score and skip the first offset of them
+        rows.sort(reverse=True)
+        return [(score, document) for score, _, document in rows[offset:]], total_docs
+
+    def _search_vectorized(self, query_weights: Dict[str, float], snapshot, k: Optional[int], offset: int,
+                           shared: 'SharedContributions' = None):
+        """
+        Scores documents with the numpy backend. Scores of a segment are the product of the sparse query vector
+        and the term-document matrix of the segment, computed by summing the weighted rows of the query terms
+        with bincount in the order of the query terms. Only the top k documents of each segment are selected
+        by argpartition and the results are ordered the same way as by the python backend
+        :param query_weights: weights of the query terms
+        :param snapshot: snapshot of the index
+        :param k: number of best documents to keep, None keeps all of them
+        :param offset: number of best results to skip
+        :param shared: contributions shared by the queries of a batch or None
+        :return: list of tuples (score, document) and total number of documents
+        """
+        candidate_scores, candidate_positions, segment_bases = [], [], []
+        total_docs, base = 0, 0
+        for segment in snapshot.segments:
+            segment_bases.append(base)
+            matrix = segment_matrix(segment) if any(term in segment.postings for term in query_weights) else None
+            if matrix is None:
+                base += len(segment)
+                continue
+
+            context = self._segment_context(segment, snapshot, query_weights)
+            indices, weights = [], []
+            for term, weight in query_weights.items():
+                row = matrix.row(term)
+                if row is not None:
+                    indices.append(matrix.indices[row[0]:row[1]])
+                    weights.append(_shared(shared, segment, term, weight, lambda: self._term_weights(
+                        term, weight, matrix, *row, context, snapshot)))
+            indices = np.concatenate(indices)
+            scores = np.bincount(indices, np.concatenate(weights), minlength=matrix.n_docs)
+
+            matching = np.zeros(matrix.n_docs, dtype=bool)
+            matching[indices] = True
+            if segment.live_docs is not None:
+                matching &= live_mask(segment.live_docs)
+            docnos = np.flatnonzero(matching)
+            scores = self._final_scores(scores[docnos], docnos, context)
+            total_docs += len(docnos)
+
+            if k is not None and len(docnos) > k:
+                # Keep documents scoring at least as the k-th best one, ties are resolved by the position below
+                kth_score = scores[np.argpartition(scores, len(scores) - k)[len(scores) - k]]
+                kept = scores >= kth_score
+                docnos, scores = docnos[kept], scores[kept]
+            candidate_scores.append(scores)
+            candidate_positions.append(docnos + base)
+            base += len(segment)
+
+        logger.info(f"Found {total_docs} documents for terms {set(query_weights.keys())}")
+        if len(candidate_scores) == 0:
+            return [], 0
+
+        # Order by score and then by the position of the document in the index
+        scores, positions = np.concatenate(candidate_scores), np.concatenate(candidate_positions)
+        order = np.lexsort((positions, -scores))[offset:k]
+        results = []
+        for score, position in zip(scores[order].tolist(), positions[order].tolist()):
+            segment_index = bisect_right(segment_bases, position) - 1
+            segment = snapshot.segments[segment_index]
+            results.append((score, segment.documents[position - segment_bases[segment_index]]))
+        return results, total_docs
+
+    def _search_segment(self, segment: Segment, base: int, query_weights: Dict[str, float], context, snapshot,
+                        rows: List[Tuple[float, int, Any]], k: Optional[int],
+                        shared: 'SharedContributions' = None) -> int:
+        """
+        Scores all documents of the segment containing any of the query terms term-at-a-time
+        :param segment: the segment
+        :param base: position of the first document of the segment in the index
+        :param query_weights: weights of the query terms
+        :param context: context returned by _segment_context()
+        :param snapshot: snapshot of the index
+        :param rows: list (or heap of size k) of the best rows, the scored documents are added to it
+        :param k: number of rows to keep, None keeps all of them
+        :param shared: contributions shared by the queries of a batch or None
+        :return: number of live documents containing any of the query terms
+        """
+        # Accumulate contributions of the terms, the accumulator holds only documents containing any of them
+        accumulator: Dict[int, float] = defaultdict(float)
+        for term, weight in query_weights.items():
+            term_info = segment.postings.get(term)
+            if term_info is None:
+                continue
+            contributions = _shared(shared, segment, term, weight, lambda: self._term_contributions(
+                term, weight, term_info, context, snapshot))
+            for docno, contribution in zip(term_info.docnos, contributions):
+                accumulator[docno] += contribution
+
+        n_matching = 0
+        for docno, score in accumulator.items():
+            if not segment.is_live(docno):
+                continue
+            score = self._final_score(score, docno, context)
+            n_matching += 1
+            row = (score, -(base + docno))
+            if k is None:
+                rows.append((*row, segment.documents[docno]))
+            elif len(rows) < k:
+                heapq.heappush(rows, (*row, segment.documents[docno]))
+            elif row > rows[0][:2]:
+                heapq.heapreplace(rows, (*row, segment.documents[docno]))
+        return n_matching
+
+    def _search_segment_pruned(self, segment: Segment, base: int, query_weights: Dict[str, float], context, snapshot,
+                               rows: List[Tuple[float, int, Any]], k: int, shared: 'SharedContributions' = None) -> int:
+        """
+        Scores documents of the segment in windows of consecutive docnos with Block-Max MaxScore pruning.
+        In each window the query terms are bounded by the maximum bounds of their blocks in the window - windows
+        whose bound does not exceed the score of the worst kept row are skipped and only documents of the terms
+        that can lift a document over it are scored. Scores are summed in the order of the query terms,
+        so the kept rows are the same as in _search_segment().
+        Posting lists are decoded block by block when a window reaches them, blocks of skipped windows of a single
+        term query are never decoded - its matching documents are counted from the live document frequency.
+        The union of several posting lists cannot be counted without their docnos, so they are decoded
+        in every window but only the postings of the scored windows are scored
+        :param segment: the segment
+        :param base: position of the first document of the segment in the index
+        :param query_weights: weights of the query terms
+        :param context: context returned by _segment_context()
+        :param snapshot: snapshot of the index
+        :param rows: heap of the best rows, the scored documents are added to it
+        :param k: number of rows to keep
+        :param shared: contributions shared by the queries of a batch or None, used only if the model does not
+        provide the bounds - pruned queries compute contributions only in the windows they score
+        :return: number of live documents containing any of the query terms
+        """
+        cursors: List[_Cursor] = []
+        for term, weight in query_weights.items():
+            term_info = segment.postings.get(term)
+            if term_info is None or term_info.is_empty():
+                continue
+            bounds = self._block_upper_bounds(term, weight, term_info, segment, context, snapshot)
+            if bounds is None:
+                return self._search_segment(segment, base, query_weights, context, snapshot, rows, k, shared)
+            cursors.append(_Cursor(term, term_info, *bounds))
+
+        # Skipped documents are not scored, so the matching documents are counted separately
+        n_matching = segment.document_frequency(cursors[0].term) if len(cursors) == 1 else 0
+        deleted = segment.live_docs.deleted_docnos() if segment.live_docs is not None else frozenset()
+
+        documents, final_score, is_live = segment.documents, self._final_score, segment.is_live
+        end_docno = max(cursor.block_lasts[-1] for cursor in cursors) + 1
+        for window_start in range(min(cursor.first_docno() for cursor in cursors), end_docno, PRUNING_WINDOW_SIZE):
+            window_end = window_start + PRUNING_WINDOW_SIZE
+            if len(cursors) > 1:
+                window_docnos = set()
+                for cursor in cursors:
+                    window_docnos.update(cursor.window_postings(window_start, window_end)[0])
+                n_matching += len(window_docnos) - len(window_docnos & deleted)
+
+            limit, essential, non_essential, non_essential_bound = None, cursors, [], 0.0
+            if len(rows) == k:
+                # Rows are added in the order of positions, so a document must score more than the worst kept row.
+                # Terms with the lowest bounds whose sum does not exceed it are non-essential - documents containing
+                # only them cannot get into the rows, so they are looked up only for documents of the other terms
+                limit = _pruning_limit(rows[0][0])
+                window_bounds = sorted((cursor.window_bound(window_start, window_end), i)
+                                       for i, cursor in enumerate(cursors))
+                for bound, i in window_bounds:
+                    if non_essential_bound + bound > limit:
+                        break
+                    non_essential_bound += bound
+                    non_essential.append(cursors[i])
+                if len(non_essential) == len(cursors):
+                    continue
+                if len(non_essential) > 0:
+                    essential = [cursor for cursor in cursors if cursor not in non_essential]
+
+            # Contributions of the essential terms are accumulated in the order of the query terms
+            accumulator: Dict[int, float] = defaultdict(float)
+            contributions: Dict[_Cursor, Dict[int, float]] = {}
+            for cursor in essential:
+                contributions[cursor] = cursor_contributions = cursor.window_contributions(window_start, window_end)
+                for docno, contribution in cursor_contributions.items():
+                    accumulator[docno] += contribution
+            frequencies = [(cursor, cursor.window_frequencies(window_start, window_end)) for cursor in non_essential]
+
+            for docno, score in accumulator.items():
+                if limit is not None:
+                    if score + non_essential_bound <= limit:
+                        continue
+                    if len(non_essential) > 0:
+                        looked_up = {}
+                        for cursor, cursor_frequencies in frequencies:
+                            tf = cursor_frequencies.get(docno)
+                            if tf is not None:
+                                looked_up[cursor] = contribution = cursor.scorer(docno, tf)
+                                score += contribution
+                        if score <= limit:
+                            continue
+                        # Score of the document is summed again in the order of the query terms
+                        score = 0.0
+                        for cursor in cursors:
+                            contribution = looked_up[cursor] if cursor in looked_up \
+                                else contributions.get(cursor, _EMPTY).get(docno)
+                            if contribution is not None:
+                                score += contribution
+                if not is_live(docno):
+                    continue
+                row = (final_score(score, docno, context), -(base + docno))
+                if len(rows) < k:
+                    heapq.heappush(rows, (*row, documents[docno]))
+                elif row > rows[0][:2]:
+                    heapq.heapreplace(rows, (*row, documents[docno]))
+                else:
+                    continue
+                if len(rows) == k:
+                    limit = _pruning_limit(rows[0][0])
+        return n_matching
+
+
+class SharedContributions:
+    """
+    Contributions of the terms repeated in several queries of a batch. All queries of the batch use the same snapshot
+    so the contributions of a term with the same weight are the same in all of them
+    """
+
+    def __init__(self, keys: Set[Tuple[str, float]]):
+        """
+        Initializes the storage
+        :param keys: tuples (term, weight) occurring in more than one query
+        """
+        self.keys = keys
+        self.contributions: Dict[Tuple[int, str, float], Any] = {}
+
+
+def _shared(shared: Optional[SharedContributions], segment: Segment, term: str, weight: float,
+            compute: Callable[[], Any]) -> Any:
+    """
+    Returns contributions of the term in the segment, computes them only once if the term is shared by the batch
+    :param shared: contributions shared by the queries of a batch or None
+    :param segment: the segment
+    :param term: the term
+    :param weight: weight of the term in the query
+    :param compute: function computing the contributions
+    :return: the contributions
+    """
+    if shared is None or (term, weight) not in shared.keys:
+        return compute()
+    key = (segment.segment_id, term, weight)
+    if key not in shared.contributions:
+        shared.contributions[key] = compute()
+    return shared.contributions[key]
+
+
+PRUNING_WINDOW_SIZE = 1024  # number of consecutive docnos scored or skipped at once by the pruned evaluation
+# Bounds are compared with a small tolerance so rounding errors of the sums cannot skip a document
+BOUND_TOLERANCE = 1e-9
+_EMPTY: Dict[int, float] = {}
+
+
+def _pruning_limit(threshold: float) -> float:
+    """
+    Returns the value a bound of non-negative contributions must exceed so the document can score more
+    than the threshold
+    :param threshold: score of the worst kept row
+    :return: float
+    """
+    return threshold * (1 - BOUND_TOLERANCE)
+
+
+class _Cursor:
+    """
+    Position in a posting list used by the pruned evaluation, windows must be visited in the order of docnos.
+    Blocks of the posting list are decoded through the skip pointers only when a window needs their postings
+    """
+
+    __slots__ = ('term', 'term_info', 'block_lasts', 'block_bounds', 'block_index', 'scorer', 'block', 'block_docnos',
+                 'block_term_frequencies', 'window_start', 'window')
+
+    def __init__(self, term: str, term_info: TermInfo, block_lasts: Sequence[int], block_bounds: List[float],
+                 scorer: Callable[[int, int], float]):
+        """
+        Initializes the cursor at the first posting
+        :param term: the term
+        :param term_info: postings of the term
+        :param block_lasts: last docno of each block of the postings
+        :param block_bounds: upper bound of the contributions in each block
+        :param scorer: function of (docno, term frequency) -> contribution
+        """
+        self.term = term
+        self.term_info = term_info
+        self.block_lasts = block_lasts
+        self.block_bounds = block_bounds
+        self.block_index = 0
+        self.scorer = scorer
+        # Currently decoded block and the postings of the last visited window
+        self.block, self.block_docnos, self.block_term_frequencies = -1, (), ()
+        self.window_start, self.window = -1, ((), ())
+
+    def _decode(self, block: int):
+        """
+        Makes the block the currently decoded one
+        :param block: number of the block in the posting list
+        :return: None
+        """
+        if block != self.block:
+            self.block = block
+            self.block_docnos, self.block_term_frequencies = self.term_info.decode_block(block)
+
+    def first_docno(self) -> int:
+        """
+        Returns the first docno of the postings
+        :return: int
+        """
+        self._decode(0)
+        return self.block_docnos[0]
+
+    def window_postings(self, start: int, end: int) -> Tuple[List[int], List[int]]:
+        """
+        Returns postings in the window, only the blocks overlapping the window are decoded
+        :param start: first docno of the window
+        :param end: docno after the end of the window
+        :return: tuple of docnos and term frequencies
+        """
+        if start == self.window_start:
+            return self.window
+        docnos, term_frequencies = [], []
+        block = bisect_left(self.block_lasts, start, max(self.block, 0))
+        while block < len(self.block_lasts):
+            self._decode(block)
+            first = bisect_left(self.block_docnos, start)
+            last = bisect_left(self.block_docnos, end, first)
+            docnos.extend(self.block_docnos[first:last])
+            term_frequencies.extend(self.block_term_frequencies[first:last])
+            if last < len(self.block_docnos):
+                break
+            block += 1
+        self.window_start, self.window = start, (docnos, term_frequencies)
+        return self.window
+
+    def window_bound(self, start: int, end: int) -> float:
+        """
+        Returns upper bound of the contributions in the window
+        :param start: first docno of the window
+        :param end: docno after the end of the window
+        :return: maximum bound of the blocks overlapping the window
+        """
+        self.block_index = first = bisect_left(self.block_lasts, start, self.block_index)
+        last = bisect_left(self.block_lasts, end - 1, first)
+        return max(self.block_bounds[first:last + 1], default=0.0)
+
+    def window_contributions(self, start: int, end: int) -> Dict[int, float]:
+        """
+        Returns contributions of the term to the documents in the window
+        :param start: first docno of the window
+        :param end: docno after the end of the window
+        :return: dictionary of docno -> contribution
+        """
+        scorer, (docnos, term_frequencies) = self.scorer, self.window_postings(start, end)
+        return dict(zip(docnos, [scorer(docno, tf) for docno, tf in zip(docnos, term_frequencies)]))
+
+    def window_frequencies(self, start: int, end: int) -> Dict[int, int]:
+        """
+        Returns term frequencies of the term in the documents in the window
+        :param start: first docno of the window
+        :param end: docno after the end of the window
+        :return: dictionary of docno -> term frequency
+        """
+        return dict(zip(*self.window_postings(start, end)))
@@ -1,7 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Set
-
-from src.index.term_info import TermInfo
+from typing import List, Tuple, Optional, Callable, Any
 
 
 class SearchModel(ABC):
@@ -15,41 +13,66 @@ class SearchModel(ABC):
         Constructor
         :param index: index to search_model in
         """
-        self.inverted_idx: Dict[str, TermInfo] = index.inverted_idx
+        self.index = index
 
     @abstractmethod
-    def search(self, query: str, n_items=None):
+    def search(self, query: str, n_items=None, snapshot=None, offset: int = 0):
         """
         Search for documents matching the query
         :param query: sought query
         :param n_items: number of items to return
+        :param snapshot: snapshot of the index to search in, if None the current snapshot is used
+        :param offset: number of best matching documents to skip
         :return: list of all documents matching the query
         """
         pass
 
-    def recalculate(self):
+    def prepare_segment(self, segment, snapshot):
         """
-        Recalculates the model
+        Precomputes data the model derives from a new segment before it is published, e.g. from a merged segment
+        in the merge thread. Does nothing by default
+        :param segment: the new segment
+        :param snapshot: snapshot with the same statistics as the one the segment is published in
         :return: None
         """
-        return  # By default this does nothing since neither TF-IDF nor Boolean models need to recalculate
+        pass
 
-    def _get_documents_containing_terms(self, terms: Set[str]):
+    def prepare(self, snapshot):
         """
-        Returns all documents containing at least one of the given terms
-        :param terms:
-        :return:
+        Precomputes data the model derives from the snapshot before it is published, so searches only read it.
+        Called while holding the write lock of the index. Does nothing by default
+        :param snapshot: snapshot that is going to be published
+        :return: None
         """
-        # List of all unique documents that contain at least one of the terms
-        documents = {}
-        for term in terms:
-            if term not in self.inverted_idx:  # ignore any term that is not in inverted index
-                continue
+        pass
 
-            # now iterate for each document that has at least one of the term and add it to the list
-            for document_info in self.inverted_idx[term].documents.values():
-                document = document_info.document
-                if document.id not in documents:
-                    documents[document.id] = document
+    def search_batch(self, queries: List[Tuple[str, Optional[int], int]], snapshot=None) -> list:
+        """
+        Searches for all queries in the same snapshot
+        :param queries: list of tuples (query, n_items, offset)
+        :param snapshot: snapshot of the index to search in, if None the current snapshot is used
+        :return: list of results of search() in the order of the queries
+        """
+        snapshot = self._get_snapshot(snapshot)
+        return [self.search(query, n_items, snapshot, offset=offset) for query, n_items, offset in queries]
 
-        return documents
+    def _cached(self, snapshot, key: tuple, compute: Callable[[], Any], count_rows: Callable[[Any], int]):
+        """
+        Returns result of the search from the result cache of the index or computes it
+        :param snapshot: snapshot the search runs on
+        :param key: normalized query, number of results and offset
+        :param compute: function that performs the search
+        :param count_rows: function returning number of rows of the result
+        :return: the result
+        """
+        return self.index.result_cache.get_or_compute(snapshot.generation, (type(self).__name__, *key), compute,
+                                                      count_rows)
+
+    def _get_snapshot(self, snapshot=None):
+        """
+        Returns snapshot the search runs on. The whole search must use the same snapshot so it sees consistent
+        statistics even if the index is modified concurrently
+        :param snapshot: snapshot passed to search() or None
+        :return: IndexSnapshot
+        """
+        return snapshot if snapshot is not None else self.index.snapshot()
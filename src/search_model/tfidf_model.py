@@ -1,94 +1,167 @@
 import logging
 import math
-from typing import Dict, List
+from array import array
+from typing import Dict, Optional, Iterable, Sequence
 
 from src.index.document import Document
+from src.index.segment import Segment
+from src.index.term_info import TermInfo
 from src.preprocessing.preprocessing import Preprocessor
-from src.search_model.search_model import SearchModel
+from src.search_model.ranked_model import RankedModel
+from src.search_model.vectorized import PYTHON_BACKEND, SegmentMatrix, np
 
 logger = logging.getLogger(__name__)
 
 
-class TfIdfModel(SearchModel):
+class TfIdfModel(RankedModel):
     """
     TF-IDF model which uses cosine similarity for searching.
+    Norms of the document vectors are precomputed for each segment before it is published - when it is built, merged
+    or opened (saved segments store their norms), so a query only reads postings of its terms.
+    The norms depend on idf values which drift as documents are added, replaced and deleted - they are recomputed
+    when a snapshot is published once the number of changed documents exceeds renormalization_threshold
+    of the number of documents the norms were computed for
     """
 
-    def __init__(self, index, preprocessor: Preprocessor):
-        super().__init__(index)
-        self.preprocessor = preprocessor
-        self.documents = index.documents
-        # since the model supports CRUD we cannot precompute the idf values but we can cache them until new
-        # document is added
-        self.idf_cache = {}
-        self.n_docs = 0
-
-    def _calculate_document_tfidf(self, document: Document):
-        """
-        Calculates tfidf for given set of terms and appends all calculated idf values to passed idf cache
-        :param document: document to calculate tfidf for
-        :return:
-        """
-        terms_tfidf: Dict[str, float] = {}
-        norm = 0.0
-        for term, tf in document.bow_log.items():
-            if term not in self.inverted_idx:  # ignore any term that is not in inverted index
-                continue
+    supports_vectorized = True
 
-            if term in self.idf_cache:
-                idf = self.idf_cache[term]
-            else:
-                idf = math.log(self.n_docs / self.inverted_idx[term].document_frequency)
-                self.idf_cache[term] = idf
-            term_tfidf = idf * tf  # tf * idf
-            terms_tfidf[term] = term_tfidf  # set the tfidf value
-            norm += term_tfidf * term_tfidf  # x(i-1)^2 + x(i)^2 + ...
+    def __init__(self, index, preprocessor: Preprocessor, renormalization_threshold: float = 0.05,
+                 backend: str = PYTHON_BACKEND):
+        """
+        Initializes the model
+        :param index: index to search in
+        :param preprocessor: preprocessor of the queries
+        :param renormalization_threshold: number of changed documents relative to the number of documents after which
+        the document norms of a segment are recomputed, 0 recomputes them after every change of the index
+        :param backend: scoring backend - python or numpy
+        """
+        super().__init__(index, preprocessor, backend)
+        self.renormalization_threshold = renormalization_threshold
 
-        return terms_tfidf, norm
+    @staticmethod
+    def _idf(term: str, snapshot) -> Optional[float]:
+        """
+        Returns idf of the term. Values are cached in the snapshot since the model supports CRUD and they change
+        with every modification of the index
+        :param term: the term
+        :param snapshot: snapshot of the index
+        :return: idf or None if the term is not in the index
+        """
+        idf_cache = snapshot.cache.setdefault('tfidf_idf', {})
+        if term not in idf_cache:
+            df = snapshot.document_frequency(term)
+            idf_cache[term] = math.log(snapshot.n_docs / df) if df > 0 else None
+        return idf_cache[term]
 
-    def search(self, query: str, top_n: int = None):
+    def document_norms(self, segment: Segment, snapshot, renormalization_threshold: float = None) -> Sequence[float]:
         """
-        Search using tf-idf as a score
-        :param query: query as a string
-        :param top_n: number of results to return
-        :return: list of tuples (score, document) and total number of documents
+        Returns L2 norms of the tf-idf vectors of all documents in the segment. Norms are shared by all versions
+        of the segment and they are recomputed only if the index changed too much since they were computed
+        :param segment: the segment
+        :param snapshot: snapshot of the index
+        :param renormalization_threshold: overrides threshold of the model, 0 returns the norms for the statistics
+        of the snapshot
+        :return: array of norms indexed by docno
         """
-        # Preprocess the query and get all terms
-        tokens = self.preprocessor.get_tokens(query)
-        terms = set(tokens)
+        if renormalization_threshold is None:
+            renormalization_threshold = self.renormalization_threshold
+        cached = segment.model_data.get('tfidf_norms')
+        if cached is not None:
+            changes, n_docs, norms = cached
+            # Any added, replaced or deleted document changes the document frequencies even if the number
+            # of documents stays the same
+            if abs(snapshot.changes - changes) <= renormalization_threshold * n_docs:
+                return norms
+
+        squares = array('d', bytes(8 * len(segment)))
+        for term, term_info in segment.postings.items():
+            idf = self._idf(term, snapshot)
+            if idf is None:  # all documents containing the term were deleted
+                continue
+            for docno, tf in term_info.postings():
+                term_tfidf = idf * (1 + math.log(tf))
+                squares[docno] += term_tfidf * term_tfidf
+        norms = array('d', (square ** .5 for square in squares))
 
-        logger.debug(f'Searching for {terms}')
+        segment.model_data['tfidf_norms'] = (snapshot.changes, snapshot.n_docs, norms)
+        logger.debug(f'Computed tf-idf norms of {len(segment)} documents')
+        return norms
 
-        # Get all documents that contain at least one of the terms
-        documents = self._get_documents_containing_terms(terms)
+    @staticmethod
+    def set_document_norms(segment: Segment, norms: Sequence[float], changes: int):
+        """
+        Sets norms computed from the statistics of the segment alone, e.g. the norms stored in a segment file
+        :param segment: segment with no deleted documents
+        :param norms: norms indexed by docno
+        :param changes: number of changed documents of the snapshot the segment is published in
+        :return: None
+        """
+        segment.model_data['tfidf_norms'] = (changes, segment.n_live, norms)
 
-        logger.info(f"Found {len(documents)} documents for terms {terms}")
-        query = Document(doc_id='', tokens=tokens, text='', title='')
-        query_tfidf, query_norm = self._calculate_document_tfidf(query)
+    def prepare_segment(self, segment: Segment, snapshot):
+        """
+        Computes norms of a new segment
+        """
+        self.document_norms(segment, snapshot)
 
-        results: List[Dict] = [{} for _ in range(len(documents))]  # allocate array of dictionaries for results
+    def prepare(self, snapshot):
+        """
+        Computes norms of the segments that changed too much and pins them to the snapshot, so searches
+        of the snapshot use the same norms even if newer snapshots recompute them
+        """
+        snapshot.cache['tfidf_norms'] = {segment.segment_id: self.document_norms(segment, snapshot)
+                                         for segment in snapshot.segments}
 
-        for idx, document in enumerate(documents.values()):
-            document_tfidf, document_norm = self._calculate_document_tfidf(document)
-            similarity = 0.0
-            for term, term_tfidf in query_tfidf.items():
-                similarity += term_tfidf * document_tfidf[term] if term in document_tfidf else 0.0
-            similarity /= (document_norm ** .5 * query_norm ** .5)
-            results[idx]['score'] = similarity
-            results[idx]['document'] = document
-        # Sort the results by score descending
+    def _query_weights(self, term_counts: Dict[str, int], snapshot) -> Dict[str, float]:
+        """
+        Calculates tf-idf of the query, any term that is not in the index is ignored
+        :param term_counts: bag of words of the preprocessed query
+        :param snapshot: snapshot of the index
+        :return: dictionary of term -> tf-idf
+        """
+        query_tfidf: Dict[str, float] = {}
+        for term, tf in Document.log_bow(term_counts).items():
+            idf = self._idf(term, snapshot)
+            if idf is not None:
+                query_tfidf[term] = idf * tf
+        return query_tfidf
+
+    def _segment_context(self, segment: Segment, snapshot, query_weights: Dict[str, float]):
+        """
+        Returns document norms of the segment and the norm of the query
+        """
+        query_norm = sum(term_tfidf * term_tfidf for term_tfidf in query_weights.values())
+        norms = snapshot.cache.get('tfidf_norms', {}).get(segment.segment_id)
+        if norms is None:  # snapshot that was not published by the index
+            norms = self.document_norms(segment, snapshot)
+        return norms, query_norm ** .5
+
+    def _term_contributions(self, term: str, weight: float, term_info: TermInfo, context, snapshot) -> Iterable[float]:
+        """
+        Returns products of the query and document tf-idf of the term
+        """
+        idf, log = self._idf(term, snapshot), math.log
+        return [weight * (idf * (1 + log(tf))) for tf in term_info.term_frequencies]
 
-        total_docs = len(results)
-        results.sort(key=lambda x: x['score'], reverse=True)
+    def _final_score(self, score: float, docno: int, context) -> float:
+        """
+        Divides the dot product by the norms of the document and the query
+        """
+        norms, query_norm = context
+        norm = norms[docno] * query_norm
+        return score / norm if norm > 0 else 0.0
 
-        # Return either the entire list if top_n is None, < 0 or greater than length of the array, otherwise return
-        # a sublist
-        return results if top_n is None or top_n <= 0 or top_n > len(results) else results[0:top_n], total_docs
+    def _term_weights(self, term: str, weight: float, matrix: SegmentMatrix, start: int, end: int, context,
+                      snapshot):
+        """
+        Returns products of the query and document tf-idf of the term
+        """
+        return weight * (self._idf(term, snapshot) * matrix.log_term_frequencies[start:end])
 
-    def recalculate(self):
+    def _final_scores(self, scores, docnos, context):
         """
-        This model does not recalculate anything but we want to invalide the idf cache
-        :return: None
+        Divides the dot products by the norms of the documents and the query
         """
-        self.idf_cache = {}
-        self.n_docs = len(self.documents)
+        norms, query_norm = context
+        norm = np.frombuffer(norms, dtype=np.float64)[docnos] * query_norm
+        return np.divide(scores, norm, out=np.zeros_like(scores), where=norm > 0)
@@ -0,0 +1,96 @@
+import math
+from typing import Dict
+
+from src.index.live_docs import LiveDocs
+from src.index.segment import Segment
+
+# NumPy is an optional dependency, it is required only by indices that use the numpy scoring backend
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+PYTHON_BACKEND = 'python'
+NUMPY_BACKEND = 'numpy'
+SCORING_BACKENDS = (PYTHON_BACKEND, NUMPY_BACKEND)
+
+
+def check_scoring_backend(backend: str):
+    """
+    Checks that the scoring backend exists and can be used
+    :param backend: name of the backend
+    :return: None
+    """
+    if backend not in SCORING_BACKENDS:
+        raise ValueError(f'Unknown scoring backend {backend}, supported backends are {", ".join(SCORING_BACKENDS)}')
+    if backend == NUMPY_BACKEND and np is None:
+        raise ValueError('Scoring backend numpy requires NumPy to be installed (the fast extra)')
+
+
+class SegmentMatrix:
+    """
+    Term-document matrix of a segment in CSR format - row of a term holds docnos of its postings in indices
+    and its term frequencies in the data arrays. Postings of a segment never change, so the matrix is built once
+    and shared by all versions of the segment
+    """
+
+    def __init__(self, segment: Segment):
+        """
+        Builds the matrix from the postings of the segment
+        :param segment: the segment
+        """
+        self.n_docs = len(segment)
+        self.rows: Dict[str, int] = {}
+        row_lengths = np.zeros(len(segment.postings) + 1, dtype=np.int64)
+        for row, (term, term_info) in enumerate(segment.postings.items()):
+            self.rows[term] = row
+            row_lengths[row + 1] = term_info.document_frequency
+        self.indptr = np.cumsum(row_lengths)
+
+        self.indices = np.empty(self.indptr[-1], dtype=np.int32)
+        self.term_frequencies = np.empty(self.indptr[-1], dtype=np.int32)
+        for row, term_info in enumerate(segment.postings.values()):
+            start, end = self.indptr[row], self.indptr[row + 1]
+            self.indices[start:end] = np.frombuffer(term_info.docnos, dtype=np.int32)
+            self.term_frequencies[start:end] = np.frombuffer(term_info.term_frequencies, dtype=np.int32)
+
+        # Logarithms are computed by math.log for each distinct frequency so the weights are the same as
+        # in the python backend
+        distinct, inverse = np.unique(self.term_frequencies, return_inverse=True)
+        self.log_term_frequencies = np.array([1 + math.log(tf) for tf in distinct.tolist()],
+                                             dtype=np.float64)[inverse]
+        self.document_lengths = np.frombuffer(segment.document_lengths, dtype=np.int32)
+
+    def row(self, term: str):
+        """
+        Returns range of the row of the term in the data arrays
+        :param term: the term
+        :return: tuple of (start, end) or None if the segment does not contain the term
+        """
+        row = self.rows.get(term)
+        if row is None:
+            return None
+        return int(self.indptr[row]), int(self.indptr[row + 1])
+
+
+def segment_matrix(segment: Segment) -> SegmentMatrix:
+    """
+    Returns the term-document matrix of the segment, the matrix is built on first use
+    :param segment: the segment
+    :return: SegmentMatrix
+    """
+    matrix = segment.model_data.get('csr_matrix')
+    if matrix is None:
+        matrix = SegmentMatrix(segment)
+        segment.model_data['csr_matrix'] = matrix
+    return matrix
+
+
+def live_mask(live_docs: LiveDocs):
+    """
+    Converts the live docs bitset to a boolean array
+    :param live_docs: the bitset
+    :return: array of booleans indexed by docno
+    """
+    bits = np.frombuffer(bytes(live_docs.bits), dtype=np.uint8)
+    return np.unpackbits(bits, bitorder='little')[:live_docs.size].astype(bool)
@@ -0,0 +1,8 @@
+class WhitespacePreprocessor:
+    """
+    Preprocessor splitting the text on whitespace, the tests do not depend on the NLTK data
+    """
+
+    def get_tokens(self, text: str, return_detected_stopwords: bool = False):
+        tokens = text.lower().split()
+        return (tokens, set()) if return_detected_stopwords else tokens
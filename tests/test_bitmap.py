@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+from src.index.bitmap import ARRAY_CONTAINER_LIMIT, CONTAINER_SIZE, Bitmap
+
+UNIVERSE = 3 * CONTAINER_SIZE + 1000
+
+
+def _random_docnos(rnd: random.Random):
+    """
+    Returns docnos spanning several containers, each container is empty, sparse or dense
+    """
+    docnos = set()
+    for key in range(UNIVERSE // CONTAINER_SIZE + 1):
+        base = key * CONTAINER_SIZE
+        n_values = min(CONTAINER_SIZE, UNIVERSE - base)
+        density = rnd.choice([0, 10, ARRAY_CONTAINER_LIMIT, ARRAY_CONTAINER_LIMIT + 1, n_values // 2, n_values])
+        docnos.update(base + value for value in rnd.sample(range(n_values), min(density, n_values)))
+    return sorted(docnos)
+
+
+def _assert_valid(bitmap: Bitmap, expected):
+    assert list(bitmap) == sorted(expected)
+    assert len(bitmap) == len(expected)
+    assert bool(bitmap) == (len(expected) > 0)
+    assert bitmap.keys == sorted(bitmap.keys)
+    for container in bitmap.containers:
+        # Containers are never empty, sparse ones are sets and dense ones bitsets
+        is_array = isinstance(container, frozenset)
+        size = len(container) if is_array else container.bit_count()
+        assert size > 0
+        assert is_array == (size <= ARRAY_CONTAINER_LIMIT)
+
+
+@pytest.fixture(scope='module')
+def operands():
+    rnd = random.Random(7)
+    return [_random_docnos(rnd) for _ in range(6)] + [[], [0], [UNIVERSE - 1]]
+
+
+def test_from_sorted(operands):
+    for docnos in operands:
+        _assert_valid(Bitmap.from_sorted(docnos), docnos)
+
+
+def test_set_operations_match_python_sets(operands):
+    for first in operands:
+        for second in operands:
+            first_bitmap, second_bitmap = Bitmap.from_sorted(first), Bitmap.from_sorted(second)
+            _assert_valid(first_bitmap & second_bitmap, set(first) & set(second))
+            _assert_valid(first_bitmap | second_bitmap, set(first) | set(second))
+            _assert_valid(first_bitmap - second_bitmap, set(first) - set(second))
+
+
+def test_operations_do_not_modify_operands(operands):
+    first, second = Bitmap.from_sorted(operands[0]), Bitmap.from_sorted(operands[1])
+    (first & second), (first | second), (first - second)
+    assert list(first) == operands[0] and list(second) == operands[1]
+
+
+@pytest.mark.parametrize('size', [0, 1, 9, ARRAY_CONTAINER_LIMIT, CONTAINER_SIZE, CONTAINER_SIZE + 3, UNIVERSE])
+def test_full_and_from_bitset(size):
+    _assert_valid(Bitmap.full(size), range(size))
+
+    rnd = random.Random(size)
+    docnos = sorted(rnd.sample(range(size), size // 3))
+    bits = bytearray((size + 7) // 8)
+    for docno in docnos:
+        bits[docno >> 3] |= 1 << (docno & 7)
+    _assert_valid(Bitmap.from_bitset(bits, size), docnos)
+
+    # Bits above the size are ignored
+    _assert_valid(Bitmap.from_bitset(b'\xff' * ((size + 7) // 8 + 1), size), range(size))
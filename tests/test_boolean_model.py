@@ -0,0 +1,22 @@
+import pytest
+
+from src.search_model.boolean_model import BooleanModel
+
+
+@pytest.mark.parametrize('first, second, distance, expected', [
+    # Adjacent terms have no tokens between them
+    ([(3, 3)], [(4, 4)], 0, (3, 4)),
+    ([(4, 4)], [(3, 3)], 0, (3, 4)),
+    ([(3, 3)], [(5, 5)], 0, None),
+    ([(3, 3)], [(5, 5)], 1, (3, 5)),
+    ([(5, 5)], [(3, 3)], 1, (3, 5)),
+    # Distance is measured between the end of the earlier occurrence and the start of the later one
+    ([(1, 3)], [(6, 6)], 2, (1, 6)),
+    ([(1, 3)], [(6, 6)], 1, None),
+    ([(6, 7)], [(1, 3)], 2, (1, 7)),
+    # Overlapping occurrences do not match
+    ([(1, 3)], [(2, 2)], 5, None),
+    ([(10, 10)], [(1, 1), (8, 8), (20, 20)], 1, (8, 10)),
+])
+def test_near_counts_tokens_between_occurrences(first, second, distance, expected):
+    assert BooleanModel._near(first, second, distance) == expected
@@ -0,0 +1,172 @@
+import random
+
+import pytest
+from antlr4 import InputStream
+
+from src.preprocessing.boolean.boolean_parser import BooleanErrorListener, QueryItem, RecursiveDescentParser, \
+    _parse_with_antlr, parse_boolean_query
+from src.preprocessing.boolean.parser.BooleanGrammarLexer import BooleanGrammarLexer
+
+VALID_QUERIES = [
+    'a',
+    'a b',
+    'a b c d',
+    'a AND b',
+    'a OR b',
+    'NOT a',
+    'NOT NOT a',
+    'a AND b OR c',
+    'a OR b AND c',
+    'a AND b AND c',
+    'a OR b OR c',
+    'NOT a AND b',
+    'NOT (a OR b)',
+    '(a OR b) AND NOT c',
+    'a b AND c d',
+    '((a))',
+    '(a b c) OR (d AND NOT e)',
+    'a  AND b',
+    'a AND\tb',
+    "it's x-y c.d čx",
+    'ANDb ORb NOTa and or not',
+    '"a"',
+    '"a b c"',
+    'a NEAR/0 b',
+    '"a b" NEAR/3 c',
+    'a NEAR/12 "b c"',
+    'NOT a NEAR/1 b',
+    'x AND "a b" NEAR/3 "c d" OR NOT e',
+    '("a b" OR c) AND d NEAR/2 e',
+]
+
+# Queries the recursive descent parser leaves to the ANTLR parser, which rejects them
+INVALID_QUERIES = [
+    '',
+    ' ',
+    ' a',
+    'a AND',
+    'AND OR',
+    'a AND AND b',
+    'NOT',
+    'NOT(a)',
+    '(a OR b',
+    '()',
+    'a\nb',
+    'a * b',
+    '""',
+    '"a b',
+    'a NEAR/2',
+    'NEAR/2 a',
+    'a NEAR/ b',
+    'a NEAR/2x b',
+    'a b NEAR/2 c',
+    '(a NEAR/1 b) c',
+]
+
+_LEXER_ALPHABET = [' ', '\t', '\r', '\n', '(', ')', '"', '/', '1', '42', 'a', 'Z', 'č', "'", ',', '.', '+', '-', '*',
+                   'AND', 'OR', 'NOT', 'NEAR', 'NEAR/', '\U0001F600']
+
+_TERMS = ['a', 'b', 'čx', "it's", 'x-y', 'ANDb', 'and', 'c.d', 'NOTa', 'ORb']
+_INSERTED = [' ', '(', ')', '\t', 'AND', 'OR', 'NOT', '\n', '*', '  ', 'x', ' AND ', ' OR ', 'NOT ', '"', ' NEAR/1 ']
+
+
+def _tree(item):
+    """
+    Converts parsed query to nested tuples that compare by value
+    """
+    if not isinstance(item, QueryItem):
+        return item
+    items = item.items if isinstance(item.items, str) else tuple(_tree(child) for child in item.items)
+    return item.operator.name, item.distance, items
+
+
+def _antlr_tokens(query: str):
+    lexer = BooleanGrammarLexer(InputStream(query))
+    lexer.removeErrorListeners()
+    lexer.addErrorListener(BooleanErrorListener())
+    try:
+        return [(lexer.symbolicNames[token.type], token.text) for token in lexer.getAllTokens()]
+    except ValueError:
+        return None
+
+
+def _antlr_tree(query: str):
+    try:
+        return _tree(_parse_with_antlr(query))
+    except ValueError:
+        return ValueError
+
+
+def _random_proximity_operand(rnd: random.Random) -> str:
+    if rnd.random() < 0.5:
+        return rnd.choice(_TERMS)
+    return '"' + ' '.join(rnd.choice(_TERMS) for _ in range(rnd.randint(1, 3))) + '"'
+
+
+def _random_query(rnd: random.Random, depth: int = 0) -> str:
+    r = rnd.random()
+    if depth > 4 or r < 0.25:
+        return ' '.join(rnd.choice(_TERMS) for _ in range(rnd.randint(1, 4)))
+    if r < 0.3:
+        return _random_proximity_operand(rnd)
+    if r < 0.35:
+        return f'{_random_proximity_operand(rnd)} NEAR/{rnd.randint(0, 10)} {_random_proximity_operand(rnd)}'
+    if r < 0.5:
+        return 'NOT ' + _random_query(rnd, depth + 1)
+    if r < 0.65:
+        return '(' + _random_query(rnd, depth + 1) + ')'
+    return _random_query(rnd, depth + 1) + rnd.choice([' AND ', ' OR ']) + _random_query(rnd, depth + 1)
+
+
+def _mutate(rnd: random.Random, query: str) -> str:
+    chars = list(query)
+    for _ in range(rnd.randint(1, 3)):
+        position = rnd.randint(0, len(chars))
+        if rnd.random() < 0.6 or len(chars) == 0:
+            chars.insert(position, rnd.choice(_INSERTED))
+        else:
+            del chars[min(position, len(chars) - 1)]
+    return ''.join(chars)
+
+
+def _random_queries(n: int, seed: int):
+    rnd = random.Random(seed)
+    queries = [_random_query(rnd) for _ in range(n)]
+    return [_mutate(rnd, query) if rnd.random() < 0.5 else query for query in queries]
+
+
+def test_token_pattern_matches_grammar_lexer():
+    rnd = random.Random(7)
+    for _ in range(3000):
+        query = ''.join(rnd.choice(_LEXER_ALPHABET) for _ in range(rnd.randint(1, 12)))
+        assert RecursiveDescentParser._tokenize(query) == _antlr_tokens(query), query
+
+
+@pytest.mark.parametrize('query', VALID_QUERIES)
+def test_valid_query_is_parsed_as_by_antlr(query):
+    parsed = RecursiveDescentParser(query).parse()
+    assert parsed is not None
+    assert _tree(parsed) == _antlr_tree(query)
+    assert _tree(parse_boolean_query(query)) == _tree(parsed)
+
+
+@pytest.mark.parametrize('query', INVALID_QUERIES)
+def test_invalid_query_is_rejected(query):
+    assert RecursiveDescentParser(query).parse() is None
+    with pytest.raises(ValueError):
+        parse_boolean_query(query)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_random_queries_are_parsed_as_by_antlr(seed):
+    for query in _random_queries(1000, seed):
+        parsed, expected = RecursiveDescentParser(query).parse(), _antlr_tree(query)
+        if parsed is not None:
+            # Every query accepted by the recursive descent parser is accepted by ANTLR with the same tree
+            assert _tree(parsed) == expected, query
+        elif expected is ValueError:
+            # Rejected queries fall back to the ANTLR parser which still reports the error
+            with pytest.raises(ValueError):
+                parse_boolean_query(query)
+        else:
+            assert _tree(parse_boolean_query(query)) == expected, query
@@ -0,0 +1,145 @@
+import pytest
+
+from src.preprocessing.boolean.boolean_parser import BooleanOperator, QueryItem
+from src.search_model.boolean_planner import PlanOperator, QueryPlanner
+
+N_DOCS = 100
+DOCUMENT_FREQUENCIES = {'rare': 2, 'medium': 10, 'common': 50, 'frequent': 80}
+
+
+class Segment:
+    """
+    Segment of which the planner only checks whether it stores positions
+    """
+
+    def __init__(self, positional: bool):
+        self.positional = positional
+
+
+class Snapshot:
+    """
+    Snapshot with fixed document frequencies, terms not in the dictionary are in no live document
+    """
+
+    def __init__(self, positional: bool = True):
+        self.n_docs = N_DOCS
+        self.segments = [Segment(True), Segment(positional)]
+
+    @staticmethod
+    def document_frequency(term: str) -> int:
+        return DOCUMENT_FREQUENCIES.get(term, 0)
+
+
+def _and(*items):
+    return QueryItem(list(items), BooleanOperator.AND)
+
+
+def _or(*items):
+    return QueryItem(list(items), BooleanOperator.OR)
+
+
+def _not(item):
+    return QueryItem([item], BooleanOperator.NOT)
+
+
+def _plan(query):
+    return QueryPlanner(Snapshot()).plan(query)
+
+
+def _terms(nodes):
+    return [node.term for node in nodes]
+
+
+def test_and_operands_are_ordered_by_document_frequency():
+    plan = _plan(_and('frequent', 'rare', 'common', 'medium'))
+    assert plan.operator == PlanOperator.AND
+    assert _terms(plan.children) == ['rare', 'medium', 'common', 'frequent']
+    assert plan.estimate == round(N_DOCS * 0.02 * 0.1 * 0.5 * 0.8)
+
+
+def test_or_operands_are_ordered_by_descending_document_frequency():
+    plan = _plan(_or('rare', 'frequent', 'medium'))
+    assert plan.operator == PlanOperator.OR
+    assert _terms(plan.children) == ['frequent', 'medium', 'rare']
+    assert plan.estimate == round(N_DOCS * (1 - 0.98 * 0.2 * 0.9))
+
+
+def test_nested_operators_are_flattened():
+    plan = _plan(_and('common', _and('medium', _and('rare', 'frequent'))))
+    assert plan.operator == PlanOperator.AND
+    assert _terms(plan.children) == ['rare', 'medium', 'common', 'frequent']
+
+    plan = _plan(_or(_or('rare', 'medium'), _or('common', _or('frequent'))))
+    assert plan.operator == PlanOperator.OR
+    assert _terms(plan.children) == ['frequent', 'common', 'medium', 'rare']
+
+    # Different operators are not flattened
+    plan = _plan(_and('rare', _or('medium', 'common')))
+    assert [child.operator for child in plan.children] == [PlanOperator.TERM, PlanOperator.OR]
+
+
+def test_duplicate_operands_are_removed():
+    plan = _plan(_and('medium', 'rare', 'medium', _and('rare')))
+    assert _terms(plan.children) == ['rare', 'medium']
+    assert _plan(_or('medium', 'medium')).term == 'medium'
+    # Operands equal up to their order are duplicates
+    plan = _plan(_or(_and('rare', 'medium'), _and('medium', 'rare'), 'common'))
+    assert len(plan.children) == 2
+
+
+def test_and_not_is_rewritten_to_difference():
+    plan = _plan(_and('medium', _not('frequent'), 'rare', _not('common')))
+    assert plan.operator == PlanOperator.AND_NOT
+    assert _terms(plan.children) == ['rare', 'medium']
+    # The largest excluded operand is subtracted first
+    assert _terms(plan.excluded) == ['frequent', 'common']
+    assert plan.estimate == round(N_DOCS * 0.02 * 0.1 * 0.2 * 0.5)
+    assert plan.to_dict()['operator'] == 'AND_NOT' and len(plan.to_dict()['excluded']) == 2
+
+    # Exclusions of a nested AND NOT are merged to the outer one
+    nested = _plan(_and(_and('rare', _not('common')), 'medium', _not('frequent')))
+    assert nested.key == plan.key
+
+
+@pytest.mark.parametrize('query, expected', [
+    (_and('rare', _not('rare')), PlanOperator.EMPTY),
+    (_and('rare', 'missing'), PlanOperator.EMPTY),
+    (_or('missing', 'unknown'), PlanOperator.EMPTY),
+    (_not('missing'), PlanOperator.ALL),
+    (_or('rare', _not('missing')), PlanOperator.ALL),
+    (_and(), PlanOperator.EMPTY),
+])
+def test_trivial_queries_are_folded(query, expected):
+    assert _plan(query).operator == expected
+
+
+def test_missing_terms_are_folded_away():
+    plan = _plan(_or('rare', 'missing', 'medium'))
+    assert _terms(plan.children) == ['medium', 'rare']
+    assert _plan(_and('rare', _not('missing'))).term == 'rare'
+
+
+def test_negations():
+    plan = _plan(_not('common'))
+    assert plan.operator == PlanOperator.NOT and plan.estimate == N_DOCS - 50
+    # Double negation is the operand itself
+    assert _plan(_not(_not('common'))).term == 'common'
+    # NOT a AND NOT b is NOT (a OR b)
+    plan = _plan(_and(_not('rare'), _not('medium')))
+    assert plan.operator == PlanOperator.NOT and plan.children[0].operator == PlanOperator.OR
+    assert _terms(plan.children[0].children) == ['medium', 'rare']
+
+
+def test_phrase_and_near():
+    phrase = _plan(QueryItem(['common', 'rare'], BooleanOperator.PHRASE))
+    # Terms of a phrase keep their order
+    assert phrase.operator == PlanOperator.PHRASE and _terms(phrase.children) == ['common', 'rare']
+    assert phrase.key != _plan(QueryItem(['rare', 'common'], BooleanOperator.PHRASE)).key
+    assert _plan(QueryItem(['common', 'missing'], BooleanOperator.PHRASE)).operator == PlanOperator.EMPTY
+
+    near = _plan(QueryItem(['common', 'rare'], BooleanOperator.NEAR, 3))
+    assert near.operator == PlanOperator.NEAR and near.distance == 3
+    assert _terms(near.children) == ['rare', 'common']
+
+    with pytest.raises(ValueError):
+        QueryPlanner(Snapshot(positional=False)).plan(QueryItem(['common', 'rare'], BooleanOperator.PHRASE))
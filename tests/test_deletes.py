@@ -0,0 +1,96 @@
+import threading
+import time
+
+import pytest
+
+from src.api.dtos import DocumentDto
+from src.index.index import Index
+from src.index.index_config import IndexConfig
+from tests.helpers import WhitespacePreprocessor
+
+BATCHES = [
+    {'d0': 'apple banana', 'd1': 'apple cherry', 'd2': 'banana'},
+    {'d3': 'apple durian', 'd4': 'cherry cherry'},
+]
+DELETED = ['d1', 'd3']
+
+
+class ManualMergePolicy:
+    """
+    Merge policy that merges all segments once a merge is requested, so the test decides when the deleted
+    documents are purged
+    """
+
+    def __init__(self):
+        self._requested = False
+        self._lock = threading.Lock()
+
+    def request_merge(self):
+        with self._lock:
+            self._requested = True
+
+    def find_merge(self, segments):
+        with self._lock:
+            requested, self._requested = self._requested, False
+        return list(range(len(segments))) if requested and len(segments) > 0 else None
+
+
+@pytest.fixture
+def index():
+    merge_policy = ManualMergePolicy()
+    index = Index(IndexConfig('deletes', WhitespacePreprocessor()), [], merge_policy=merge_policy,
+                  result_cache_size=0)
+    for batch in BATCHES:
+        index.add_batch([index.preprocess_document(DocumentDto(id=document_id, text=text, title=None,
+                                                               additionalProperties={}))
+                         for document_id, text in batch.items()])
+    index.delete_batch(DELETED)
+    yield index
+    index.close()
+
+
+def _merge(index: Index):
+    index.merge_policy.request_merge()
+    index.merge_segments()
+    # The background merge thread may have taken the requested merge
+    deadline = time.monotonic() + 10
+    while len(index.segments) > 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def _ids(results):
+    return sorted(document.id for _, document in results)
+
+
+def _assert_deleted_documents_are_excluded(index: Index):
+    snapshot = index.snapshot()
+    assert snapshot.n_docs == 3
+    assert snapshot.average_document_length == pytest.approx(5 / 3)
+    assert {term: snapshot.document_frequency(term) for term in ['apple', 'banana', 'cherry', 'durian']} == \
+           {'apple': 1, 'banana': 2, 'cherry': 1, 'durian': 0}
+    assert snapshot.n_terms == 3  # durian is only in a deleted document
+    assert sorted(index.documents) == ['d0', 'd2', 'd4']
+    assert all(document_id not in index.documents for document_id in DELETED)
+
+    for model in ['bm25', 'tfidf']:
+        results, total = index.models[model].search('apple cherry durian', 10, snapshot=snapshot)
+        assert _ids(results) == ['d0', 'd4'] and total == 2
+    results, _, total, _ = index.models['bool'].search('apple OR durian', snapshot=snapshot)
+    assert [document.id for document in results] == ['d0'] and total == 1
+    return index.models['bm25'].search('apple cherry banana', 10, snapshot=snapshot)[0]
+
+
+def test_deleted_documents_are_excluded_before_and_after_merge(index):
+    assert len(index.segments) == 2
+    assert all(segment.live_docs is not None for segment in index.segments)
+    before = _assert_deleted_documents_are_excluded(index)
+
+    _merge(index)
+    assert len(index.segments) == 1
+    merged = index.segments[0]
+    # Deleted documents are purged by the merge
+    assert len(merged) == 3 and merged.live_docs is None and merged.deleted_frequencies == {}
+    after = _assert_deleted_documents_are_excluded(index)
+    # Statistics of the live documents do not change by purging the deleted ones
+    assert [document.id for _, document in after] == [document.id for _, document in before]
+    assert [score for score, _ in after] == pytest.approx([score for score, _ in before])
@@ -0,0 +1,144 @@
+import io
+import json
+import os
+
+import pytest
+
+from src.index import ingest_job
+from src.index.index import Index, add_index, delete_index
+from src.index.index_config import IndexConfig
+from src.index.ingest_job import IngestJob, JobStatus, cancel_job, get_job, load_jobs, resume_job, submit_job
+from tests.helpers import WhitespacePreprocessor
+
+INDEX_NAME = 'ingest-job-test'
+N_DOCUMENTS = 10
+BATCH_SIZE = 3
+# Every other document has no id, its id is derived from the position in the file
+DOCUMENTS = [dict({'text': f'document number {i}'}, **({'id': f'd{i}'} if i % 2 == 0 else {}))
+             for i in range(N_DOCUMENTS)]
+
+
+def _ndjson(documents) -> bytes:
+    return ''.join(json.dumps(document) + '\n' for document in documents).encode('utf-8')
+
+
+def _array(documents) -> bytes:
+    return json.dumps(documents).encode('utf-8')
+
+
+class ImmediateExecutor:
+    """
+    Executor running the jobs in the submitting thread, so a job is finished once it is submitted or resumed
+    """
+
+    @staticmethod
+    def submit(function, *args):
+        function(*args)
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest_job, '_jobs', {})
+    monkeypatch.setattr(ingest_job, '_job_executor', ImmediateExecutor())
+    monkeypatch.setattr(ingest_job, '_jobs_directory', str(tmp_path))
+    index = Index(IndexConfig(INDEX_NAME, WhitespacePreprocessor()), [], result_cache_size=0)
+    add_index(INDEX_NAME, index)
+    yield index
+    delete_index(INDEX_NAME)
+
+
+def _saved_state(job: IngestJob) -> dict:
+    with open(job.state_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _cancel_after_first_batch(index: Index, monkeypatch):
+    """
+    Cancels the job once its first batch is indexed, so it stops before the second one
+    """
+    add_json_batch = index.add_json_batch
+
+    def add_and_cancel(documents):
+        count = add_json_batch(documents)
+        monkeypatch.setattr(index, 'add_json_batch', add_json_batch)
+        cancel_job(ingest_job.get_all_jobs()[0].id)
+        return count
+
+    monkeypatch.setattr(index, 'add_json_batch', add_and_cancel)
+
+
+def _indexed_texts(index: Index):
+    return sorted(document.text for document in index.snapshot().documents())
+
+
+@pytest.mark.parametrize('data', [_ndjson(DOCUMENTS), _array(DOCUMENTS)], ids=['ndjson', 'array'])
+def test_job_indexes_all_documents(index, data):
+    job = submit_job(INDEX_NAME, io.BytesIO(data), 'documents.json', batch_size=BATCH_SIZE)
+
+    assert job.status == JobStatus.COMPLETED and job.error is None
+    assert job.documents_done == N_DOCUMENTS and job.bytes_done == job.total_bytes == len(data)
+    assert _indexed_texts(index) == sorted(document['text'] for document in DOCUMENTS)
+    assert all(f'd{i}' in index.documents for i in range(0, N_DOCUMENTS, 2))
+    assert _saved_state(job)['status'] == JobStatus.COMPLETED.value
+    assert not os.path.exists(job.upload_path)  # the upload of a completed job is removed
+
+
+@pytest.mark.parametrize('data, is_array', [(_ndjson(DOCUMENTS), False), (_array(DOCUMENTS), True)],
+                         ids=['ndjson', 'array'])
+def test_cancelled_job_resumes_from_checkpoint(index, monkeypatch, data, is_array):
+    _cancel_after_first_batch(index, monkeypatch)
+    job = submit_job(INDEX_NAME, io.BytesIO(data), 'documents.json', batch_size=BATCH_SIZE)
+
+    assert job.status == JobStatus.CANCELLED
+    assert job.documents_done == BATCH_SIZE and len(index.documents) == BATCH_SIZE
+    # Documents outside of an array are resumed after the last indexed one, arrays are parsed from the beginning
+    expected_offset = None if is_array else len(_ndjson(DOCUMENTS[:BATCH_SIZE])) - 1
+    assert job.resume_offset == expected_offset
+    assert _saved_state(job)['resume_offset'] == expected_offset
+    assert os.path.exists(job.upload_path)
+    with pytest.raises(ValueError):
+        cancel_job(job.id)
+
+    job = resume_job(job.id, batch_size=BATCH_SIZE)
+    assert job.status == JobStatus.COMPLETED
+    assert job.documents_done == N_DOCUMENTS
+    # Documents without id get the same id when they are indexed again, so nothing is indexed twice
+    assert _indexed_texts(index) == sorted(document['text'] for document in DOCUMENTS)
+    with pytest.raises(ValueError):
+        resume_job(job.id)
+
+
+def test_interrupted_job_resumes_from_checkpointed_offset(index, tmp_path, monkeypatch):
+    data = _ndjson(DOCUMENTS)
+    checkpoint = len(_ndjson(DOCUMENTS[:4])) - 1
+    job = IngestJob(job_id='8a4f1d2e-5c3b-4e6f-9a7d-0b1c2d3e4f50', index_name=INDEX_NAME, filename='documents.json',
+                    total_bytes=len(data), documents_done=4, bytes_done=checkpoint, resume_offset=checkpoint,
+                    status=JobStatus.RUNNING)
+    with open(job.upload_path, 'wb') as f:
+        f.write(data)
+    job._save_state()
+
+    # The application stopped while the job was running
+    monkeypatch.setattr(ingest_job, '_jobs', {})
+    assert load_jobs(str(tmp_path)) == [job.id]
+    job = get_job(job.id)
+    assert job.status == JobStatus.INTERRUPTED and job.resume_offset == checkpoint
+
+    job = resume_job(job.id, batch_size=BATCH_SIZE)
+    assert job.status == JobStatus.COMPLETED and job.documents_done == N_DOCUMENTS
+    # Parsing continued from the offset, the documents before it were indexed by the interrupted run
+    assert _indexed_texts(index) == sorted(document['text'] for document in DOCUMENTS[4:])
+
+
+def test_failed_job_keeps_indexed_batches(index):
+    data = _ndjson(DOCUMENTS[:BATCH_SIZE]) + b'{"text": "unterminated'
+    job = submit_job(INDEX_NAME, io.BytesIO(data), 'documents.json', batch_size=BATCH_SIZE)
+
+    assert job.status == JobStatus.FAILED and 'Invalid JSON' in job.error
+    assert job.documents_done == BATCH_SIZE and len(index.documents) == BATCH_SIZE
+    assert _saved_state(job)['status'] == JobStatus.FAILED.value
+
+
+def test_submit_to_missing_index_raises(index):
+    with pytest.raises(ValueError):
+        submit_job('missing-index', io.BytesIO(_ndjson(DOCUMENTS)), 'documents.json')
@@ -0,0 +1,137 @@
+import codecs
+import gzip
+import io
+import json
+
+import pytest
+
+from src.index import json_stream
+from src.index.json_stream import JsonDocuments, batched, iter_json_documents
+
+DOCUMENTS = [{'id': f'd{i}', 'text': f'Příliš žluťoučký kůň {i} ' + 'x' * (i * 7), 'rank': i * 1.5}
+             for i in range(12)]
+
+
+def _ndjson(documents) -> bytes:
+    return ''.join(json.dumps(document, ensure_ascii=False) + '\n' for document in documents).encode('utf-8')
+
+
+def _array(documents) -> bytes:
+    return json.dumps(documents, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+class NonSeekable(io.RawIOBase):
+    """
+    Binary stream that cannot seek, e.g. a socket
+    """
+
+    def __init__(self, data: bytes):
+        self._data = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._data.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+@pytest.fixture(params=[json_stream.READ_SIZE, 5], ids=['default-reads', 'small-reads'])
+def read_size(request, monkeypatch):
+    # Small reads split the values, multi-byte characters and numbers between the blocks
+    monkeypatch.setattr(json_stream, 'READ_SIZE', request.param)
+    return request.param
+
+
+@pytest.mark.parametrize('data', [
+    _array(DOCUMENTS),
+    _ndjson(DOCUMENTS),
+    b' \n' + _ndjson(DOCUMENTS).replace(b'\n', b' \r\n\t') + b'\n\n',
+    codecs.BOM_UTF8 + _array(DOCUMENTS),
+    codecs.BOM_UTF8 + _ndjson(DOCUMENTS),
+    gzip.compress(_array(DOCUMENTS)),
+    gzip.compress(codecs.BOM_UTF8 + _ndjson(DOCUMENTS)),
+], ids=['array', 'ndjson', 'ndjson-whitespace', 'array-bom', 'ndjson-bom', 'array-gzip', 'ndjson-bom-gzip'])
+def test_documents_are_parsed(read_size, data):
+    assert list(iter_json_documents(io.BytesIO(data))) == DOCUMENTS
+
+
+@pytest.mark.parametrize('data, expected', [
+    (b'[]', []),
+    (b' [ ] ', []),
+    (b'', []),
+    (b'{"text": "single"}', [{'text': 'single'}]),
+    (b'{"n": 12345}', [{'n': 12345}]),
+])
+def test_empty_and_single_document(read_size, data, expected):
+    assert list(iter_json_documents(io.BytesIO(data))) == expected
+
+
+@pytest.mark.parametrize('data', [
+    b'[{"text": "a"}, 1]',
+    b'[{"text": "a"} {"text": "b"}]',
+    b'[{"text": "a"}] {"text": "b"}',
+    b'[{"text": "a"}',
+    b'{"text": "a"}\n{"text": ',
+    b'{"text": "a"}\n"text"',
+])
+def test_invalid_json_raises_value_error(read_size, data):
+    with pytest.raises(ValueError):
+        list(iter_json_documents(io.BytesIO(data)))
+
+
+def test_is_array_is_known_once_iterated():
+    documents = JsonDocuments(io.BytesIO(_array(DOCUMENTS)))
+    assert documents.is_array is None
+    next(iter(documents))
+    assert documents.is_array is True
+
+    documents = JsonDocuments(io.BytesIO(_ndjson(DOCUMENTS)))
+    next(iter(documents))
+    assert documents.is_array is False
+
+
+@pytest.mark.parametrize('bom', [b'', codecs.BOM_UTF8], ids=['plain', 'bom'])
+@pytest.mark.parametrize('compress', [False, True], ids=['raw', 'gzip'])
+def test_parsing_resumes_from_offset(read_size, bom, compress):
+    data = bom + _ndjson(DOCUMENTS)
+    documents = JsonDocuments(io.BytesIO(gzip.compress(data) if compress else data))
+    offsets = []
+    for document in documents:
+        offsets.append(documents.offset)
+
+    # Offsets count bytes of the decompressed file including the byte order mark, the newline after a document
+    # is not consumed
+    line_ends = [len(bom) + len(_ndjson(DOCUMENTS[:position + 1])) - 1 for position in range(len(DOCUMENTS))]
+    assert offsets == line_ends
+    for position, offset in enumerate(offsets):
+        remaining = JsonDocuments(io.BytesIO(gzip.compress(data) if compress else data), offset)
+        assert list(remaining) == DOCUMENTS[position + 1:]
+
+
+def test_offset_requires_seekable_file():
+    with pytest.raises(ValueError):
+        list(JsonDocuments(NonSeekable(_ndjson(DOCUMENTS)), 10))
+    with pytest.raises(ValueError):
+        list(JsonDocuments(NonSeekable(gzip.compress(_ndjson(DOCUMENTS)))))
+    assert list(JsonDocuments(NonSeekable(_ndjson(DOCUMENTS)))) == DOCUMENTS
+
+
+def test_document_larger_than_max_size_raises(monkeypatch):
+    monkeypatch.setattr(json_stream, 'READ_SIZE', 16)
+    monkeypatch.setattr(json_stream, 'MAX_DOCUMENT_SIZE', 100)
+    small = {'text': 'a' * 50}
+    assert list(iter_json_documents(io.BytesIO(_ndjson([small] * 3)))) == [small] * 3
+
+    data = _ndjson([small, {'text': 'a' * 500}])
+    documents = iter_json_documents(io.BytesIO(data))
+    assert next(documents) == small
+    with pytest.raises(ValueError, match='larger than 100 characters'):
+        next(documents)
+
+
+def test_batched():
+    assert list(batched(range(7), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert list(batched(range(6), 3)) == [[0, 1, 2], [3, 4, 5]]
+    assert list(batched([], 3)) == []
@@ -0,0 +1,125 @@
+import random
+
+import pytest
+
+from src.index import posting_blocks
+from src.index.posting_blocks import POSTING_BLOCK_SIZE, PostingBlocks
+from src.index.varint import decode_deltas, decode_varints, encode_deltas, encode_varints
+
+N_DOCS = 200000
+
+
+@pytest.mark.parametrize('values', [
+    [],
+    [0, 1, 127],
+    [128, 255, 300, 16383, 16384, 2 ** 21, 2 ** 31 - 1, 2 ** 40],
+    list(range(0, 1000, 7)),
+])
+def test_varint_round_trip(values):
+    data = encode_varints(values)
+    assert decode_varints(data) == values
+    assert decode_varints(memoryview(data)) == values
+
+
+def test_varint_lengths():
+    assert encode_varints([127]) == b'\x7f'
+    assert encode_varints([128]) == b'\x80\x01'
+    assert encode_varints([300]) == b'\xac\x02'
+    assert len(encode_varints([2 ** 21 - 1, 2 ** 21])) == 3 + 4
+
+
+@pytest.mark.parametrize('values', [[], [0], [5, 5, 6], [3, 200, 201, 70000, 2 ** 32]])
+def test_delta_round_trip(values):
+    data = encode_deltas(values)
+    assert decode_deltas(data) == values
+    assert decode_deltas(bytes(data)) == values
+
+
+def _posting_list(rnd: random.Random, length: int, max_gap: int):
+    docnos, docno = [], -1
+    for _ in range(length):
+        docno += rnd.randint(1, max_gap)
+        docnos.append(docno)
+    return docnos, [rnd.choice([1, 2, 3, 300, 70000]) for _ in range(length)]
+
+
+@pytest.fixture(params=[True, False], ids=['numpy', 'python'])
+def prefix_sums(request, monkeypatch):
+    if request.param:
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(posting_blocks, 'np', None)
+
+
+@pytest.fixture(scope='module')
+def posting_lists():
+    rnd = random.Random(3)
+    lengths = [1, POSTING_BLOCK_SIZE - 1, POSTING_BLOCK_SIZE, POSTING_BLOCK_SIZE + 1, 5 * POSTING_BLOCK_SIZE + 17]
+    # Small gaps pack the deltas to a single byte, large ones to two and four bytes
+    return [_posting_list(rnd, length, max_gap) for length in lengths for max_gap in (3, 300, 30000)
+            if length * max_gap < N_DOCS]
+
+
+@pytest.fixture(scope='module')
+def document_lengths():
+    rnd = random.Random(5)
+    return [rnd.randint(1, 1000) for _ in range(N_DOCS)]
+
+
+def _build(posting_lists, document_lengths):
+    blocks = PostingBlocks()
+    first_blocks = [blocks.append(docnos, term_frequencies, document_lengths)
+                    for docnos, term_frequencies in posting_lists]
+    return blocks, first_blocks
+
+
+def test_posting_lists_round_trip(prefix_sums, posting_lists, document_lengths):
+    blocks, first_blocks = _build(posting_lists, document_lengths)
+    assert len(blocks) == sum((len(docnos) + POSTING_BLOCK_SIZE - 1) // POSTING_BLOCK_SIZE
+                              for docnos, _ in posting_lists)
+    assert blocks.size_in_bytes() == len(blocks.data) + 8 * (len(blocks) + 1) + 12 * len(blocks)
+    for (docnos, term_frequencies), first_block in zip(posting_lists, first_blocks):
+        decoded_docnos, decoded_term_frequencies = blocks.decode(first_block, len(docnos))
+        assert list(decoded_docnos) == docnos
+        assert list(decoded_term_frequencies) == term_frequencies
+
+
+def test_blocks_decode_and_bound_their_postings(posting_lists, document_lengths):
+    blocks, first_blocks = _build(posting_lists, document_lengths)
+    for (docnos, term_frequencies), first_block in zip(posting_lists, first_blocks):
+        for start in range(0, len(docnos), POSTING_BLOCK_SIZE):
+            block = first_block + start // POSTING_BLOCK_SIZE
+            block_docnos = docnos[start:start + POSTING_BLOCK_SIZE]
+            block_term_frequencies = term_frequencies[start:start + POSTING_BLOCK_SIZE]
+            decoded_docnos, decoded_term_frequencies = blocks.decode_block(first_block, len(docnos), block)
+            assert list(decoded_docnos) == block_docnos
+            assert list(decoded_term_frequencies) == block_term_frequencies
+            assert blocks.block_lasts[block] == block_docnos[-1]
+            assert blocks.block_max_tfs[block] == max(block_term_frequencies)
+            assert blocks.block_min_lengths[block] == min(document_lengths[docno] for docno in block_docnos)
+
+
+def test_find_uses_skip_pointers(posting_lists, document_lengths):
+    blocks, first_blocks = _build(posting_lists, document_lengths)
+    for (docnos, _), first_block in zip(posting_lists, first_blocks):
+        positions = {docno: position for position, docno in enumerate(docnos)}
+        for docno in docnos[::7] + [docnos[-1], docnos[0] - 1, docnos[-1] + 1, docnos[-1] + 1000]:
+            assert blocks.find(first_block, len(docnos), docno) == positions.get(docno, -1)
+        # Docnos between the postings are not found
+        gaps = [docno + 1 for docno in docnos[:-1:5] if docno + 1 not in positions]
+        assert all(blocks.find(first_block, len(docnos), docno) == -1 for docno in gaps)
+
+
+def test_copied_blocks_decode_the_same(prefix_sums, posting_lists, document_lengths):
+    blocks, first_blocks = _build(posting_lists, document_lengths)
+    # Copy to a store that already has blocks, so the offsets are shifted, from a read-only view of the data
+    source = PostingBlocks(memoryview(bytes(blocks.data)), blocks.block_offsets, blocks.block_lasts,
+                           blocks.block_max_tfs, blocks.block_min_lengths)
+    copy, _ = _build(posting_lists[:1], document_lengths)
+    for (docnos, term_frequencies), first_block in reversed(list(zip(posting_lists, first_blocks))):
+        n_blocks = (len(docnos) + POSTING_BLOCK_SIZE - 1) // POSTING_BLOCK_SIZE
+        copied_block = copy.copy_blocks(source, first_block, n_blocks)
+        decoded_docnos, decoded_term_frequencies = copy.decode(copied_block, len(docnos))
+        assert list(decoded_docnos) == docnos and list(decoded_term_frequencies) == term_frequencies
+        assert list(copy.block_max_tfs[copied_block:]) == list(blocks.block_max_tfs[first_block:first_block + n_blocks])
+        assert copy.find(copied_block, len(docnos), docnos[-1]) == len(docnos) - 1
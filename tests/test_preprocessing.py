@@ -0,0 +1,77 @@
+import itertools
+import json
+import os
+
+import nltk
+import pytest
+
+from nltk_dependencies import nltk_resources_dir
+from src.preprocessing.preprocessing import Preprocessor, PreprocessorConfig
+
+DOCS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'resources', 'docs')
+CORPORA = ['czech_documents.json', 'english_documents.json']
+
+# lang, use_stemmer, remove_accents_before_stemming, remove_accents_after_stemming, lowercase, remove_stopwords
+CONFIGURATIONS = list(itertools.product(['en', 'cs'], [True, False], [True, False], [True, False], [True, False],
+                                        [True, False]))
+
+
+@pytest.fixture(scope='module')
+def nltk_resources():
+    """
+    Makes the NLTK resources installed by nltk_dependencies.py visible to NLTK, tests never download them
+    """
+    if nltk_resources_dir not in nltk.data.path:
+        nltk.data.path.append(nltk_resources_dir)
+
+
+def _require_nltk_resources(*resources: str):
+    """
+    Skips the test if any of the NLTK resources is not installed
+    """
+    for resource in resources:
+        try:
+            nltk.data.find(resource)
+        except LookupError:
+            pytest.skip(f'NLTK resource {resource} is not installed, run nltk_dependencies.py')
+
+
+def _texts():
+    texts = []
+    for corpus in CORPORA:
+        with open(os.path.join(DOCS_DIR, corpus), 'r', encoding='utf8') as file:
+            texts.extend(document['text'] for document in json.load(file))
+    return texts
+
+
+def _config(lang, use_stemmer, remove_accents_before, remove_accents_after, lowercase, remove_stopwords,
+            compiled_pipeline):
+    return PreprocessorConfig(lowercase=lowercase, remove_accents_before_stemming=remove_accents_before,
+                              remove_punctuation=True, remove_stopwords=remove_stopwords, use_stemmer=use_stemmer,
+                              lang=lang, remove_accents_after_stemming=remove_accents_after,
+                              compiled_pipeline=compiled_pipeline)
+
+
+@pytest.mark.parametrize('configuration', CONFIGURATIONS)
+def test_compiled_pipeline_matches_word_tokenize(nltk_resources, configuration):
+    lang, use_stemmer, remove_stopwords = configuration[0], configuration[1], configuration[5]
+    resources = ['tokenizers/punkt_tab']
+    if remove_stopwords:
+        resources.append('corpora/stopwords')
+    if lang == 'en' and not use_stemmer:
+        resources.append('corpora/wordnet')
+    _require_nltk_resources(*resources)
+
+    preprocessor = Preprocessor(_config(*configuration, compiled_pipeline=False))
+    compiled = Preprocessor(_config(*configuration, compiled_pipeline=True))
+    for text in _texts():
+        assert compiled.get_tokens(text) == preprocessor.get_tokens(text), text
+        assert compiled.get_tokens(text, return_detected_stopwords=True) == \
+               preprocessor.get_tokens(text, return_detected_stopwords=True), text
+
+
+def test_compiled_pipeline_requires_punctuation_removal():
+    with pytest.raises(ValueError):
+        PreprocessorConfig(lowercase=True, remove_accents_before_stemming=False, remove_punctuation=False,
+                           remove_stopwords=False, use_stemmer=True, lang='en', remove_accents_after_stemming=False,
+                           compiled_pipeline=True)
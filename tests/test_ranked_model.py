@@ -0,0 +1,33 @@
+import pytest
+
+from src.index.index import Index
+from src.index.index_config import IndexConfig
+from src.search_model.bm25_model import Bm25Model
+from src.search_model.ranked_model import RankedModel
+from src.search_model.vectorized import NUMPY_BACKEND, PYTHON_BACKEND
+from tests.helpers import WhitespacePreprocessor
+
+
+class CountModel(RankedModel):
+    """
+    Model scoring documents by the number of occurrences of the query terms, it does not support vectorized scoring
+    """
+
+    def _query_weights(self, term_counts, snapshot):
+        return term_counts
+
+    def _term_contributions(self, term, weight, term_info, context, snapshot):
+        return [weight * tf for tf in term_info.term_frequencies]
+
+
+def test_model_without_vectorized_support_falls_back_to_python_backend():
+    pytest.importorskip('numpy')
+    index = Index(IndexConfig('fallback', WhitespacePreprocessor()), [], result_cache_size=0)
+    try:
+        assert not CountModel.supports_vectorized and Bm25Model.supports_vectorized
+        assert Bm25Model(index, WhitespacePreprocessor(), backend=NUMPY_BACKEND).backend == NUMPY_BACKEND
+        model = CountModel(index, WhitespacePreprocessor(), backend=NUMPY_BACKEND)
+        assert model.backend == PYTHON_BACKEND
+        assert model.search('a b', 10) == ([], 0)
+    finally:
+        index.close()
@@ -0,0 +1,99 @@
+import random
+
+import pytest
+
+from src.api.dtos import DocumentDto
+from src.index.index import Index
+from src.index.index_config import IndexConfig
+from src.preprocessing.preprocessing import PreprocessorConfig
+from tests.helpers import WhitespacePreprocessor
+
+N_DOCUMENTS = 3000
+BATCH_SIZE = 400
+
+
+def _vocabulary(rnd: random.Random):
+    return [''.join(rnd.choice('abcdefghijklmnoprstuv') for _ in range(rnd.randint(3, 8))) for _ in range(1500)]
+
+
+def _build_index(rnd: random.Random, vocabulary):
+    index = Index(IndexConfig('pruning', WhitespacePreprocessor()), [], result_cache_size=0)
+    # Zipf distributed terms give long posting lists spanning many blocks as well as rare terms
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    documents = [DocumentDto(id=f'd{i}', text=' '.join(rnd.choices(vocabulary, weights, k=rnd.randint(5, 150))),
+                             title=None, additionalProperties={}) for i in range(N_DOCUMENTS)]
+    for start in range(0, N_DOCUMENTS, BATCH_SIZE):
+        index.add_batch([index.preprocess_document(document) for document in documents[start:start + BATCH_SIZE]])
+    index.delete_batch([document.id for document in rnd.sample(documents, 300)])
+    # Identical documents create ties that are broken by the position of the document
+    duplicates = [DocumentDto(id=f'dup{i}', text=' '.join(vocabulary[:5]), title=None, additionalProperties={})
+                  for i in range(150)]
+    index.add_batch([index.preprocess_document(document) for document in duplicates])
+    return index
+
+
+def _queries(rnd: random.Random, vocabulary):
+    queries = [' '.join(rnd.choices(vocabulary[:300], k=rnd.randint(1, 6))) for _ in range(25)]
+    queries += [' '.join(rnd.choices(vocabulary, k=10)) for _ in range(5)]
+    queries += [vocabulary[0], ' '.join(vocabulary[:5]), ' '.join(vocabulary[:5]) + ' ' + vocabulary[0]]
+    return queries
+
+
+@pytest.fixture(scope='module')
+def index_and_queries():
+    rnd = random.Random(42)
+    vocabulary = _vocabulary(rnd)
+    index = _build_index(rnd, vocabulary)
+    yield index, _queries(rnd, vocabulary)
+    index.close()
+
+
+def _assert_same_top_k(index: Index, queries):
+    model, snapshot = index.models['bm25'], index.snapshot()
+    try:
+        for query in queries:
+            for top_n, offset in ((1, 0), (10, 0), (10, 5), (100, 20), (N_DOCUMENTS, 0)):
+                model.pruning = True
+                pruned, pruned_total = model.search(query, top_n, snapshot=snapshot, offset=offset)
+                model.pruning = False
+                exhaustive, exhaustive_total = model.search(query, top_n, snapshot=snapshot, offset=offset)
+                assert [(score, document.id) for score, document in pruned] == \
+                       [(score, document.id) for score, document in exhaustive], (query, top_n, offset)
+                assert pruned_total == exhaustive_total, (query, top_n, offset)
+    finally:
+        model.pruning = True
+
+
+def test_pruned_top_k_is_exhaustive_top_k(index_and_queries):
+    index, queries = index_and_queries
+    _assert_same_top_k(index, queries)
+
+
+def test_pruned_top_k_uses_block_maxima_of_segment_file(index_and_queries, tmp_path):
+    index, queries = index_and_queries
+    path = str(tmp_path / 'pruning.seg')
+    index.save(path)
+    opened = Index.open(path, IndexConfig('pruning', WhitespacePreprocessor()))
+    try:
+        for segment in opened.segments:
+            assert all(term_info.block_maxima() is not None for term_info in segment.postings.values())
+        _assert_same_top_k(opened, queries)
+    finally:
+        opened.close()
+
+
+def test_pruning_is_configured_by_the_index_config(index_and_queries, tmp_path):
+    index, _ = index_and_queries
+    path = str(tmp_path / 'exhaustive.seg')
+    index.save(path)
+    config = IndexConfig('exhaustive', WhitespacePreprocessor(), pruning=False)
+    preprocessor_config = PreprocessorConfig(lowercase=True, remove_accents_before_stemming=False,
+                                             remove_punctuation=True, remove_stopwords=False, use_stemmer=True,
+                                             lang='en', remove_accents_after_stemming=False)
+    assert IndexConfig.from_dict(dict(config.to_dict(), preprocessor=preprocessor_config.to_dict())).pruning is False
+    opened = Index.open(path, config)
+    try:
+        assert opened.models['bm25'].pruning is False
+        assert index.models['bm25'].pruning is True
+    finally:
+        opened.close()
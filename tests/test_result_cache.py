@@ -0,0 +1,65 @@
+from src.index.result_cache import ResultCache
+
+
+class Search:
+    """
+    Search function counting how many times it was computed
+    """
+
+    def __init__(self, result):
+        self.result = result
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.result
+
+
+def test_result_is_cached_within_generation():
+    cache, search = ResultCache(100), Search(['a', 'b'])
+    assert cache.get_or_compute(1, ('bm25', 'query'), search, len) == ['a', 'b']
+    assert cache.get_or_compute(1, ('bm25', 'query'), search, len) == ['a', 'b']
+    assert search.calls == 1
+
+    other = Search(['c'])
+    assert cache.get_or_compute(1, ('bm25', 'other'), other, len) == ['c']
+    stats = cache.stats()
+    assert (stats['entries'], stats['size'], stats['hits'], stats['misses'], stats['generation']) == (2, 3, 1, 2, 1)
+
+
+def test_new_generation_invalidates_results():
+    cache, search = ResultCache(100), Search(['a'])
+    cache.get_or_compute(1, 'query', search, len)
+    cache.get_or_compute(2, 'query', search, len)
+    assert search.calls == 2
+    assert cache.stats()['generation'] == 2 and cache.stats()['entries'] == 1
+
+    # A search of an older snapshot is computed but neither cached nor does it drop the newer results
+    old = Search(['old'])
+    assert cache.get_or_compute(1, 'query', old, len) == ['old']
+    assert cache.get_or_compute(1, 'query', old, len) == ['old']
+    assert old.calls == 2
+    assert cache.get_or_compute(2, 'query', search, len) == ['a'] and search.calls == 2
+
+
+def test_results_are_evicted_by_number_of_rows():
+    cache = ResultCache(3)
+    searches = [Search(['row'] * 2), Search([]), Search(['row'] * 2)]
+    for key, search in enumerate(searches):
+        cache.get_or_compute(1, key, search, len)
+    # Empty result costs one row, the oldest result was evicted to fit the last one
+    assert cache.stats()['entries'] == 2 and cache.stats()['size'] == 3
+    cache.get_or_compute(1, 0, searches[0], len)
+    assert searches[0].calls == 2
+
+    large = Search(['row'] * 4)
+    cache.get_or_compute(1, 'large', large, len)
+    cache.get_or_compute(1, 'large', large, len)
+    assert large.calls == 2  # larger than the whole cache
+
+
+def test_disabled_cache_always_computes():
+    cache, search = ResultCache(0), Search([])
+    cache.get_or_compute(1, 'query', search, len)
+    cache.get_or_compute(1, 'query', search, len)
+    assert search.calls == 2
@@ -0,0 +1,58 @@
+from src.index.lru_cache import LruCache
+from src.preprocessing.term_cache import TermCache
+
+
+class CountingNormalizer:
+    """
+    Normalizer that records the tokens it was called with
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, token: str) -> str:
+        self.calls.append(token)
+        return token.rstrip('s')
+
+
+def test_normalize_counts_hits_and_misses():
+    normalizer = CountingNormalizer()
+    cache = TermCache(normalizer, max_size=10)
+
+    assert cache.normalize(['cats', 'dogs', 'cats', 'cat']) == ['cat', 'dog', 'cat', 'cat']
+    # Repeated token of the batch is normalized once and counts as a hit
+    assert normalizer.calls == ['cats', 'dogs', 'cat']
+    assert cache.stats() == {'entries': 3, 'maxSize': 10, 'hits': 1, 'misses': 3, 'hitRate': 0.25}
+
+    assert cache.normalize(iter(['dogs', 'birds'])) == ['dog', 'bird']
+    assert normalizer.calls == ['cats', 'dogs', 'cat', 'birds']
+    assert cache.stats() == {'entries': 4, 'maxSize': 10, 'hits': 2, 'misses': 4, 'hitRate': 2 / 6}
+
+
+def test_normalize_evicts_least_recently_used_tokens():
+    normalizer = CountingNormalizer()
+    cache = TermCache(normalizer, max_size=2)
+
+    cache.normalize(['a', 'b'])
+    cache.normalize(['a', 'c'])  # b is the least recently used token
+    cache.normalize(['a', 'b'])
+    assert normalizer.calls == ['a', 'b', 'c', 'b']
+    assert cache.stats()['entries'] == 2
+
+
+def test_disabled_cache_normalizes_every_batch():
+    normalizer = CountingNormalizer()
+    cache = TermCache(normalizer, max_size=0)
+
+    assert cache.normalize(['cats', 'cats']) == ['cat', 'cat']
+    assert cache.normalize(['cats']) == ['cat']
+    assert normalizer.calls == ['cats', 'cats']
+    assert cache.stats()['entries'] == 0
+
+
+def test_get_or_compute_many_caches_computed_values():
+    cache = LruCache(10, sizeof=len)
+
+    assert cache.get_or_compute_many(['ab', 'c'], str.upper) == ['AB', 'C']
+    assert cache.get_or_compute_many(['c', 'd'], lambda key: key * 20) == ['C', 'd' * 20]  # too large to cache
+    assert cache.stats() == {'entries': 2, 'size': 3, 'maxSize': 10, 'hits': 1, 'misses': 3}
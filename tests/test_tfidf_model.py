@@ -0,0 +1,127 @@
+import math
+import random
+from collections import Counter
+
+import pytest
+
+from src.api.dtos import DocumentDto
+from src.index.index import Index
+from src.index.index_config import IndexConfig
+from src.search_model.tfidf_model import TfIdfModel
+from tests.helpers import WhitespacePreprocessor
+
+VOCABULARY = [f'w{i}' for i in range(60)]
+N_DOCUMENTS = 120
+
+
+def _text(rnd: random.Random) -> str:
+    return ' '.join(rnd.choices(VOCABULARY, k=rnd.randint(3, 20)))
+
+
+def _add(index: Index, texts: dict):
+    index.add_batch([index.preprocess_document(DocumentDto(id=document_id, text=text, title=None,
+                                                           additionalProperties={}))
+                     for document_id, text in texts.items()])
+
+
+def _reference_scores(texts: dict, query: str) -> dict:
+    """
+    Cosine similarity of the tf-idf vectors of the query and every document computed from scratch
+    """
+    bows = {document_id: Counter(text.split()) for document_id, text in texts.items()}
+    document_frequencies = Counter(term for bow in bows.values() for term in bow)
+    idf = {term: math.log(len(bows) / df) for term, df in document_frequencies.items()}
+
+    def vector(bow):
+        return {term: idf[term] * (1 + math.log(tf)) for term, tf in bow.items() if term in idf}
+
+    query_vector = vector(Counter(query.split()))
+    query_norm = math.sqrt(sum(weight * weight for weight in query_vector.values()))
+    scores = {}
+    for document_id, bow in bows.items():
+        document_vector = vector(bow)
+        dot = sum(weight * document_vector.get(term, 0) for term, weight in query_vector.items())
+        if dot > 0:
+            scores[document_id] = dot / (math.sqrt(sum(w * w for w in document_vector.values())) * query_norm)
+    return scores
+
+
+def _assert_scores_match(index: Index, texts: dict, queries):
+    for query in queries:
+        results, total = index.models['tfidf'].search(query, None)
+        reference = _reference_scores(texts, query)
+        assert total == len(reference)
+        assert {document.id: score for score, document in results} == pytest.approx(reference)
+
+
+def test_scores_match_reference_after_updates():
+    rnd = random.Random(11)
+    index = Index(IndexConfig('tfidf-updates', WhitespacePreprocessor()), [], result_cache_size=0)
+    index.models['tfidf'] = TfIdfModel(index, WhitespacePreprocessor(), renormalization_threshold=0)
+    queries = [' '.join(rnd.sample(VOCABULARY, 2)) for _ in range(10)] + ['w33']
+    try:
+        texts = {f'd{i}': _text(rnd) for i in range(N_DOCUMENTS)}
+        _add(index, texts)
+        _assert_scores_match(index, texts, queries)
+
+        # Updates keep the number of documents, so do additions balanced by deletions
+        updated = {document_id: _text(rnd) for document_id in rnd.sample(sorted(texts), 10)}
+        _add(index, updated)
+        texts.update(updated)
+        assert index.snapshot().n_docs == N_DOCUMENTS
+        _assert_scores_match(index, texts, queries)
+
+        deleted = rnd.sample(sorted(texts), 5)
+        added = {f'new{i}': _text(rnd) for i in range(5)}
+        index.delete_batch(deleted)
+        _add(index, added)
+        for document_id in deleted:
+            del texts[document_id]
+        texts.update(added)
+        assert index.snapshot().n_docs == N_DOCUMENTS
+        _assert_scores_match(index, texts, queries)
+    finally:
+        index.close()
+
+
+def _fail_on_norms(index: Index, monkeypatch):
+    def document_norms(*args, **kwargs):
+        raise AssertionError('norms are computed by the search')
+
+    monkeypatch.setattr(index.models['tfidf'], 'document_norms', document_norms)
+
+
+def test_norms_are_computed_before_publishing(monkeypatch):
+    rnd = random.Random(13)
+    index = Index(IndexConfig('tfidf-prepared', WhitespacePreprocessor()), [], result_cache_size=0)
+    try:
+        texts = {f'd{i}': _text(rnd) for i in range(N_DOCUMENTS)}
+        _add(index, dict(list(texts.items())[:N_DOCUMENTS // 2]))
+        _add(index, dict(list(texts.items())[N_DOCUMENTS // 2:]))
+        while index.merge_segments():
+            pass
+        _fail_on_norms(index, monkeypatch)
+        _assert_scores_match(index, texts, ['w1 w2', 'w33'])
+    finally:
+        index.close()
+
+
+def test_opened_index_reads_stored_norms(tmp_path, monkeypatch):
+    rnd = random.Random(17)
+    index = Index(IndexConfig('tfidf-saved', WhitespacePreprocessor()), [], result_cache_size=0)
+    texts = {f'd{i}': _text(rnd) for i in range(N_DOCUMENTS)}
+    _add(index, texts)
+    index.delete_batch(['d0', 'd1'])
+    del texts['d0'], texts['d1']
+    index.save(str(tmp_path / 'index.seg'))
+    index.close()
+
+    opened = Index.open(str(tmp_path / 'index.seg'), IndexConfig('tfidf-saved', WhitespacePreprocessor()))
+    try:
+        # The norms stored in the file are used, so no posting list is decoded to compute them
+        _, _, norms = opened.segments[0].model_data['tfidf_norms']
+        assert isinstance(norms, memoryview) and len(norms) == N_DOCUMENTS - 2
+        _fail_on_norms(opened, monkeypatch)
+        _assert_scores_match(opened, texts, ['w1 w2', 'w33'])
+    finally:
+        opened.close()
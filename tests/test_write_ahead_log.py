@@ -0,0 +1,129 @@
+import os
+import threading
+
+import pytest
+
+from src.index.write_ahead_log import WriteAheadLog, WAL_MAGIC
+
+
+def _records(n: int, start: int = 0):
+    return [{'op': 'add', 'id': f'd{i}', 'text': f'dokument čislo {i}'} for i in range(start, start + n)]
+
+
+def _write_log(path: str, records):
+    wal = WriteAheadLog(path)
+    for record in records:
+        wal.sync(wal.append(record))
+    wal.close()
+
+
+def test_records_are_replayed_after_reopen(tmp_path):
+    path = str(tmp_path / 'index.wal')
+    _write_log(path, _records(3))
+    assert WriteAheadLog.read_records(path) == _records(3)
+
+    # Reopened log appends after the existing records
+    _write_log(path, _records(2, start=3))
+    assert WriteAheadLog.read_records(path) == _records(5)
+
+
+@pytest.mark.parametrize('cut', [1, 5, 8, 20])
+def test_torn_record_is_truncated_on_reopen(tmp_path, cut):
+    path = str(tmp_path / 'index.wal')
+    _write_log(path, _records(3))
+    valid_size = os.path.getsize(path)
+    _write_log(path, _records(1, start=3))
+    with open(path, 'r+b') as f:
+        f.truncate(valid_size + cut)  # the last record was cut short in the middle of a write
+
+    assert WriteAheadLog.read_records(path) == _records(3)
+    wal = WriteAheadLog(path)
+    assert os.path.getsize(path) == valid_size
+    wal.sync(wal.append({'op': 'delete', 'id': 'd0'}))
+    wal.close()
+    assert WriteAheadLog.read_records(path) == _records(3) + [{'op': 'delete', 'id': 'd0'}]
+
+
+def test_corrupted_record_ends_the_log(tmp_path):
+    path = str(tmp_path / 'index.wal')
+    _write_log(path, _records(2))
+    second_record = os.path.getsize(path)
+    _write_log(path, _records(2, start=2))
+    with open(path, 'r+b') as f:
+        f.seek(second_record + 12)  # a byte of the payload of the third record
+        byte = f.read(1)
+        f.seek(second_record + 12)
+        f.write(bytes([byte[0] ^ 0xFF]))
+
+    # Records after the one failing the checksum were never acknowledged before it
+    assert WriteAheadLog.read_records(path) == _records(2)
+    WriteAheadLog(path).close()
+    assert os.path.getsize(path) == second_record
+
+
+def test_incomplete_header_and_invalid_magic(tmp_path):
+    path = str(tmp_path / 'index.wal')
+    with open(path, 'wb') as f:
+        f.write(WAL_MAGIC[:4])
+    assert WriteAheadLog.read_records(path) == []
+    _write_log(path, _records(1))
+    assert WriteAheadLog.read_records(path) == _records(1)
+
+    with open(path, 'r+b') as f:
+        f.write(b'NOTAWAL\x00')
+    with pytest.raises(ValueError):
+        WriteAheadLog(path)
+
+
+def test_concurrent_syncs_share_fsync(tmp_path, monkeypatch):
+    path = str(tmp_path / 'index.wal')
+    wal = WriteAheadLog(path)
+    fsyncs, fsync = [], os.fsync
+    monkeypatch.setattr(os, 'fsync', lambda fd: (fsyncs.append(fd), fsync(fd)))
+
+    n_threads = 8
+    appended = threading.Barrier(n_threads)
+    lsns = [0] * n_threads
+
+    def writer(thread: int):
+        lsns[thread] = wal.append(_records(1, start=thread)[0])
+        appended.wait()
+        wal.sync(lsns[thread])
+
+    threads = [threading.Thread(target=writer, args=(thread,)) for thread in range(n_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # All records were appended before the first fsync started, so it committed all of them
+    assert len(fsyncs) == 1
+    assert max(lsns) == wal.written_lsn
+    monkeypatch.undo()
+    wal.close()
+    assert sorted(WriteAheadLog.read_records(path), key=lambda record: int(record['id'][1:])) == _records(n_threads)
+
+
+def test_truncate_keeps_records_after_lsn(tmp_path):
+    path = str(tmp_path / 'index.wal')
+    wal = WriteAheadLog(path)
+    for record in _records(2):
+        wal.append(record)
+    checkpoint_lsn = wal.written_lsn
+    wal.sync(wal.append(_records(1, start=2)[0]))
+
+    # Records up to the checkpoint are replaced by the checkpoint record
+    wal.truncate(checkpoint_lsn, [{'op': 'checkpoint'}])
+    assert WriteAheadLog.read_records(path) == [{'op': 'checkpoint'}] + _records(1, start=2)
+
+    # Sequence numbers keep growing after the truncation and map to the new file
+    third_lsn = wal.written_lsn
+    wal.sync(wal.append(_records(1, start=3)[0]))
+    wal.truncate(third_lsn)
+    assert WriteAheadLog.read_records(path) == _records(1, start=3)
+
+    wal.reset([{'op': 'checkpoint'}])
+    wal.sync(wal.append(_records(1, start=4)[0]))
+    wal.close()
+    assert WriteAheadLog.read_records(path) == [{'op': 'checkpoint'}] + _records(1, start=4)
+    assert not os.path.exists(path + '.tmp')